@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""Yemci performans ölçüm paketi.
+
+Sentetik data.json veri kümeleri üretir; veri yükleme/kaydetme, yedekleme,
+işlem tablosu, müşteri ve yem adı arama, bakiye etiketi, raporlar ve Excel dışa aktarma sürelerini
+ekransız (offscreen) Qt platformunda ölçer. Müşteri araması ayrıca 50.000
+müşteriyle (--filter-customers) tuş vuruşu başına ölçülür. Sonuçlar JSON olarak yazılır ve
+önceki bir sonuçla (--baseline) karşılaştırılabilir.
+
+Örnekler:
+    python benchmark.py --preset small --output sonuc.json
+    python benchmark.py --preset small medium --baseline onceki.json
+    python benchmark.py --customers 200 --records 20000 --repeat 5
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import tempfile
+import itertools
+from datetime import datetime, timedelta
+
+import headless  # noqa: F401  (yempyqt'den önce)
+import yempyqt
+
+PRESETS = {
+    "small": (10, 1_000),
+    "medium": (1_000, 100_000),
+    "large": (50_000, 1_000_000),
+}
+FIRST_NAMES = ["Ahmet", "Mehmet", "Ayşe", "Fatma", "İsmail", "Hüseyin", "Şükrü", "Çağlar", "Gülşen", "Özgür", "Ümit", "İbrahim"]
+LAST_NAMES = ["Yılmaz", "Kaya", "Demir", "Çelik", "Şahin", "Öztürk", "Aydın", "Arslan", "Doğan", "Kılıç", "Güneş", "Işık"]
+FEEDS = ["Besi Yemi", "Süt Yemi", "Arpa", "Buzağı Başlangıç", "Kuzu Yemi", "Mısır Silajı", "Saman", "Yonca"]
+SEARCH_QUERY = "yılm"
+SEARCH_CHAR = "a"  # Müşterilerin çoğunu eşleyen tek harflik sorgu
+FILTER_CUSTOMERS = 50_000  # Müşteri arama ölçümünün müşteri sayısı
+FEED_QUERY = "yem"
+
+# =============================================================================
+# VERİ ÜRETİCİ
+# =============================================================================
+def customer_names(count, rng):
+    names, seen = [], set()
+    while len(names) < count:
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if name in seen: name = f"{name} {len(names) + 1}"
+        seen.add(name); names.append(name)
+    return names
+
+def generate_dataset(customers, records, seed=1):
+    """{müşteri: kayıtlar} sözlüğü üretir; kayıtlar müşterilere çarpık (birkaç büyük defter, çok sayıda küçük) dağılır."""
+    rng = random.Random(seed)
+    names = customer_names(customers, rng)
+    weights = [1.0 / (rank + 1) for rank in range(customers)]
+    companies = {name: [] for name in names}
+    start = datetime(2020, 1, 1)
+    for name in rng.choices(names, weights, k=records):
+        tarih = (start + timedelta(seconds=rng.randrange(5 * 365 * 86400))).strftime(yempyqt.DATE_FORMAT)
+        if rng.random() < 0.7:
+            adet, fiyat = float(rng.randint(1, 50)), round(rng.uniform(100, 600), 2)
+            companies[name].append({"type": "purchase", "data": {"yem": rng.choice(FEEDS), "adet": adet, "fiyat": fiyat, "toplam": adet * fiyat, "tarih": tarih}})
+        else:
+            companies[name].append({"type": "payment", "data": {"aciklama": "Ödeme", "tutar": round(rng.uniform(100, 10000), 2), "tarih": tarih}})
+    return companies
+
+def write_dataset(companies, path):
+    """Veri kümesini programın kullandığı biçimde (girintili JSON) yazar."""
+    yempyqt.write_json_atomic(path, companies)
+
+# =============================================================================
+# ÖLÇÜM
+# =============================================================================
+def measure(func, repeat, setup=None, warmup=False):
+    """func'u repeat kez çalıştırır; en küçük, ortanca ve en büyük süreyi saniye olarak döndürür.
+
+    warmup verilirse ilk (gecikmeli içe aktarma, önbellek doldurma gibi işler
+    yapan) çağrı ölçüme katılmaz; böylece farklı tekrar sayıları karşılaştırılabilir.
+    """
+    if warmup: func()
+    samples = []
+    for _ in range(repeat):
+        if setup is not None: setup()
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return {"min": min(samples), "median": statistics.median(samples), "max": max(samples), "runs": repeat}
+
+def measure_company_filter(window, repeat):
+    """Müşteri aramasını ölçer: ilk arama (dizin kurulur), harf harf yazıp silme (tuş vuruşu başına) ve tek harflik sorgu."""
+    entry = window.entry_search_company
+    entry.blockSignals(True)
+    texts = [SEARCH_QUERY[:length] for length in range(1, len(SEARCH_QUERY) + 1)]
+    keystrokes = itertools.cycle(texts + texts[-2:0:-1])  # y, yı, yıl, yılm, yıl, yı, y, ...
+    results = {"search_index_build": measure(window._filter_company_list, 1, setup=lambda: entry.setText(SEARCH_QUERY))}
+    results["_filter_company_list"] = measure(window._filter_company_list, repeat * 2 * len(texts), setup=lambda: entry.setText(next(keystrokes)), warmup=True)
+    def clear_then_type_char():
+        entry.setText(""); window._filter_company_list(); entry.setText(SEARCH_CHAR)
+    results["_filter_company_list_one_char"] = measure(window._filter_company_list, repeat, setup=clear_then_type_char)
+    entry.setText(""); window._filter_company_list()
+    entry.blockSignals(False)
+    return results
+
+def run_company_filter(customers, repeat, seed):
+    """Müşteri aramasını çok sayıda müşteriyle (müşteri başına bir kayıt) ölçer."""
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    workdir = tempfile.mkdtemp(prefix="yemci_bench_filter_")
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        print(f"[müşteri arama] {customers} müşteri üretiliyor...", file=sys.stderr)
+        write_dataset(generate_dataset(customers, customers, seed), yempyqt.DATA_FILE)
+        window = yempyqt.CariApp()
+        window.get_current_time = datetime.now
+        app.processEvents()
+        results = measure_company_filter(window, repeat)
+        window.close()
+        app.processEvents()
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {"customers": customers, "records": customers, "results": results}
+
+def run_dataset(label, customers, records, repeat, seed):
+    """Bir veri kümesini geçici bir klasörde üretip tüm ölçümleri yapar."""
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    workdir = tempfile.mkdtemp(prefix=f"yemci_bench_{label}_")
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    results = {}
+    try:
+        print(f"[{label}] {customers} müşteri, {records} kayıt üretiliyor...", file=sys.stderr)
+        companies = generate_dataset(customers, records, seed)
+        write_dataset(companies, yempyqt.DATA_FILE)
+        largest = max(companies, key=lambda name: len(companies[name]))
+        del companies
+
+        dm = yempyqt.DataManager()
+        results["load_data"] = measure(dm.load_data, repeat)  # Kurucu zaten bir kez yükler; yalnızca okuma ölçülür
+        results["save_data"] = measure(dm.save_data, repeat)
+        names = dm.company_names()
+        store = yempyqt.BackupStore()
+        results["backup_data_first"] = measure(lambda: store.create(dm.open_reader(names), names), 1, setup=lambda: shutil.rmtree(yempyqt.BACKUP_DIR, ignore_errors=True))
+        results["backup_data_incremental"] = measure(lambda: store.create(dm.open_reader(names), names), repeat)
+        results["export_to_excel"] = measure(lambda: yempyqt.export_statements(dm.open_reader([largest]), [(largest, dm.get_balance(largest))], "export.xlsx"), repeat, warmup=True)
+        reports = yempyqt.ReportEngine(dm)
+        results["report_build"] = measure(reports.update, 1)  # İlk yenileme tüm defterleri okur
+        results["report"] = measure(lambda: reports.report(datetime.now()), repeat)
+        ledger = yempyqt.Ledger(dm, datetime.now)
+        results["report_refresh"] = measure(reports.update, repeat, setup=lambda: ledger.add(largest, ledger.payment(1)))
+        results["feed_index_build"] = measure(dm.get_feed_index, 1)  # İlk istek dizini kurar
+        results["feed_search"] = measure(lambda: dm.get_feed_index().search(FEED_QUERY, largest), repeat, warmup=True)
+        dm.close()
+
+        started = time.perf_counter()
+        window = yempyqt.CariApp()
+        window.get_current_time = datetime.now
+        app.processEvents()
+        elapsed = time.perf_counter() - started
+        results["window_init"] = {"min": elapsed, "median": elapsed, "max": elapsed, "runs": 1}
+        model = window.company_model
+        results["on_company_select"] = measure(lambda: window.list_companies.setCurrentIndex(model.index(model.row_of(largest))), 1)
+        records_of_largest = window.data_manager.get_records(largest)
+        results["_sort_and_update_treeview"] = measure(window._sort_and_update_treeview, repeat, warmup=True)
+        results["_update_treeview"] = measure(lambda: window._update_treeview(records_of_largest), repeat, warmup=True)
+        results["_update_total_label"] = measure(window._update_total_label, repeat, warmup=True)
+        results.update(measure_company_filter(window, repeat))
+        window.close()
+        app.processEvents()
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {"customers": customers, "records": records, "largest_ledger": len(records_of_largest), "results": results}
+
+# =============================================================================
+# KARŞILAŞTIRMA
+# =============================================================================
+def compare(current, baseline, threshold, min_delta=0.001):
+    """Ortanca süreleri temel sonuçla karşılaştırır; (rapor satırları, yavaşlama var mı) döndürür.
+
+    min_delta saniyeden küçük farklar ölçüm gürültüsü sayılır ve işaretlenmez.
+    """
+    lines, regressed = [], False
+    for label, dataset in current["datasets"].items():
+        base_dataset = baseline.get("datasets", {}).get(label)
+        if base_dataset is None: lines.append(f"[{label}] temel sonuçta yok, atlandı"); continue
+        lines.append(f"[{label}]")
+        for name, stats in dataset["results"].items():
+            base = base_dataset["results"].get(name)
+            if base is None: lines.append(f"  {name:<28}{stats['median'] * 1000:10.1f} ms   (yeni)"); continue
+            ratio = stats["median"] / base["median"] if base["median"] else float("inf")
+            flag = ""
+            if abs(stats["median"] - base["median"]) < min_delta: pass
+            elif ratio > 1 + threshold: flag, regressed = "  YAVAŞLAMA", True
+            elif ratio < 1 - threshold: flag = "  hızlanma"
+            lines.append(f"  {name:<28}{base['median'] * 1000:10.1f} -> {stats['median'] * 1000:10.1f} ms  x{ratio:5.2f}{flag}")
+    return lines, regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Yemci performans ölçüm paketi")
+    parser.add_argument("--preset", nargs="+", choices=sorted(PRESETS), help="Hazır veri kümesi boyutları (varsayılan: small)")
+    parser.add_argument("--customers", type=int, help="Özel veri kümesi: müşteri sayısı")
+    parser.add_argument("--records", type=int, help="Özel veri kümesi: toplam kayıt sayısı")
+    parser.add_argument("--repeat", type=int, default=3, help="Her ölçümün tekrar sayısı")
+    parser.add_argument("--seed", type=int, default=1, help="Veri üreticinin tohum değeri")
+    parser.add_argument("--filter-customers", type=int, default=FILTER_CUSTOMERS, help=f"Müşteri arama ölçümünün müşteri sayısı (0: ölçülmez, varsayılan: {FILTER_CUSTOMERS})")
+    parser.add_argument("--output", help="Sonuçların yazılacağı JSON dosyası (varsayılan: standart çıktı)")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki sonuç dosyası")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Yavaşlama sayılacak oran (varsayılan: 0.10 = %%10)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Bundan küçük farklar gürültü sayılır (ms)")
+    args = parser.parse_args()
+
+    datasets = [(name, *PRESETS[name]) for name in (args.preset or [])]
+    if args.customers and args.records: datasets.append((f"custom_{args.customers}_{args.records}", args.customers, args.records))
+    if not datasets: datasets = [("small", *PRESETS["small"])]
+
+    output = {
+        "meta": {"version": yempyqt.__version__, "python": platform.python_version(), "platform": platform.platform(),
+                 "storage_backend": yempyqt.STORAGE_BACKEND, "repeat": args.repeat, "seed": args.seed,
+                 "created": datetime.now().strftime(yempyqt.DATE_FORMAT)},
+        "datasets": {label: run_dataset(label, customers, records, args.repeat, args.seed) for label, customers, records in datasets},
+    }
+    if args.filter_customers: output["datasets"][f"company_filter_{args.filter_customers}"] = run_company_filter(args.filter_customers, args.repeat, args.seed)
+    text = json.dumps(output, ensure_ascii=False, indent=4)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: f.write(text)
+    else: print(text)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f: baseline = json.load(f)
+        lines, regressed = compare(output, baseline, args.threshold, args.min_delta_ms / 1000)
+        print("\n".join(lines), file=sys.stderr)
+        return 1 if regressed else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
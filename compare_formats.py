@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Veri dosyası biçimlerini karşılaştırır.
+
+benchmark.py'nin veri üreticisiyle sentetik bir veri kümesi üretir; her
+biçim ve sıkıştırma birleşimi için anlık görüntünün yazma/okuma sürelerini ve
+diskteki boyutunu ölçer. Kurulu olmayan paketlere (msgpack, zstandard) bağlı
+birleşimler atlanır.
+
+Örnekler:
+    python compare_formats.py
+    python compare_formats.py --customers 1000 --records 100000 --repeat 5 --output bicimler.json
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+
+import benchmark
+import yempyqt
+
+CODECS = ("json", "struct", "msgpack")
+COMPRESSIONS = (None, "gzip", "zstd")
+
+def run(customers, records, repeat, seed):
+    companies = yempyqt.records_from_json(benchmark.generate_dataset(customers, records, seed))
+    meta = {"aggregates_kurus": yempyqt.compute_aggregates(companies)}
+    workdir = tempfile.mkdtemp(prefix="yemci_formats_")
+    results = {}
+    try:
+        for codec in CODECS:
+            for compression in COMPRESSIONS:
+                label = f"{codec}+{compression}" if compression else codec
+                serializer = yempyqt.Serializer(codec, compression)
+                path = os.path.join(workdir, label)
+                try: serializer.write(path, companies, meta)
+                except (ImportError, yempyqt.SerializationError) as e:
+                    print(f"{label}: atlandı ({e})", file=sys.stderr); continue
+                save = benchmark.measure(lambda: serializer.write(path, companies, meta), repeat)
+                load = benchmark.measure(lambda: yempyqt.Serializer.read(path), repeat)
+                results[label] = {"save": save, "load": load, "size": os.path.getsize(path)}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Yemci veri dosyası biçimi karşılaştırması")
+    parser.add_argument("--customers", type=int, default=1_000, help="Müşteri sayısı")
+    parser.add_argument("--records", type=int, default=100_000, help="Toplam kayıt sayısı")
+    parser.add_argument("--repeat", type=int, default=3, help="Her ölçümün tekrar sayısı")
+    parser.add_argument("--seed", type=int, default=1, help="Veri üreticinin tohum değeri")
+    parser.add_argument("--output", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    results = run(args.customers, args.records, args.repeat, args.seed)
+    base = results.get("json")
+    print(f"{args.customers} müşteri, {args.records} kayıt (ortanca süreler)")
+    print(f"{'biçim':<16}{'yazma ms':>10}{'okuma ms':>10}{'boyut KB':>12}{'oran':>8}")
+    for label, stats in results.items():
+        ratio = stats["size"] / base["size"] if base else 1.0
+        print(f"{label:<16}{stats['save']['median'] * 1000:10.1f}{stats['load']['median'] * 1000:10.1f}{stats['size'] / 1024:12.1f}{ratio:8.2f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"customers": args.customers, "records": args.records, "seed": args.seed, "results": results}, f, ensure_ascii=False, indent=4)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
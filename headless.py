@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""yempyqt'yi pencere açmadan çalıştıran betiklerin (testler, ölçümler) ortamı.
+
+yempyqt içe aktarılmadan önce içe aktarılmalıdır: ekransız Qt ve (Windows
+dışında) lisans dosyaları için APPDATA ayarlanır. Önceden verilmiş değerler
+korunur.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("APPDATA", tempfile.gettempdir())
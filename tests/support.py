@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Testlerin ortak hazırlığı: ekransız ortam, geçici çalışma klasörü ve her depo türü için veri yöneticisi."""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import headless  # noqa: F401  (yempyqt'den önce)
+import yempyqt
+
+# Depo türü -> veri yöneticisi; her biri çalışma klasöründeki varsayılan dosyaları kullanır.
+BACKENDS = {
+    "json": lambda: yempyqt.DataManager(persist_delay=0),
+    "sqlite": yempyqt.SQLiteDataManager,
+    "sharded": lambda: yempyqt.ShardedDataManager(persist_delay=0),
+}
+
+def purchase(tarih, yem, fiyat, adet=1):
+    """ISO tarihli alış kaydı; fiyat TL cinsindendir."""
+    return yempyqt.Purchase(yempyqt.datetime_to_ts(datetime.fromisoformat(tarih)), yem, adet, fiyat * 100, adet * fiyat * 100)
+
+class StoreTestCase(unittest.TestCase):
+    """Her testi kendi geçici klasöründe çalıştırır."""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="yemci_test_")
+        self.previous_cwd = os.getcwd()
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        os.chdir(self.previous_cwd)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def open_managers(self, kinds=tuple(BACKENDS), prepare=None):
+        """(tür, veri yöneticisi) çiftleri; her depo türü kendi klasöründe açılır, dönem arşivi de veri dosyasının yanında tutulur.
+
+        prepare verilirse her klasörde yönetici açılmadan önce çağrılır (ör. eski bir veri dosyası yazmak için).
+        """
+        for kind in kinds:
+            os.chdir(self.directory); os.mkdir(kind); os.chdir(kind)
+            if prepare is not None: prepare()
+            yield kind, BACKENDS[kind]()
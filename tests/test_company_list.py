@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Müşteri listesi modeli testleri: artımlı güncellenen satırlar, baştan süzülüp sıralananla aynı olmalıdır.
+
+Çalıştırma: python -m pytest tests  (ya da python -m unittest discover tests)
+"""
+import random
+import unittest
+
+from support import yempyqt
+
+class Balances:
+    """CompanyListModel'in kullandığı veri yöneticisi arayüzü (ad listesi ve bakiye)."""
+    def __init__(self, balances):
+        self.balances = balances
+    def company_names(self):
+        return list(self.balances)
+    def get_balance(self, name):
+        return self.balances[name]
+
+class CompanyListModelTest(unittest.TestCase):
+    def expected(self, model, balances, query):
+        names = [name for name in balances if query is None or query in yempyqt.turkish_casefold(name)]
+        if model.by_balance: return sorted(names, key=lambda name: (-balances[name], yempyqt.turkish_casefold(name), name))
+        return sorted(names, key=lambda name: (yempyqt.turkish_casefold(name), name))
+
+    def test_incremental_rows_match_full_rebuild(self):
+        rng = random.Random(5)
+        syllables = ["ah", "met", "İs", "ma", "il", "çe", "tin", "ze", "ki", "Iş", "ık", "öz"]
+        word = lambda: "".join(rng.choice(syllables) for _ in range(rng.randint(1, 3))).capitalize()
+        balances = {word() + f" {n}": float(rng.randint(-5, 5)) for n in range(300)}
+        model, index = yempyqt.CompanyListModel(Balances(balances)), yempyqt.CompanySearchIndex(balances)
+        model.reload()
+        query = None
+        for step in range(600):
+            action = rng.random()
+            if action < 0.15:
+                name = word() + f" y{step}"
+                balances[name] = float(rng.randint(-5, 5)); index.add(name); model.add_company(name)
+            elif action < 0.25:
+                name = rng.choice(list(balances))
+                del balances[name]; index.remove(name); model.remove_company(name)
+            elif action < 0.6:
+                name = rng.choice(list(balances))
+                balances[name] += rng.randint(-3, 3); model.company_changed(name)
+            elif action < 0.65: model.set_sort(not model.by_balance)
+            else: query = rng.choice([None, "a", "i", "ı", "me", "ah", "ism", "çet", "ahme", "zek"])
+            model.set_matches(index.search(query or ""))
+            rows = [model.name_at(row) for row in range(model.rowCount())]
+            self.assertEqual(rows, self.expected(model, balances, query and yempyqt.turkish_casefold(query)), step)
+            self.assertTrue(all(model.row_of(name) == row for row, name in enumerate(rows)))
+
+    def test_unchanged_matches_are_not_rebuilt(self):
+        model, index = yempyqt.CompanyListModel(Balances({"Ahmet": 0.0, "Mehmet": 1.0})), yempyqt.CompanySearchIndex(["Ahmet", "Mehmet"])
+        model.reload()
+        self.assertTrue(model.set_matches(index.search("met")))
+        self.assertFalse(model.set_matches(index.search("met")))
+        self.assertFalse(model.set_matches(index.search("me")))  # Farklı sorgu, aynı küme
+        self.assertTrue(model.set_matches(index.search("ahm")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""Veri dosyası testleri: biçimler, sağlama toplamı, günlüğün yeniden oynatılması, sıkıştırma ve eski dosyalara kimlik verilmesi.
+
+Çalıştırma: python -m pytest tests  (ya da python -m unittest discover tests)
+"""
+import os
+import json
+import unittest
+from datetime import datetime
+
+from support import BACKENDS, StoreTestCase, purchase, yempyqt
+
+def ts(tarih):
+    return yempyqt.datetime_to_ts(datetime.fromisoformat(tarih))
+
+def sample_ledgers():
+    return {
+        "Ahmet": [purchase("2025-01-05", "Arpa", 10, 3), yempyqt.Payment(ts("2025-01-06"), "Ödeme açıklaması", 700),
+                  yempyqt.CarryForward(ts("2024-12-31"), "2024 devri", -1250)],
+        "İsmail Çağlar": [purchase("2025-02-01", "Süt Yemi", 12, 2)],
+        "Boş": [],
+    }
+
+def state(dm):
+    """Müşteriler, kayıtlar (kimlikleriyle) ve özetler."""
+    names = dm.company_names()
+    return ({name: [(rec.id, rec.type, rec._values()) for rec in dm.get_records(name)] for name in names},
+            {name: dm.get_aggregate(name) for name in names})
+
+# Kimlik kullanmayan (şema 1) eski data.json ve günlüğü
+LEGACY_DATA = {
+    "Ahmet": [{"type": "purchase", "data": {"tarih": "2024-01-05 10:00:00", "yem": "Arpa", "adet": 2, "fiyat": 10.0, "toplam": 20.0}},
+              {"type": "payment", "data": {"tarih": "2024-01-06 10:00:00", "aciklama": "Nakit", "tutar": 5.0}}],
+    "Mehmet": [{"type": "purchase", "data": {"tarih": "2024-02-01 09:30:00", "yem": "Saman", "adet": 1, "fiyat": 7.5, "toplam": 7.5}}],
+}
+LEGACY_JOURNAL = [
+    {"op": "add", "company": "Mehmet", "record": {"type": "payment", "data": {"tarih": "2024-02-02 08:00:00", "aciklama": "Havale", "tutar": 3.0}}, "seq": 1},
+    {"op": "update", "company": "Ahmet", "old": LEGACY_DATA["Ahmet"][1],
+     "record": {"type": "payment", "data": {"tarih": "2024-01-06 10:00:00", "aciklama": "Nakit", "tutar": 6.0}}, "seq": 2},
+]
+
+def write_legacy_files():
+    with open(yempyqt.DATA_FILE, "w", encoding="utf-8") as f: json.dump(LEGACY_DATA, f, ensure_ascii=False)
+    with open(yempyqt.DATA_FILE + ".journal", "w", encoding="utf-8") as f:
+        for entry in LEGACY_JOURNAL: f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+class SerializerTest(unittest.TestCase):
+    def test_round_trip(self):
+        companies = sample_ledgers()
+        companies["Ahmet"][0].id, companies["Ahmet"][1].id = 7, 9  # Kimliği olan ve olmayan kayıtlar birlikte
+        meta = {"next_record_id": 10, "aggregates_kurus": yempyqt.compute_aggregates(companies)}
+        for codec in ("json", "struct", "msgpack"):
+            for compression in (None, "gzip", "zstd"):
+                with self.subTest(codec=codec, compression=compression):
+                    try: data = yempyqt.Serializer(codec, compression).dumps(companies, meta)
+                    except ImportError as e: self.skipTest(f"paket kurulu değil: {e}")
+                    self.assertEqual(data.startswith(yempyqt._FILE_MAGIC), not (codec == "json" and compression is None))
+                    loaded, loaded_meta = yempyqt.Serializer.loads(data)
+                    self.assertEqual(loaded, companies)
+                    self.assertEqual({name: [rec.id for rec in records] for name, records in loaded.items()},
+                                     {name: [rec.id for rec in records] for name, records in companies.items()})
+                    self.assertEqual(loaded_meta, dict(meta, schema_version=yempyqt.SCHEMA_VERSION))
+
+    def test_default_is_checksummed(self):
+        self.assertFalse(yempyqt.Serializer().readable)
+        data = yempyqt.Serializer().dumps(sample_ledgers(), {})
+        self.assertTrue(data.startswith(yempyqt._FILE_MAGIC))
+
+    def test_corruption_is_rejected(self):
+        data = bytearray(yempyqt.Serializer("struct", "gzip").dumps(sample_ledgers(), {}))
+        size = yempyqt._FILE_HEADER.size
+        for label, corrupt in (("yük", data[:size + 3] + bytes([data[size + 3] ^ 0x01]) + data[size + 4:]),
+                               ("eksik", data[:-1]),
+                               ("başlık", data[:size - 4] + bytes(4) + data[size:]),  # CRC alanı
+                               ("kısa", data[:size - 1])):
+            with self.subTest(label):
+                with self.assertRaises(yempyqt.SerializationError): yempyqt.Serializer.loads(bytes(corrupt))
+
+    def test_newer_schema_is_refused(self):
+        data = bytearray(yempyqt.Serializer("struct").dumps(sample_ledgers(), {}))
+        header = list(yempyqt._FILE_HEADER.unpack_from(data))
+        header[2] = yempyqt.SCHEMA_VERSION + 1
+        data[:yempyqt._FILE_HEADER.size] = yempyqt._FILE_HEADER.pack(*header)
+        with self.assertRaises(yempyqt.SchemaTooNewError): yempyqt.Serializer.loads(bytes(data))
+
+class DataManagerFileTest(StoreTestCase):
+    def open(self):
+        dm = yempyqt.DataManager(persist_delay=0)
+        self.addCleanup(lambda: dm._persistence.stop())
+        return dm
+
+    def change(self, dm):
+        """Günlüğe yazılan her türden değişiklik (toplu ekleme hariç)."""
+        ledger = yempyqt.Ledger(dm)
+        dm.add_company("Veli")
+        ledger.add("Veli", purchase("2025-03-01", "Kepek", 4, 2))
+        first = dm.get_records("Ahmet")[0]
+        dm.update_record("Ahmet", first.id, purchase("2025-01-07", "Arpa", 11, 3))
+        dm.delete_record("İsmail Çağlar", dm.get_records("İsmail Çağlar")[0].id)
+        dm.delete_company("Boş")
+
+    def crash(self, dm):
+        """Kapanmadan çıkış: günlük kapatılır, anlık görüntü yazılmaz."""
+        dm._persistence.stop(); dm._close_journal()
+
+    def test_corrupt_snapshot_is_moved_aside(self):
+        dm = self.open(); dm.add_records_bulk(sample_ledgers()); dm.close()
+        with open(yempyqt.BINARY_DATA_FILE, "r+b") as f: f.seek(-2, os.SEEK_END); f.write(b"\xff\xff")
+        dm = self.open()
+        try:
+            self.assertEqual(dm.company_names(), [])
+            self.assertTrue(os.path.exists(yempyqt.BINARY_DATA_FILE + ".bozuk"))
+        finally: dm.close()
+
+    def test_journal_replay_after_crash(self):
+        dm = self.open()
+        dm.add_records_bulk(sample_ledgers())
+        with open(yempyqt.BINARY_DATA_FILE, "rb") as f: snapshot = f.read()
+        self.change(dm)
+        expected = state(dm)
+        self.crash(dm)
+        with open(dm.journal_file, "a", encoding="utf-8") as f: f.write('{"op": "add", "company": "Ve')  # Yarım kalmış satır
+        with open(yempyqt.BINARY_DATA_FILE, "rb") as f: self.assertEqual(f.read(), snapshot)
+        dm = self.open()
+        try:
+            self.assertEqual(state(dm), expected)
+            self.assertEqual(dm.all_aggregates(), yempyqt.compute_aggregates({name: dm.get_records(name) for name in dm.company_names()}))
+            ids = {rec.id for name in dm.company_names() for rec in dm.get_records(name)}
+            ledger = yempyqt.Ledger(dm)
+            ledger.add("Ahmet", purchase("2025-04-01", "Yulaf", 3))  # Yarım satırdan sonra yeni girdi
+            self.assertNotIn(dm.get_records("Ahmet")[-1].id, ids)
+            expected = state(dm)
+        finally: self.crash(dm)
+        dm = self.open()
+        try: self.assertEqual(state(dm), expected)
+        finally: dm.close()
+
+    def test_crash_during_compaction(self):
+        dm = self.open()
+        dm.add_records_bulk(sample_ledgers())
+        self.change(dm)
+        with dm._lock: dm._rotate_journal()  # Sıkıştırma günlüğü .old dosyasına taşıdı, anlık görüntü yazılamadan çöktü
+        yempyqt.Ledger(dm).add("Ahmet", purchase("2025-05-01", "Saman", 2))
+        expected = state(dm)
+        self.crash(dm)
+        dm = self.open()
+        try: self.assertEqual(state(dm), expected)
+        finally: dm.close()
+        self.assertFalse(os.path.exists(dm._rotated_journal_file))
+
+    def test_compaction(self):
+        threshold = yempyqt.JOURNAL_COMPACT_THRESHOLD
+        yempyqt.JOURNAL_COMPACT_THRESHOLD = 5
+        self.addCleanup(setattr, yempyqt, "JOURNAL_COMPACT_THRESHOLD", threshold)
+        dm = self.open()
+        dm.add_records_bulk(sample_ledgers())
+        self.change(dm)  # Beş günlük girdisi
+        self.assertTrue(dm.flush(5))
+        expected = state(dm)
+        self.assertFalse(os.path.exists(dm._rotated_journal_file))
+        self.assertEqual(os.path.getsize(dm.journal_file) if os.path.exists(dm.journal_file) else 0, 0)
+        self.assertEqual(yempyqt.Serializer.read(yempyqt.BINARY_DATA_FILE)[1]["journal_seq"], 5)
+        self.crash(dm)
+        dm = self.open()
+        try:
+            self.assertEqual(dm._journal_count, 0)
+            self.assertEqual(state(dm), expected)
+        finally: dm.close()
+
+class LegacyFileTest(StoreTestCase):
+    def test_legacy_records_get_ids(self):
+        results = {}
+        for kind, dm in self.open_managers(prepare=write_legacy_files):
+            with self.subTest(kind):
+                try:
+                    ids = [rec.id for name in dm.company_names() for rec in dm.get_records(name)]
+                    self.assertNotIn(None, ids)
+                    self.assertEqual(len(set(ids)), len(ids), ids)
+                    self.assertEqual(dm.get_balance("Ahmet"), 14.0)  # Günlükteki eski düzenleme içerikle bulundu
+                    results[kind] = state(dm)[0]
+                finally: dm.close()
+                # Kaynak dosyalar değişmez; yeniden açılışta kimlikler aynı kalır.
+                with open(yempyqt.DATA_FILE, encoding="utf-8") as f: self.assertEqual(json.load(f), LEGACY_DATA)
+                dm = BACKENDS[kind]()
+                try: self.assertEqual(state(dm)[0], results[kind])
+                finally: dm.close()
+        self.assertEqual(results["sqlite"], results["json"])
+        self.assertEqual(results["sharded"], results["json"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Yem adı dizini (FeedIndex) testleri: artımlı güncellenen dizin, baştan kurulanla aynı olmalıdır.
+
+Çalıştırma: python -m pytest tests  (ya da python -m unittest discover tests)
+"""
+import unittest
+from datetime import datetime
+
+from support import StoreTestCase, purchase, yempyqt
+
+def state(index):
+    """Yem adları, kullanım sayıları ve müşteri fiyatları (silinen alışlar genel son fiyatı geri almaz; karşılaştırılmaz)."""
+    return {key: feed[:2] for key, feed in index._feeds.items()}, {company: prices for company, prices in index._customer_prices.items() if prices}
+
+class FeedIndexTestCase(StoreTestCase):
+    def assertMatchesFreshBuild(self, dm):
+        job = dm.begin_feed_index()
+        fresh = yempyqt.build_feed_index(job)[0]
+        self.assertEqual(state(dm.feed_index()), state(fresh))
+
+class FeedIndexUpdateTest(FeedIndexTestCase):
+    def test_bulk_add_and_delete_company(self):
+        for kind, dm in self.open_managers():
+            with self.subTest(kind):
+                try:
+                    dm.add_records_bulk({"Ahmet": [purchase("2025-01-05", "Arpa", 10), purchase("2025-01-06", "Saman", 4)]})
+                    index = dm.get_feed_index()
+                    dm.add_records_bulk({"Mehmet": [purchase("2025-02-01", "Arpa", 12), purchase("2025-02-02", "Kepek", 7)]})
+                    self.assertEqual(index.last_prices("arpa", "Mehmet"), (1200, 1200))
+                    self.assertMatchesFreshBuild(dm)
+                    dm.delete_company("Mehmet")
+                    self.assertEqual(index.search("kep"), [])
+                    self.assertMatchesFreshBuild(dm)
+                finally: dm.close()
+
+    def test_closed_period_prices(self):
+        dm = yempyqt.DataManager(persist_delay=0)
+        try:
+            dm.add_records_bulk({"Ahmet": [purchase("2024-03-01", "Arpa", 10), purchase("2024-05-01", "Arpa", 11), purchase("2025-01-05", "Saman", 4)]})
+            dm.close_period("2024", yempyqt.period_bounds("2024")[1])
+            index = dm.get_feed_index()
+            self.assertEqual(index.search("ar", "Ahmet"), ["Arpa"])
+            self.assertEqual(index.last_prices("Arpa", "Ahmet"), (None, 1100))
+        finally: dm.close()
+
+class BackgroundBuildTest(FeedIndexTestCase):
+    def test_changes_during_build_are_applied(self):
+        for kind, dm in self.open_managers():
+            with self.subTest(kind):
+                try:
+                    dm.add_records_bulk({"Ahmet": [purchase("2024-03-01", "Arpa", 10)], "Mehmet": [purchase("2025-01-05", "Kepek", 7)],
+                                         "Veli": [purchase("2025-01-06", "Saman", 4)]})
+                    job = dm.begin_feed_index()
+                    # Kurulum arka planda sürerken yapılan değişiklikler
+                    ledger = yempyqt.Ledger(dm, datetime.now)
+                    ledger.add("Ahmet", ledger.purchase("Yulaf", 1, 9))
+                    dm.delete_company("Mehmet")
+                    dm.add_records_bulk({"İsmail": [purchase("2025-01-07", "Arpa", 13)]})
+                    dm.close_period("2024", yempyqt.period_bounds("2024")[1])
+                    dm.finish_feed_index(job, yempyqt.build_feed_index(job))
+                    self.assertEqual(sorted(dm.feed_index().search("")), ["Arpa", "Saman", "Yulaf"])
+                    self.assertMatchesFreshBuild(dm)
+                finally: dm.close()
+
+if __name__ == "__main__":
+    unittest.main()
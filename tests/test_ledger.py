@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""Defter çekirdeği (Ledger) girdi çözümleme testleri.
+
+Çalıştırma: python -m pytest tests  (ya da python -m unittest discover tests)
+"""
+import unittest
+
+from support import yempyqt
+
+class ParseAmountTest(unittest.TestCase):
+    def test_turkish_and_plain_amounts(self):
+        for text, expected in (("12,5", 12.5), ("1.234,56", 1234.56), ("1.234", 1234.0), ("1.234.567", 1234567.0), ("-1.250", -1250.0),
+                               ("12.5", 12.5), ("12.50", 12.5), ("0.125", 0.125), ("1.2345", 1.2345), ("1234", 1234.0), (" 7 ", 7.0), (3, 3.0)):
+            with self.subTest(text): self.assertEqual(yempyqt.parse_amount(text), expected)
+
+    def test_invalid_amounts(self):
+        for text in ("", "abc", "1.234.56", "1,2,3"):
+            with self.subTest(text):
+                with self.assertRaises(yempyqt.LedgerError): yempyqt.parse_amount(text)
+
+if __name__ == "__main__":
+    unittest.main()
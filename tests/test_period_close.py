@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Dönem kapanışı testleri: kapanıştan sonra bakiye ve yaşlandırma raporu değişmemelidir.
+
+Çalıştırma: python -m pytest tests  (ya da python -m unittest discover tests)
+"""
+import random
+import unittest
+from datetime import datetime
+
+from support import StoreTestCase, yempyqt
+
+NOW = datetime(2026, 1, 10)
+
+def sample_ledgers(seed=7):
+    """Son altı aya dağılmış alış ve ödemeler; bazı müşteriler borçlu, bazıları alacaklı kapanır."""
+    rng, batches = random.Random(seed), {}
+    start = yempyqt.datetime_to_ts(datetime(2025, 7, 1))
+    for name, payment_ratio in (("Ahmet", 0.3), ("Mehmet", 0.45), ("İsmail", 0.7), ("Veli", 0.0)):
+        records = []
+        for _ in range(120):
+            ts = start + rng.randrange(190 * 86400)
+            if rng.random() < payment_ratio: records.append(yempyqt.Payment(ts, "Ödeme", rng.randint(50, 400) * 100))
+            else:
+                adet, fiyat = rng.randint(1, 5), rng.randint(10, 60) * 100
+                records.append(yempyqt.Purchase(ts, rng.choice(("Arpa", "Saman", "Kepek")), adet, fiyat, adet * fiyat))
+        batches[name] = records
+    return batches
+
+class PeriodCloseTest(StoreTestCase):
+    def aging(self, dm):
+        report = yempyqt.ReportEngine(dm)
+        report.update()
+        report = report.report(NOW)
+        return report["receivables"], report["credit"], report["aging"], report["aging_by_company"]
+
+    def test_aging_is_unchanged_by_close(self):
+        for kind, dm in self.open_managers():
+            with self.subTest(kind):
+                try:
+                    dm.add_records_bulk(sample_ledgers())
+                    balances, before = {name: dm.get_balance(name) for name in dm.company_names()}, self.aging(dm)
+                    ledger = yempyqt.Ledger(dm)
+                    for label in ("2025-09", "2025-11", "2025-12"): ledger.close_period(label, NOW)
+                    self.assertTrue(all(rec.ts >= yempyqt.period_bounds("2025-12")[1] or rec.type == "carry" for name in dm.company_names() for rec in dm.get_records(name)))
+                    self.assertEqual({name: dm.get_balance(name) for name in dm.company_names()}, balances)
+                    self.assertEqual(self.aging(dm), before)
+                finally: dm.close()
+
+    def test_carries_keep_purchase_dates(self):
+        ts = lambda tarih: yempyqt.datetime_to_ts(datetime.fromisoformat(tarih))
+        records = [yempyqt.Purchase(ts("2024-01-10"), "Arpa", 1, 10000, 10000), yempyqt.Purchase(ts("2024-05-10"), "Arpa", 1, 10000, 10000),
+                   yempyqt.Payment(ts("2024-06-01"), "Ödeme", 15000)]
+        end = yempyqt.period_bounds("2024")[1]
+        self.assertEqual([(rec.ts, rec.bakiye) for rec in yempyqt.carry_forward_items(records, end, "2024")], [(records[1].ts, 5000)])
+        records.append(yempyqt.Payment(ts("2024-07-01"), "Ödeme", 10000))
+        self.assertEqual([(rec.ts, rec.bakiye) for rec in yempyqt.carry_forward_items(records, end, "2024")], [(end, -5000)])
+
+    def test_journal_replays_carries(self):
+        dm = yempyqt.DataManager(persist_delay=0)
+        dm.add_records_bulk(sample_ledgers())
+        yempyqt.Ledger(dm).close_period("2025-11", NOW)
+        before = self.aging(dm)
+        dm.close()
+        dm = yempyqt.DataManager(persist_delay=0)
+        try: self.assertEqual(self.aging(dm), before)
+        finally: dm.close()
+
+if __name__ == "__main__":
+    unittest.main()
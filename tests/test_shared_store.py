@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""Ortak klasör deposu (SharedDataManager) testleri.
+
+Diğer bilgisayarların yerine ayrı Python süreçleri kullanılır: fcntl.lockf
+kilitleri süreç başına tutulduğundan aynı süreçteki iki kopya birbirini
+kilitleyemez. Çalıştırma: python -m pytest tests  (ya da python -m unittest discover tests)
+"""
+import sys
+import textwrap
+import subprocess
+import unittest
+from datetime import datetime
+
+from support import ROOT, StoreTestCase, yempyqt
+
+REMOTE_PRELUDE = f"""
+import sys
+from datetime import datetime
+sys.path.insert(0, {ROOT!r})
+import yempyqt
+dm = yempyqt.SharedDataManager(yempyqt.DATA_FILE, persist_delay=0)
+ledger = yempyqt.Ledger(dm, datetime.now)
+"""
+
+class SharedStoreTestCase(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.managers = []
+
+    def tearDown(self):
+        for dm in self.managers: dm.close()
+        super().tearDown()
+
+    def open_local(self, **kwargs):
+        dm = yempyqt.SharedDataManager(yempyqt.DATA_FILE, persist_delay=0, **kwargs)
+        self.managers.append(dm)
+        return dm
+
+    def run_remote(self, code):
+        """Kodu başka bir bilgisayar yerine geçen ayrı bir süreçte çalıştırır; süreç kendi kopyasını kapatarak çıkar."""
+        script = REMOTE_PRELUDE + textwrap.dedent(code) + "\ndm.close()\n"
+        result = subprocess.run([sys.executable, "-c", script], cwd=self.directory, capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout
+
+    def balances(self, dm):
+        return {name: dm.get_balance(name) for name in dm.company_names()}
+
+class LockContentionTest(SharedStoreTestCase):
+    def test_write_waits_for_other_process_lock(self):
+        dm = self.open_local(lock_timeout=0.3)
+        holder = subprocess.Popen([sys.executable, "-c", textwrap.dedent(f"""
+            import sys
+            sys.path.insert(0, {ROOT!r})
+            import yempyqt
+            with yempyqt.FileLock(yempyqt.DATA_FILE + ".lock"):
+                print("locked", flush=True)
+                sys.stdin.readline()
+            """)], cwd=self.directory, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        try:
+            self.assertEqual(holder.stdout.readline().strip(), "locked")
+            with self.assertRaises(yempyqt.SharedStoreError): dm.add_company("Ahmet")
+            self.assertFalse(dm.has_company("Ahmet"))
+        finally:
+            holder.stdin.write("\n"); holder.stdin.close(); holder.wait(timeout=30)
+        dm.add_company("Ahmet")
+        self.assertTrue(dm.has_company("Ahmet"))
+
+    def test_concurrent_writers_do_not_lose_records(self):
+        dm = self.open_local()
+        dm.add_company("Ahmet")
+        remote = """
+            for _ in range(50): ledger.add("Ahmet", ledger.payment(1))
+            """
+        writers = [subprocess.Popen([sys.executable, "-c", REMOTE_PRELUDE + textwrap.dedent(remote) + "\ndm.close()\n"], cwd=self.directory) for _ in range(3)]
+        ledger = yempyqt.Ledger(dm, datetime.now)
+        for _ in range(50): ledger.add("Ahmet", ledger.payment(1))
+        for writer in writers: self.assertEqual(writer.wait(timeout=60), 0)
+        dm.sync()
+        self.assertEqual(len(dm.get_records("Ahmet")), 200)
+        self.assertEqual(len({rec.id for rec in dm.get_records("Ahmet")}), 200)
+        fresh = self.open_local()
+        self.assertEqual(self.balances(fresh), {"Ahmet": -200.0})
+
+class ConflictTest(SharedStoreTestCase):
+    def test_stale_revision_is_rejected(self):
+        dm = self.open_local()
+        dm.add_company("Ahmet")
+        ledger = yempyqt.Ledger(dm, datetime.now)
+        ledger.add("Ahmet", ledger.payment(10))
+        record, revision = dm.get_records("Ahmet")[0], dm.revision("Ahmet")
+        self.run_remote("""
+            ledger.add("Ahmet", ledger.payment(5))
+            """)
+        with self.assertRaises(yempyqt.ConflictError): dm.update_record("Ahmet", record.id, yempyqt.Payment(record.ts, "düzeltme", 700), revision)
+        with self.assertRaises(yempyqt.ConflictError): dm.delete_record("Ahmet", record.id, revision)
+        # Değişiklik reddedildi ama uzak kayıt alındı; güncel revizyonla işlem yapılabilir.
+        self.assertEqual(dm.get_balance("Ahmet"), -15.0)
+        dm.delete_record("Ahmet", record.id, dm.revision("Ahmet"))
+        self.assertEqual(self.balances(self.open_local()), {"Ahmet": -5.0})
+
+class SyncTest(SharedStoreTestCase):
+    def test_sync_returns_only_changed_customers(self):
+        dm = self.open_local()
+        for name in ("Ahmet", "Mehmet"): dm.add_company(name)
+        dm.save_data()  # Anlık görüntü yoksa diğer kopya kapanırken günlüğü sıkıştırır ve bu kopya her şeyi yeniden okur
+        untouched = dm.get_records("Mehmet")
+        self.assertEqual(dm.sync(), set())
+        self.run_remote("""
+            ledger.add("Ahmet", ledger.purchase("Arpa", 2, 150))
+            dm.add_company("İsmail")
+            ledger.add("İsmail", ledger.payment(40))
+            """)
+        self.assertEqual(dm.sync(), {"Ahmet", "İsmail"})
+        self.assertEqual(dm.sync(), set())
+        self.assertEqual(self.balances(dm), {"Ahmet": 300.0, "Mehmet": 0.0, "İsmail": -40.0})
+        self.assertIs(dm.get_records("Mehmet"), untouched)  # Değişmeyen müşterinin defteri yeniden okunmaz
+        self.assertEqual(dm.all_aggregates(), yempyqt.compute_aggregates(dm.companies))
+
+    def test_remote_delete_and_edit(self):
+        dm = self.open_local()
+        dm.add_company("Ahmet"); dm.add_company("Mehmet")
+        ledger = yempyqt.Ledger(dm, datetime.now)
+        ledger.add("Ahmet", ledger.payment(10))
+        record_id = dm.get_records("Ahmet")[0].id
+        self.run_remote(f"""
+            record = dm.find_record("Ahmet", {record_id})
+            dm.update_record("Ahmet", {record_id}, yempyqt.Payment(record.ts, "düzeltme", 2500))
+            dm.delete_company("Mehmet")
+            """)
+        self.assertEqual(dm.sync(), {"Ahmet", "Mehmet"})
+        self.assertFalse(dm.has_company("Mehmet"))
+        self.assertEqual(dm.find_record("Ahmet", record_id).aciklama, "düzeltme")
+        self.assertEqual(dm.get_balance("Ahmet"), -25.0)
+
+    def test_writing_applies_remote_changes_before_positions_are_computed(self):
+        dm = self.open_local()
+        dm.add_company("Ahmet")
+        self.run_remote("""
+            ledger.add("Ahmet", ledger.payment(5))
+            """)
+        with dm.writing():
+            # Kilit alınırken uzak kayıt uygulanmıştır; hesaplanan konum kilit bırakılana kadar geçerli kalır.
+            self.assertEqual(len(dm.get_records("Ahmet")), 1)
+            self.assertEqual(dm.sync(), {"Ahmet"})
+            record = yempyqt.Ledger(dm, datetime.now).payment(1)
+            index = dm.insertion_index("Ahmet", record)
+            self.assertEqual(dm.add_record("Ahmet", record), index)
+
+class CompactionTest(SharedStoreTestCase):
+    def test_lagging_copy_reloads_after_compaction(self):
+        dm = self.open_local()
+        dm.add_company("Ahmet")
+        self.run_remote("""
+            for _ in range(20): ledger.add("Ahmet", ledger.payment(1))
+            dm.save_data()  # Günlüğü anlık görüntüye sıkıştırır
+            ledger.add("Ahmet", ledger.payment(2))
+            dm.add_company("Mehmet")
+            """)
+        with open(yempyqt.DATA_FILE + ".journal", encoding="utf-8") as f: self.assertIn('"compacted"', f.readline())
+        self.assertEqual(dm.sync(), {"Ahmet", "Mehmet"})
+        self.assertEqual(self.balances(dm), {"Ahmet": -22.0, "Mehmet": 0.0})
+        self.assertEqual(len(dm.get_records("Ahmet")), 21)
+        # Yeniden okunan kopya yazmaya devam edebilir; diğer kopya da bunu görür.
+        yempyqt.Ledger(dm, datetime.now).add("Mehmet", yempyqt.Ledger(dm, datetime.now).payment(3))
+        output = self.run_remote("""
+            print(dm.get_balance("Mehmet"), len(dm.get_records("Ahmet")))
+            """)
+        self.assertEqual(output.split(), ["-3.0", "21"])
+
+    def test_copy_in_step_keeps_ledgers_after_own_compaction(self):
+        dm = self.open_local()
+        dm.add_company("Ahmet")
+        ledger = yempyqt.Ledger(dm, datetime.now)
+        for _ in range(5): ledger.add("Ahmet", ledger.payment(1))
+        dm.save_data()
+        ledgers = dm.get_records("Ahmet")
+        self.run_remote("""
+            ledger.add("Ahmet", ledger.payment(4))
+            """)
+        self.assertEqual(dm.sync(), {"Ahmet"})
+        self.assertIs(dm.get_records("Ahmet"), ledgers)  # Sıkıştırma işaretinden sonraki girdiler yalnızca eklenir
+        self.assertEqual(dm.get_balance("Ahmet"), -9.0)
+
+if __name__ == "__main__":
+    unittest.main()
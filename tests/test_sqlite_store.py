@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""SQLite deposu testleri: başarısız işlemler bellekteki defteri bozmamalı, içe aktarma kaynağı değiştirmemelidir.
+
+Çalıştırma: python -m pytest tests  (ya da python -m unittest discover tests)
+"""
+import sqlite3
+import unittest
+
+from support import StoreTestCase, purchase, yempyqt
+
+class SQLiteStoreTest(StoreTestCase):
+    def test_add_existing_company_keeps_balance(self):
+        dm = yempyqt.SQLiteDataManager()
+        try:
+            dm.add_records_bulk({"Ahmet": [purchase("2025-01-05", "Arpa", 10)]})
+            dm.add_company("Ahmet")
+            self.assertEqual(dm.get_balance("Ahmet"), 10.0)
+            self.assertEqual(dm.get_aggregate("Ahmet")["count"], 1)
+        finally: dm.close()
+        dm = yempyqt.SQLiteDataManager()
+        try: self.assertEqual(dm.get_balance("Ahmet"), 10.0)
+        finally: dm.close()
+
+    def test_failed_write_keeps_cache_consistent(self):
+        dm = yempyqt.SQLiteDataManager()
+        try:
+            dm.add_records_bulk({"Ahmet": [purchase("2025-01-05", "Arpa", 10), purchase("2025-01-06", "Saman", 4)]})
+            records, balance = [rec.to_dict() for rec in dm.get_records("Ahmet")], dm.get_balance("Ahmet")
+            # Özet satırı yazılamazsa kayıt değişikliği de geri alınır.
+            dm.conn.execute("CREATE TRIGGER fail BEFORE INSERT ON aggregates BEGIN SELECT RAISE(ABORT, 'yazılamadı'); END")
+            first = dm.get_records("Ahmet")[0]
+            for change in (lambda: dm.update_record("Ahmet", first.id, purchase("2025-01-05", "Arpa", 99)),
+                           lambda: dm.delete_record("Ahmet", first.id),
+                           lambda: dm.add_record("Ahmet", purchase("2025-01-07", "Kepek", 7))):
+                with self.assertRaises(sqlite3.DatabaseError): change()
+                self.assertEqual([rec.to_dict() for rec in dm.get_records("Ahmet")], records)
+                self.assertEqual(dm.get_balance("Ahmet"), balance)
+        finally: dm.close()
+
+    def test_import_leaves_json_untouched(self):
+        with open(yempyqt.DATA_FILE, "w", encoding="utf-8") as f:
+            f.write('{"Ahmet": [{"type": "purchase", "data": {"tarih": "2025-01-05 10:00:00", "yem": "Arpa", "adet": 2, "fiyat": 10.0, "toplam": 20.0}}]}')
+        with open(yempyqt.DATA_FILE, "rb") as f: original = f.read()
+        dm = yempyqt.SQLiteDataManager()
+        try:
+            self.assertEqual(dm.get_balance("Ahmet"), 20.0)
+            self.assertIsNotNone(dm.get_records("Ahmet")[0].id)
+        finally: dm.close()
+        with open(yempyqt.DATA_FILE, "rb") as f: self.assertEqual(f.read(), original)
+
+if __name__ == "__main__":
+    unittest.main()
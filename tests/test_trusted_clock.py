@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Güvenilir saat (TrustedClock) testleri: ulaşılamayan kaynak her çağrıda beklenmemeli, durdurma iş parçacığını beklemelidir.
+
+Çalıştırma: python -m pytest tests  (ya da python -m unittest discover tests)
+"""
+import time
+import threading
+import unittest
+
+from support import yempyqt
+
+class Source:
+    """Sayılan çağrılarla sahte zaman kaynağı; time None ise ulaşılamaz."""
+    def __init__(self, time=None, delay=0):
+        self.time, self.delay, self.calls = time, delay, 0
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.time is None: raise OSError("zaman aşımı")
+        return self.time
+
+class TrustedClockTest(unittest.TestCase):
+    def test_failed_sync_backs_off(self):
+        source = Source()
+        clock = yempyqt.TrustedClock(source)
+        for _ in range(20): self.assertIsNone(clock.now())
+        self.assertEqual(source.calls, 1)
+        clock._retry_at = 0  # Bekleme doldu
+        self.assertIsNone(clock.now())
+        self.assertEqual((source.calls, clock._retry_delay), (2, 2 * yempyqt.CLOCK_RETRY_MIN))
+        source.time, clock._retry_at = 1_700_000_000.0, 0
+        self.assertAlmostEqual(clock.timestamp(), 1_700_000_000.0, delta=1)
+        self.assertIsNone(clock._retry_delay)
+
+    def test_timestamp_does_not_wait_for_running_sync(self):
+        source = Source(1_700_000_000.0, delay=0.5)
+        clock = yempyqt.TrustedClock(source)
+        worker = threading.Thread(target=clock.sync); worker.start()
+        time.sleep(0.1)
+        started = time.monotonic()
+        self.assertIsNone(clock.now())
+        self.assertLess(time.monotonic() - started, 0.2)
+        worker.join()
+        self.assertIsNotNone(clock.now())
+
+    def test_stop_joins_resync_thread(self):
+        clock = yempyqt.TrustedClock(Source(1_700_000_000.0), resync_interval=0.01)
+        clock.start()
+        thread = clock._thread
+        clock.stop()
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(clock._thread)
+
+if __name__ == "__main__":
+    unittest.main()
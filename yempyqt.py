@@ -1,109 +1,3357 @@
 # -*- coding: utf-8 -*-
 
+import time
+_MODULE_STARTED = time.perf_counter()  # --profile-startup için modül yüklenmesinin başladığı an
 import sys
 import json
 import os
+import re
 import base64
-import wmi
-import win32crypt
+import bisect
+import threading
+import sqlite3
+import unicodedata
+import hashlib
+import zlib
+import gzip
+import struct
+import array
+import argparse
+import functools
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager, nullcontext
 from datetime import datetime, timedelta
-import ntplib
+# wmi, win32crypt, pythoncom, ntplib, cryptography, openpyxl, numpy, msgpack ve zstandard açılışı yavaşlattığı için
+# yalnızca kullanıldıkları fonksiyonların içinde (lisans denetimi, NTP, dışa aktarma, raporlar, ikili veri dosyası) yüklenir.
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
+                             QLineEdit, QLabel, QListView, QTableView, QComboBox, QHeaderView,
+                             QAbstractItemView, QMenu, QDialog, QDialogButtonBox, QMessageBox, QFileDialog,
+                             QStyle, QInputDialog, QStatusBar, QProgressDialog, QRadioButton, QButtonGroup,
+                             QTableWidget, QTableWidgetItem, QShortcut, QTabWidget, QCompleter)
+from PyQt5.QtCore import Qt, QAbstractTableModel, QAbstractListModel, QStringListModel, QModelIndex, QItemSelectionModel, QTimer, QThread, pyqtSignal
+from PyQt5.QtGui import QDoubleValidator, QBrush, QFont, QKeySequence
+
+# --- Ayarlar ve Sabitler ---
+__version__ = "1.2.0" # Versiyon güncellendi
+DATA_FILE = "data.json"
+BINARY_DATA_FILE = "data.ydb" # DATA_FORMAT ikili bir biçimse anlık görüntünün yazıldığı dosya
+DATA_FORMAT = "struct" # Anlık görüntü biçimi: "struct" veya "msgpack" (başlıklı, sağlama toplamlı) ya da "json" (okunabilir, sağlama toplamsız)
+DATA_COMPRESSION = None # Anlık görüntü sıkıştırması: None, "gzip" veya "zstd"
+SCHEMA_VERSION = 3 # Veri dosyalarındaki kayıt şemasının sürümü; 2: kayıt kimlikleri, 3: devir kayıtları
+DB_FILE = "data.db"
+SHARD_DIR = "data"
+STORAGE_BACKEND = "json" # "json", "sqlite", "sharded" veya "shared" (birden çok bilgisayar)
+SHARED_DATA_FILE = DATA_FILE # "shared" depolamada ortak klasördeki veri dosyası (ör. r"\\SUNUCU\Yemci\data.json"); biçimi içerikten algılanır
+LOCK_TIMEOUT = 10 # Ortak veri dosyasının kilidi için en uzun bekleme (saniye)
+SYNC_INTERVAL_MS = 2000 # Ortak depoda başka bilgisayarların değişikliklerinin denetlenme aralığı
+LEDGER_CACHE_SIZE = 32 # Parçalı depolamada bellekte tutulan en fazla müşteri defteri
+ARCHIVE_DIR = "archive" # Kapanan dönemlerin kayıtlarının taşındığı soğuk arşiv (veri dosyasının yanında)
+ARCHIVE_FORMAT = "struct" # Arşiv dosyalarının biçimi; arşiv yalnızca istendiğinde okunduğu için sıkıştırılır
+ARCHIVE_COMPRESSION = "gzip"
+BACKUP_DIR = "backups"
+BACKUP_COMPRESS_LEVEL = 6 # Yedek parçalarının zlib sıkıştırma düzeyi
+BACKUP_KEEP_HOURLY = 24 # Saklanacak en fazla saatlik yedek
+BACKUP_KEEP_DAILY = 30 # Saklanacak en fazla günlük yedek
+BACKUP_KEEP_MONTHLY = 12 # Saklanacak en fazla aylık yedek
+JOURNAL_COMPACT_THRESHOLD = 500 # Günlük bu kadar kayda ulaşınca arka planda sıkıştırılır
+PERSIST_DELAY = 0.5 # Arka plan kaydedicinin art arda gelen değişiklikleri tek yazmada birleştirme süresi (saniye)
+PERSIST_RETRY_MAX = 30 # Başarısız bir yazmanın yeniden denenmesinden önceki en uzun bekleme (saniye)
+_META_KEY = "__yemci_meta__"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S" # Kayıtlardaki tarih biçimi (sabit genişlikli, metin olarak sıralanabilir)
+NTP_SERVER = "pool.ntp.org"
+CLOCK_RESYNC_INTERVAL = 15 * 60 # Güvenilir saatin yeniden eşitlenme aralığı (saniye)
+CLOCK_MAX_ROLLBACK = 5 # Yeniden eşitlemede kabul edilen en fazla geri sapma (saniye)
+CLOCK_RETRY_MIN = 10 # Başarısız eşitlemeden sonraki ilk yeniden deneme aralığı; her başarısızlıkta ikiye katlanır (saniye)
+CLOCK_STOP_TIMEOUT = 5 # Kapanışta yeniden eşitleme iş parçacığının bitmesi için en uzun bekleme (saniye)
+SEARCH_DEBOUNCE_MS = 150 # Müşteri aramasının son tuş vuruşundan sonra çalışma gecikmesi
+FEED_SUGGESTIONS = 15 # Yem adı tamamlamada gösterilen en fazla öneri
+REPORT_MAX_ROWS = 1000 # Rapor penceresindeki müşteri yaşlandırma tablosunun en fazla satırı (Excel'e tümü yazılır)
+PERF_MONITORING = True # Sıcak yolların süre ölçümü (kapalıyken yükü ihmal edilebilir)
+PERF_WINDOW = 512 # Yüzdelikler için işlem başına tutulan son ölçüm sayısı
+PERF_SLOW_MS = 250 # Durum çubuğunda uyarı gösterilecek en kısa süre (ms)
+PERF_LOG_FILE = "performance.log" # --perf-log ile açılan dönen ölçüm günlüğü
+PERF_LOG_MAX_BYTES = 1024 * 1024
+PERF_LOG_BACKUPS = 3
+APP_CONFIG_DIR = os.path.join(os.getenv('APPDATA'), 'YemciApp')
+SECURE_LICENSE_FILE = os.path.join(APP_CONFIG_DIR, 'license.bin')
+ACTIVATION_HISTORY_FILE = os.path.join(APP_CONFIG_DIR, 'activation.hist')
+
+PUBLIC_KEY_PEM = """-----BEGIN PUBLIC KEY-----
+MIIBIjANBgkqhkiGOWBAQEFAAOCAQ8AMIIBCgKCAQEAn5YFTK5h/miQOwVBvTAt
+T2IX4SNBQgqJ1/lMlaJH7K2AoSuEYFqIgGB2EopPAKbxnI38I402EUxpJifopFIE
+ExttIaWT5CHyGd4SNohZGyshkmudkbwVHq5Zw5eHtcQS9MCnB73E5q8DQKVYyxDf
+JtcHcsr2dY7kUsUEvrOVjZkqYQm8ndl0jxvHZmw8zkuinUNs0QbNH46mm6cVEEGH
+lBmoBvi4ptzUeINeKPzkoBn+VdnPgXqFfBvBIWoGmq0gnFaJNHmFh1yp9ZBSX+2G
+q7apupXnpSEt46yjoP4C3YZAn9DQW8GiyY0/XJVfEiIPTsR7pe2MHQ2q6aNxZpzK
+oQIDAQAB
+-----END PUBLIC KEY-----
+"""
+
+# =============================================================================
+# PERFORMANS ÖLÇÜMÜ
+# =============================================================================
+class PerfMonitor:
+    """Sıcak yolların (NTP, kaydetme, tablo yenileme, WMI...) süre ve sayaçlarını tutar.
+
+    Her işlem için son PERF_WINDOW ölçüm bellekte tutulur; yüzdelikler
+    yalnızca istendiğinde hesaplanır. İsteğe bağlı olarak her ölçüm, dönen
+    (rotating) bir günlüğe JSON satırı olarak yazılır. Kapalıyken ölçülen
+    fonksiyonlara eklenen yük tek bir öznitelik denetimidir.
+    """
+    def __init__(self, enabled=PERF_MONITORING, window=PERF_WINDOW, slow_threshold=PERF_SLOW_MS / 1000):
+        self.enabled = enabled
+        self.window = window
+        self.slow_threshold = slow_threshold
+        self.last_slow = None  # (işlem, süre, zaman) - durum çubuğu göstergesi için
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._logger = None
+        self.log_path = None
+
+    def enable_log(self, path=PERF_LOG_FILE, max_bytes=PERF_LOG_MAX_BYTES, backup_count=PERF_LOG_BACKUPS):
+        import logging, logging.handlers
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = logging.getLogger("yemci.perf")
+        logger.setLevel(logging.INFO); logger.propagate = False
+        logger.addHandler(handler)
+        self._logger, self.log_path = logger, path
+
+    def record(self, name, seconds, failed=False):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None: stats = self._stats[name] = {"samples": deque(maxlen=self.window), "count": 0, "errors": 0, "last": 0.0, "worst": 0.0}
+            stats["samples"].append(seconds); stats["count"] += 1; stats["errors"] += failed
+            stats["last"] = seconds; stats["worst"] = max(stats["worst"], seconds)
+            if seconds >= self.slow_threshold: self.last_slow = (name, seconds, time.time())
+        if self._logger is not None:
+            self._logger.info(json.dumps({"ts": datetime.now().strftime(DATE_FORMAT), "op": name, "ms": round(seconds * 1000, 3),
+                                          "thread": threading.current_thread().name, "failed": failed}, ensure_ascii=False))
+
+    def timed(self, name):
+        """Fonksiyonun süresini name adıyla ölçen dekoratör."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled: return func(*args, **kwargs)
+                started, failed = time.perf_counter(), True
+                try:
+                    result = func(*args, **kwargs); failed = False
+                    return result
+                finally: self.record(name, time.perf_counter() - started, failed)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """{işlem: {count, errors, last, worst, p50, p95, p99}} (saniye) döndürür."""
+        with self._lock: items = [(name, dict(stats, samples=sorted(stats["samples"]))) for name, stats in self._stats.items()]
+        result = {}
+        for name, stats in sorted(items):
+            samples = stats.pop("samples")
+            for p in (50, 95, 99): stats[f"p{p}"] = samples[min(len(samples) - 1, len(samples) * p // 100)] if samples else 0.0
+            result[name] = stats
+        return result
+
+    def reset(self):
+        with self._lock: self._stats.clear(); self.last_slow = None
+
+perf = PerfMonitor()
+
+# =============================================================================
+# GÜVENLİK VE DONANIM FONKSİYONLARI
+# =============================================================================
+class DPAPIProtector:
+    """Veriyi Windows DPAPI ile kullanıcı hesabına bağlı olarak şifreleyen koruyucu."""
+    def protect(self, data):
+        import win32crypt
+        return win32crypt.CryptProtectData(data, None, None, None, None, 0)
+    def unprotect(self, data):
+        import win32crypt
+        return win32crypt.CryptUnprotectData(data, None, None, None, 0)[1]
+
+class SecureDataManager:
+    def __init__(self, file_path, protector=None):
+        self.file_path = file_path
+        self.protector = protector or DPAPIProtector()
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+    def write_data(self, data):
+        try:
+            encrypted_data = self.protector.protect(data.encode('utf-8'))
+            with open(self.file_path, 'wb') as f: f.write(encrypted_data)
+            return True
+        except Exception: return False
+    def read_data(self):
+        if not os.path.exists(self.file_path): return None
+        try:
+            with open(self.file_path, 'rb') as f: encrypted_data = f.read()
+            return self.protector.unprotect(encrypted_data).decode('utf-8')
+        except Exception: return None
+    def delete_file(self):
+        if os.path.exists(self.file_path): os.remove(self.file_path)
+
+class HardwareQueryError(Exception):
+    """Makine kimliği donanımdan (WMI/COM) okunamadı; lisansın geçerliliği hakkında bir şey söylemez."""
+
+@perf.timed("wmi_query")
+def get_machine_id():
+    """Anakart seri numarasını, yoksa işlemci kimliğini döndürür; WMI sorgusu başarısız olursa HardwareQueryError verir."""
+    try:
+        import wmi
+        c = wmi.WMI()
+        for board in c.Win32_BaseBoard():
+            serial = board.SerialNumber.strip()
+            if serial and "none" not in serial.lower(): return serial
+        for processor in c.Win32_Processor():
+            return processor.ProcessorId.strip()
+    except Exception as e: raise HardwareQueryError(f"Makine kimliği okunamadı: {e}") from e
+    return "UNKNOWN_MACHINE_ID"
+
+class WMIHardware:
+    """Makine kimliğini WMI ile okuyan donanım arka ucu; her iş parçacığından çağrılabilir."""
+    def machine_id(self):
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()  # WMI, ana iş parçacığı dışında COM'un başlatılmasını gerektirir
+        except Exception as e: raise HardwareQueryError(f"COM başlatılamadı: {e}") from e
+        try: return get_machine_id()
+        finally: pythoncom.CoUninitialize()
+
+class RSALicenseVerifier:
+    """Lisans imzalarını gömülü açık anahtarla doğrular; anahtar ilk kullanımda bir kez ayrıştırılır."""
+    def __init__(self, public_key_pem=PUBLIC_KEY_PEM):
+        self.public_key_pem = public_key_pem
+        self._public_key = None
+    def verify(self, payload, signature):
+        """İmza geçersizse ValueError fırlatır."""
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import padding
+        if self._public_key is None: self._public_key = serialization.load_pem_public_key(self.public_key_pem.encode('utf-8'))
+        try: self._public_key.verify(signature, payload, padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH), hashes.SHA256())
+        except InvalidSignature as e: raise ValueError("Lisans imzası geçersiz.") from e
+
+def decode_license_payload(payload_b64):
+    """Lisans anahtarının yük kısmını çözer; (ham yük, alanlar sözlüğü) döndürür."""
+    payload = base64.urlsafe_b64decode(payload_b64)
+    return payload, dict(part.split(':', 1) for part in payload.decode('utf-8').split(';'))
+
+def license_duration(parts):
+    return timedelta(seconds=int(parts['duration_seconds'])) if 'duration_seconds' in parts else timedelta(days=int(parts.get('duration_days', 0)))
+
+class LicenseService:
+    """Lisans denetimi ve etkinleştirmesini arayüzden bağımsız yürüten servis.
+
+    Makine kimliği süreç başına bir kez okunur, açık anahtar bir kez ayrıştırılır.
+    Doğrulanmış lisansın durumu (makine kimliği, bitiş tarihi, yük alanları)
+    korumalı depoya yazılır; olağan açılışta imza ve yük yeniden işlenmez. Eski
+    biçimdeki lisans dosyaları ilk açılışta bir kez doğrulanıp bu biçime çevrilir.
+    Donanım, koruyucu (DPAPI) ve imza arka uçları dışarıdan verilebilir.
+    """
+    def __init__(self, hardware=None, protector=None, verifier=None, license_file=SECURE_LICENSE_FILE, history_file=ACTIVATION_HISTORY_FILE):
+        self.hardware = hardware or WMIHardware()
+        self.verifier = verifier or RSALicenseVerifier()
+        self.license_store = SecureDataManager(license_file, protector)
+        self.history_store = SecureDataManager(history_file, protector)
+        self._lock = threading.Lock()
+        self._machine_id = None
+
+    def machine_id(self):
+        """Makine kimliği; okunamazsa HardwareQueryError (başarısız sorgu saklanmaz, sonraki çağrı yeniden dener)."""
+        with self._lock:
+            if self._machine_id is None: self._machine_id = self.hardware.machine_id()
+            return self._machine_id
+
+    def _verified_state(self, license_key, activated):
+        """Lisans anahtarının imzasını doğrular ve korumalı depoya yazılacak durumu üretir."""
+        payload_b64, signature_b64 = license_key.split('.')
+        payload, parts = decode_license_payload(payload_b64)
+        self.verifier.verify(payload, base64.urlsafe_b64decode(signature_b64))
+        return {"license_key": license_key, "activated": activated, "machine_id": parts.get('machine_id'),
+                "expires": (datetime.strptime(activated, "%Y-%m-%d %H:%M:%S") + license_duration(parts)).strftime("%Y-%m-%d %H:%M:%S"),
+                "fields": parts}
+
+    def load_state(self):
+        """Korumalı depodaki doğrulanmış lisans durumunu döndürür; lisans yoksa None."""
+        secure_data = self.license_store.read_data()
+        if not secure_data: return None
+        if secure_data.startswith("{"): return json.loads(secure_data)
+        # Eski biçim ("anahtar:::etkinleştirme zamanı"): bir kez doğrulanıp yeni biçimde saklanır.
+        license_key, activated = secure_data.split(":::")
+        state = self._verified_state(license_key, activated)
+        self.license_store.write_data(json.dumps(state, ensure_ascii=False))
+        return state
+
+    def check(self, current_time):
+        """Kayıtlı lisansı denetler; (durum, bitiş tarihi, kalan gün) döndürür.
+
+        Durum "offline", "missing", "hardware", "expired", "invalid", "unverified"
+        veya "ok" olabilir. Başka makineye ait, süresi dolmuş ya da ayrıştırılamayan
+        veya imzası geçersiz lisans dosyası silinir. Makine kimliği okunamazsa
+        (WMI/COM hatası) ya da beklenmeyen bir hata olursa dosyaya dokunulmaz ve
+        "unverified" döner.
+        """
+        if not current_time: return "offline", None, None
+        try:
+            state = self.load_state()
+            if state is None: return "missing", None, None
+            licensed_machine, expiration_date = state["machine_id"], datetime.strptime(state["expires"], "%Y-%m-%d %H:%M:%S")
+        except (ValueError, KeyError, TypeError):  # Bozuk dosya ya da geçersiz imza (json, base64 ve imza hataları ValueError'dır)
+            self.license_store.delete_file()
+            return "invalid", None, None
+        except Exception: return "unverified", None, None
+        try: machine_id = self.machine_id()
+        except HardwareQueryError: return "unverified", None, None
+        if licensed_machine != machine_id:
+            self.license_store.delete_file()
+            return "hardware", None, None
+        if current_time > expiration_date:
+            self.license_store.delete_file()
+            return "expired", expiration_date, None
+        return "ok", expiration_date, (expiration_date.date() - current_time.date()).days
+
+    def activate(self, license_key, current_time):
+        """Yeni lisans anahtarını doğrulayıp kaydeder; "offline", "used", "hardware", "unverified", "invalid" veya "ok" döndürür."""
+        if not current_time: return "offline"
+        try:
+            _, signature_b64 = license_key.split('.')
+            used_signatures_str = self.history_store.read_data()
+            used_signatures = set(used_signatures_str.split(',')) if used_signatures_str else set()
+            if signature_b64 in used_signatures: return "used"
+            state = self._verified_state(license_key, current_time.strftime('%Y-%m-%d %H:%M:%S'))
+        except Exception: return "invalid"
+        try: machine_id = self.machine_id()
+        except HardwareQueryError: return "unverified"
+        if state["machine_id"] != machine_id: return "hardware"
+        used_signatures.add(signature_b64)
+        self.history_store.write_data(",".join(used_signatures))
+        self.license_store.write_data(json.dumps(state, ensure_ascii=False))
+        return "ok"
+
+class NTPTimeSource:
+    """Bir NTP sunucusundan Unix zamanını okuyan zaman kaynağı."""
+    def __init__(self, server=NTP_SERVER, port=123, timeout=3):
+        self.server, self.port, self.timeout = server, port, timeout
+    def __call__(self):
+        import ntplib
+        response = ntplib.NTPClient().request(self.server, version=3, port=self.port, timeout=self.timeout)
+        return response.tx_time
+
+class TrustedClock:
+    """Güvenilir saat servisi.
+
+    Zaman kaynağına (varsayılan NTP) bir kez sorulur ve sonuç time.monotonic()
+    ile sabitlenir; sonraki zaman damgaları ağa çıkmadan yerel olarak üretilir.
+    Sistem saatinin değiştirilmesi sonucu etkilemez. Arka planda belirli
+    aralıklarla yeniden eşitlenir; kaynağın verdiği zaman beklenenden geriye
+    gidiyorsa eşitleme reddedilir ve verilen zaman damgaları hiçbir zaman
+    geriye gitmez. Testlerde kaynak olarak sahte bir fonksiyon verilebilir.
+
+    Kaynağa ulaşılamazsa yeniden deneme, CLOCK_RETRY_MIN saniyeden başlayıp
+    her başarısızlıkta ikiye katlanan (en çok resync_interval) bir süre ertelenir.
+    Eşitlenmemiş saatte timestamp() kaynağa yalnızca bu süre dolduysa ve başka
+    bir eşitleme sürmüyorsa sorar; arayüz her çağrıda ağı beklemez.
+    """
+    def __init__(self, source=None, resync_interval=CLOCK_RESYNC_INTERVAL, max_rollback=CLOCK_MAX_ROLLBACK):
+        self.source = source or NTPTimeSource()
+        self.resync_interval = resync_interval
+        self.max_rollback = max_rollback
+        self._lock = threading.Lock()
+        self._anchor = None  # (kaynak zamanı, monotonic zaman)
+        self._last_issued = 0.0
+        self._sync_lock = threading.Lock()  # Kaynağa aynı anda tek istek gider
+        self._retry_delay, self._retry_at = None, 0.0  # Son başarısızlıktan sonraki bekleme ve yeniden deneme anı (monotonic)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @perf.timed("ntp_sync")
+    def sync(self, blocking=True):
+        """Kaynağa sorar; başarılıysa True. blocking=False iken başka bir eşitleme sürüyorsa beklemeden False döner."""
+        if not self._sync_lock.acquire(blocking): return False
+        try:
+            try: source_time = float(self.source())
+            except Exception:
+                self._retry_delay = min(self._retry_delay * 2, self.resync_interval) if self._retry_delay else CLOCK_RETRY_MIN
+                self._retry_at = time.monotonic() + self._retry_delay
+                return False
+        finally: self._sync_lock.release()
+        mono = time.monotonic()
+        with self._lock:
+            self._retry_delay, self._retry_at = None, 0.0
+            if self._anchor is not None and source_time < self._anchor[0] + (mono - self._anchor[1]) - self.max_rollback:
+                return False  # Zaman geri alınmaya çalışılıyor (sahte sunucu veya müdahale)
+            self._anchor = (source_time, mono)
+        return True
+
+    def is_synced(self):
+        return self._anchor is not None
+
+    def timestamp(self):
+        """Güvenilir Unix zamanını döndürür; hiç eşitlenemediyse None."""
+        if self._anchor is None and (time.monotonic() < self._retry_at or not self.sync(blocking=False)): return None
+        with self._lock:
+            ts = self._anchor[0] + (time.monotonic() - self._anchor[1])
+            self._last_issued = max(ts, self._last_issued)
+            return self._last_issued
+
+    def now(self):
+        ts = self.timestamp()
+        return datetime.fromtimestamp(ts) if ts is not None else None
+
+    def start(self):
+        """Arka planda periyodik yeniden eşitlemeyi başlatır."""
+        if self._thread is not None: return
+        self._stop_event = threading.Event()  # Durdurulup bitmesi beklenemeyen eski iş parçacığı kendi olayıyla durur
+        self._thread = threading.Thread(target=self._resync_loop, args=(self._stop_event,), daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=CLOCK_STOP_TIMEOUT):
+        """Yeniden eşitlemeyi durdurur; süren bir istek varsa en çok timeout saniye bitmesini bekler."""
+        self._stop_event.set()
+        if self._thread is not None: self._thread.join(timeout); self._thread = None
+
+    def _resync_loop(self, stop_event):
+        # Eşitlenmemiş saat, beklemesi dolunca (en az CLOCK_RETRY_MIN saniye sonra) yeniden dener.
+        while not stop_event.wait(self.resync_interval if self._anchor is not None else max(self._retry_at - time.monotonic(), CLOCK_RETRY_MIN)):
+            self.sync()
+
+# =============================================================================
+# KAYIT TÜRLERİ
+# =============================================================================
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+
+def round_half_up(value):
+    """Yarımları sıfırdan uzağa yuvarlar; kayan nokta artıkları (ör. 37.49999999) yarım sayılır."""
+    if value < 0: return -int(-value + 0.5 + 1e-6)
+    return int(value + 0.5 + 1e-6)
+
+def to_kurus(value):
+    """TL tutarını tam sayı kuruşa çevirir."""
+    return value * 100 if isinstance(value, int) else round_half_up(value * 100)
+
+def format_kurus(kurus):
+    """Kuruşu "1234.50" biçiminde TL metnine çevirir (kayan noktaya dönmeden)."""
+    lira, rest = divmod(abs(kurus), 100)
+    return f"{'-' if kurus < 0 else ''}{lira}.{rest:02d}"
+
+def datetime_to_ts(value):
+    """datetime'ı kayıt zaman damgasına (1970-01-01'den beri saniye, saat dilimi uygulanmadan) çevirir."""
+    return (value.replace(microsecond=0) - _EPOCH) // _SECOND
+
+def parse_ts(tarih):
+    """DATE_FORMAT biçimindeki tarih metnini zaman damgasına çevirir."""
+    return (datetime.fromisoformat(tarih) - _EPOCH) // _SECOND
+
+def format_ts(ts):
+    """Zaman damgasını DATE_FORMAT biçiminde metne çevirir."""
+    return str(_EPOCH + timedelta(seconds=ts))
+
+class Record:
+    """Defter kayıtlarının ortak tabanı.
+
+    Kayıtlar __slots__ ile tutulur: tarih zaman damgası (saniye), tutarlar tam
+    sayı kuruş, yem adları sys.intern ile paylaşılan metinlerdir. Kayıtlar
+    oluşturulduktan sonra değiştirilmez; düzenleme yeni kayıtla yapılır. Eski
+    sözlük biçimiyle uyum için record["type"] ve record["data"] desteklenir;
+    data her istekte JSON şemasındaki sözlük olarak yeniden üretilir.
+
+    id, kaydın kalıcı kimliğidir: deftere eklenirken veri yöneticisi verir,
+    düzenlemede yeni kayda aktarılır. Eşitlik karşılaştırmasına katılmaz.
+    """
+    __slots__ = ("ts", "id")
+    type = None
+    toplam = 0  # Ödemelerde alış tutarı, alışlarda ödeme tutarı yoktur; özetler iki alanı da türe bakmadan toplar.
+    tutar = 0
+
+    @property
+    def tarih(self):
+        return format_ts(self.ts)
+
+    def __getitem__(self, key):
+        if key == "type": return self.type
+        if key == "data": return self.data
+        raise KeyError(key)
+
+    def to_dict(self):
+        if self.id is None: return {"type": self.type, "data": self.data}
+        return {"type": self.type, "id": self.id, "data": self.data}
+
+    def __eq__(self, other):
+        if not isinstance(other, Record): return NotImplemented
+        return self.type == other.type and self._values() == other._values()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}{self._values()!r}"
+
+class Purchase(Record):
+    __slots__ = ("yem", "adet", "fiyat", "toplam")
+    type = "purchase"
+
+    def __init__(self, ts, yem, adet, fiyat, toplam, id=None):
+        self.ts, self.yem, self.adet, self.fiyat, self.toplam, self.id = ts, sys.intern(yem), adet, fiyat, toplam, id
+
+    @property
+    def data(self):
+        return {"yem": self.yem, "adet": self.adet, "fiyat": self.fiyat / 100, "toplam": self.toplam / 100, "tarih": self.tarih}
+
+    def _values(self):
+        return (self.ts, self.yem, self.adet, self.fiyat, self.toplam)
+
+class Payment(Record):
+    __slots__ = ("aciklama", "tutar")
+    type = "payment"
+
+    def __init__(self, ts, aciklama, tutar, id=None):
+        self.ts, self.aciklama, self.tutar, self.id = ts, sys.intern(aciklama), tutar, id
+
+    @property
+    def data(self):
+        return {"aciklama": self.aciklama, "tutar": self.tutar / 100, "tarih": self.tarih}
+
+    def _values(self):
+        return (self.ts, self.aciklama, self.tutar)
+
+class CarryForward(Record):
+    """Kapanan dönemden devreden bakiye (açık kalem). Borç bakiyesi toplam, alacak bakiyesi tutar alanında
+    durur; böylece özetler devri de alış ve ödemeler gibi türe bakmadan toplar."""
+    __slots__ = ("aciklama", "toplam", "tutar")
+    type = "carry"
+
+    def __init__(self, ts, aciklama, bakiye, id=None):
+        self.ts, self.aciklama, self.id = ts, sys.intern(aciklama), id
+        self.toplam, self.tutar = max(bakiye, 0), max(-bakiye, 0)
+
+    @property
+    def bakiye(self):
+        return self.toplam - self.tutar
+
+    @property
+    def data(self):
+        return {"aciklama": self.aciklama, "bakiye": self.bakiye / 100, "tarih": self.tarih}
+
+    def _values(self):
+        return (self.ts, self.aciklama, self.bakiye)
+
+def record_from_dict(record):
+    """JSON şemasındaki {"type", "data"} sözlüğünden kayıt üretir; zaten kayıtsa olduğu gibi döndürür."""
+    if isinstance(record, Record): return record
+    data = record["data"]
+    if record["type"] == "purchase":
+        return Purchase(parse_ts(data["tarih"]), data["yem"], float(data["adet"]), to_kurus(data["fiyat"]), to_kurus(data["toplam"]), record.get("id"))
+    if record["type"] == "payment": return Payment(parse_ts(data["tarih"]), data["aciklama"], to_kurus(data["tutar"]), record.get("id"))
+    if record["type"] == "carry": return CarryForward(parse_ts(data["tarih"]), data["aciklama"], to_kurus(data["bakiye"]), record.get("id"))
+    raise ValueError(f"Bilinmeyen kayıt türü: {record['type']!r}")
+
+def records_from_json(companies):
+    """{müşteri: [sözlük]} verisini {müşteri: [kayıt]} biçimine çevirir."""
+    return {company: [record_from_dict(rec) for rec in records] for company, records in companies.items()}
+
+def json_default(obj):
+    """json.dump için: kayıtları JSON şemasındaki sözlük biçiminde yazar."""
+    if isinstance(obj, Record): return obj.to_dict()
+    raise TypeError(f"{type(obj).__name__} JSON'a çevrilemez")
+
+# =============================================================================
+# VERİ YÖNETİM SINIFLARI ORTAK DEFTER MANTIĞI
+# =============================================================================
+def record_sort_key(record):
+    """Kaydın sıralama anahtarı (zaman damgası)."""
+    return record.ts
+
+def write_json_atomic(path, data):
+    """JSON verisini geçici dosyaya yazar, diske işler ve hedefle atomik olarak değiştirir."""
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4, default=json_default)
+        f.flush(); os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+def write_bytes_atomic(path, data):
+    """Baytları geçici dosyaya yazar, diske işler ve hedefle atomik olarak değiştirir."""
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(data); f.flush(); os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f: return json.load(f)
+
+def new_aggregate():
+    """Müşteri özeti; tutarlar tam sayı kuruştur, son işlem DATE_FORMAT biçimindedir."""
+    return {"balance": 0, "purchases": 0, "payments": 0, "count": 0, "last_activity": None}
+
+def compute_aggregates(companies):
+    """Tüm defterleri bir kez tarayarak müşteri özetlerini (bakiye, toplamlar, kayıt sayısı, son işlem) hesaplar."""
+    aggregates = {}
+    for company, records in companies.items():
+        agg = aggregates[company] = new_aggregate()
+        purchases = sum(rec.toplam for rec in records); payments = sum(rec.tutar for rec in records)
+        agg["purchases"], agg["payments"], agg["balance"], agg["count"] = purchases, payments, purchases - payments, len(records)
+        if records: agg["last_activity"] = format_ts(max(rec.ts for rec in records))
+    return aggregates
+
+def assign_record_ids(records, next_id=1):
+    """Kimliği olmayan kayıtlara sırayla kimlik verir; sayaç mevcut kimliklerin ötesine taşınır.
+
+    (bir sonraki kimlik, kimlik verildi mi) döndürür. Aynı kayıtlar için
+    her zaman aynı kimlikleri verir.
+    """
+    next_id = max(next_id, max((rec.id for rec in records if rec.id is not None), default=0) + 1)
+    assigned = False
+    for rec in records:
+        if rec.id is None: rec.id = next_id; next_id += 1; assigned = True
+    return next_id, assigned
+
+class ConflictError(Exception):
+    """Defter, işlem başladıktan sonra başka bir yerde değiştirildi (iyimser sürüm denetimi)."""
+
+class SnapshotLedgerReader:
+    """Defterlerin sığ kopyaları üzerinden okuma yapan, iş parçacığı güvenli okuyucu."""
+    def __init__(self, ledgers):
+        self.ledgers = ledgers
+    def iter_records(self, company):
+        return iter(self.ledgers.get(company, ()))
+    def close(self):
+        pass
+
+class BaseDataManager:
+    """Veri yöneticilerinin ortak defter mantığı.
+
+    Her müşterinin defteri tarihe göre artan sırada tutulur ve sıralama
+    anahtarları ayrı bir listede önbelleğe alınır. Yeni kayıtlar ikili arama
+    ile yerine eklenir; defter yalnızca ilk erişimde bir kez sıralanır. Alt
+    sınıflar defteri _load_ledger ile sağlar ve kalıcılığı kendileri yapar.
+
+    Her müşteri için bakiye, alış/ödeme toplamları, kayıt sayısı ve son işlem
+    tarihi ayrıca özet olarak tutulur ve her değişiklikte O(1) güncellenir;
+    müşteri listesi ve bakiye etiketi defterleri taramadan bu özetleri kullanır.
+    Defteri değişen her müşterinin revizyonu artar; raporlar yalnızca
+    revizyonu değişen müşterileri yeniden okur.
+
+    Kayıtlara kalıcı kimlikler verilir ve yüklü her defter için kimlikten
+    kayda bir sözlük tutulur. Düzenleme ve silme kimlikle yapılır: kayıt
+    sözlükten O(1) bulunur, defterdeki konumu tarihine göre ikili aramayla
+    belirlenir; görünümdeki satır sırasına dayanılmaz.
+
+    close_period bir dönemin kayıtlarını alt sınıfın archive özniteliğindeki
+    PeriodArchive'a taşır ve her müşterinin defterine tek bir devir kaydı
+    yazar; böylece bellekteki defterler yalnızca açık dönemi tutar. Defterleri
+    kesip kalıcı hale getiren _apply_close'u alt sınıflar sağlar.
+
+    Yem adı dizini (FeedIndex) bir kez, arayüzde arka planda kurulur
+    (begin_feed_index / build_feed_index / finish_feed_index); sonra özetler
+    gibi ekleme, düzenleme ve silmede kayıt düzeyinde güncellenir.
+    """
+    def __init__(self):
+        self._sort_keys = {}
+        self._record_indexes = {}
+        self._next_record_id = 1
+        self._aggregates = {}
+        self._revisions = {}
+        self._revision_counter = 0
+        self._feed_index = None
+
+    def revision(self, company):
+        """Müşteri defterinin revizyonu; yüklemeden beri değişmediyse 0."""
+        return self._revisions.get(company, 0)
+
+    def revisions(self):
+        """Yüklemeden beri değişen müşterilerin revizyonları."""
+        return self._revisions
+
+    def _touch(self, company):
+        self._revision_counter += 1
+        self._revisions[company] = self._revision_counter
+
+    def _check_revision(self, company, expected_revision):
+        """expected_revision verildiyse ve defter o revizyondan beri değiştiyse ConflictError verir."""
+        if expected_revision is not None and expected_revision != self.revision(company):
+            raise ConflictError(f"'{company}' müşterisinin defteri başka bir yerde değiştirildi.")
+
+    def sync(self):
+        """Başka kopyaların yaptığı değişiklikleri uygular ve değişen müşterileri döndürür; tek kullanıcılı depolarda boştur."""
+        return set()
+
+    def _assign_ids(self, records):
+        """Kimliği olmayan kayıtlara yeni kimlik verir. Kimlik verildiyse True döndürür."""
+        self._next_record_id, assigned = assign_record_ids(records, self._next_record_id)
+        return assigned
+
+    # --- Müşteri özetleri ---
+    def get_aggregate(self, company):
+        return self._aggregates.get(company) or new_aggregate()
+
+    def all_aggregates(self):
+        return self._aggregates
+
+    def get_balance(self, company):
+        """Müşteri bakiyesi (TL)."""
+        return self.get_aggregate(company)["balance"] / 100
+
+    def total_balance(self):
+        return sum(agg["balance"] for agg in self._aggregates.values()) / 100
+
+    def _update_aggregate(self, company, record, sign):
+        self._touch(company)
+        agg = self._aggregates.setdefault(company, new_aggregate())
+        agg["purchases"] += sign * record.toplam; agg["payments"] += sign * record.tutar
+        agg["balance"] = agg["purchases"] - agg["payments"]; agg["count"] += sign
+        keys = self._sort_keys.get(company)
+        agg["last_activity"] = format_ts(keys[-1]) if keys else None
+
+    def get_records(self, company):
+        records = self._load_ledger(company)
+        if company not in self._sort_keys:
+            records.sort(key=record_sort_key)
+            self._sort_keys[company] = [record_sort_key(rec) for rec in records]
+            self._record_indexes[company] = {rec.id: rec for rec in records}
+        return records
+
+    def _forget_ledger(self, company):
+        """Defterin sıralama anahtarlarını ve kimlik sözlüğünü bırakır (defter bellekten çıkarıldığında)."""
+        self._sort_keys.pop(company, None); self._record_indexes.pop(company, None)
+
+    def find_record(self, company, record_id):
+        """Kimliği verilen kaydı döndürür; yoksa None."""
+        self.get_records(company)
+        return self._record_indexes[company].get(record_id)
+
+    def record_position(self, company, record_id):
+        """Kaydın defterdeki konumu; eşit tarihli kayıtlar arasında yalnızca kısa bir tarama yapılır."""
+        records, record = self.get_records(company), self._record_indexes[company][record_id]
+        index = bisect.bisect_left(self._sort_keys[company], record_sort_key(record))
+        while records[index] is not record: index += 1
+        return index
+
+    def update_positions(self, company, record_id, new_record):
+        """Kayıt new_record ile değiştirildiğinde (eski konum, yeni konum)."""
+        index, keys = self.record_position(company, record_id), self._sort_keys[company]
+        key = record_sort_key(new_record)
+        if key == keys[index]: return index, index
+        new_index = bisect.bisect_right(keys, key)
+        return index, new_index - 1 if new_index > index else new_index
+
+    def insertion_index(self, company, record):
+        """Kaydın eklendiğinde defterde alacağı konum."""
+        self.get_records(company)
+        return bisect.bisect_right(self._sort_keys[company], record_sort_key(record))
+
+    def _insert_sorted(self, company, record):
+        records, index = self.get_records(company), self.insertion_index(company, record)
+        records.insert(index, record); self._sort_keys[company].insert(index, record_sort_key(record))
+        self._record_indexes[company][record.id] = record
+        self._update_aggregate(company, record, 1)
+        if self._feed_index is not None: self._feed_index.add(company, record)
+        return index
+
+    def _replace_at(self, company, index, new_record):
+        records = self.get_records(company)
+        if record_sort_key(new_record) == self._sort_keys[company][index]:
+            self._update_aggregate(company, records[index], -1)
+            if self._feed_index is not None: self._feed_index.remove(company, records[index]); self._feed_index.add(company, new_record)
+            records[index] = self._record_indexes[company][new_record.id] = new_record
+            self._update_aggregate(company, new_record, 1)
+            return index
+        self._remove_at(company, index)
+        return self._insert_sorted(company, new_record)
+
+    def _merge_aggregate(self, company, records):
+        """Toplu eklenen kayıtları müşteri özetine tek seferde ekler."""
+        self._touch(company)
+        agg, added = self._aggregates.setdefault(company, new_aggregate()), compute_aggregates({company: records})[company]
+        agg["purchases"] += added["purchases"]; agg["payments"] += added["payments"]; agg["count"] += added["count"]
+        agg["balance"] = agg["purchases"] - agg["payments"]
+        agg["last_activity"] = max(filter(None, (agg["last_activity"], added["last_activity"])), default=None)
+
+    def _extend_sorted(self, company, records):
+        """Kayıtları deftere toplu ekler: tek tek ikili arama yerine defter bir kez yeniden sıralanır."""
+        ledger = self.get_records(company)
+        ledger.extend(records); ledger.sort(key=record_sort_key)  # Kararlı sıralama: eşit tarihli yeni kayıtlar sona düşer
+        self._sort_keys[company] = [record_sort_key(rec) for rec in ledger]
+        self._record_indexes[company].update((rec.id, rec) for rec in records)
+        self._merge_aggregate(company, records)
+        if self._feed_index is not None: self._feed_index.add_many(company, records)
+
+    def open_reader(self, companies):
+        """Başka bir iş parçacığından defter okumak için okuyucu döndürür (GUI iş parçacığında çağrılmalıdır)."""
+        return SnapshotLedgerReader({company: list(self.get_records(company)) for company in companies})
+
+    def _remove_at(self, company, index):
+        del self._sort_keys[company][index]
+        record = self.get_records(company).pop(index)
+        self._record_indexes[company].pop(record.id, None)
+        self._update_aggregate(company, record, -1)
+        if self._feed_index is not None: self._feed_index.remove(company, record)
+        return record
+
+    # --- Yem adı dizini ---
+    def feed_index(self):
+        """Kurulmuş yem adı dizini; henüz kurulmadıysa None."""
+        return self._feed_index
+
+    def begin_feed_index(self):
+        """Dizin kurulumunu başlatır (GUI iş parçacığında çağrılmalıdır).
+
+        Dönen iş build_feed_index'e verilir; kurulum başka bir iş parçacığında
+        sürebilir. Kurulum sırasında değişen müşteriler finish_feed_index'te
+        güncel defterlerinden yeniden sayılır.
+        """
+        names = self.company_names()
+        return dict(self.revisions()), self.archive.periods(), names, self.open_reader(names)
+
+    def finish_feed_index(self, job, built):
+        """build_feed_index'in kurduğu dizini, kurulum sırasında kapanan dönemleri ve değişen müşterileri ekleyerek devreye alır (GUI iş parçacığında)."""
+        if self._feed_index is not None: return self._feed_index  # Bu arada başka bir istekle kurulmuş
+        revisions, periods, names, _ = job
+        index, purchases = built
+        closed = {period["label"] for period in periods}
+        for period in self.archive.periods():
+            if period["label"] not in closed: index.add_summary(period["summary"])
+        for name in names:
+            if self.has_company(name) and self.revision(name) == revisions.get(name, 0): continue
+            index.forget_company(name, purchases[name])  # Okuyucu değişiklikten önceki ya da sonraki hali görmüş olabilir
+            if self.has_company(name): index.add_many(name, self.get_records(name))
+        for name in set(self.company_names()).difference(names): index.add_many(name, self.get_records(name))
+        self._feed_index = index
+        return index
+
+    def get_feed_index(self):
+        """Yem adı dizini; kurulmamışsa aynı iş parçacığında kurulur."""
+        if self._feed_index is None:
+            job = self.begin_feed_index()
+            self.finish_feed_index(job, build_feed_index(job))
+        return self._feed_index
+
+    def _forget_feeds(self, company):
+        """Silinecek müşterinin alışlarını yem dizininden düşer; dizin kurulmamışsa defter okunmaz."""
+        if self._feed_index is not None and self.has_company(company): self._feed_index.forget_company(company, self.get_records(company))
+
+    # --- Dönem kapanışı ---
+    def _writing(self):
+        """Değişiklik işlemlerini saran kilit."""
+        return nullcontext()
+
+    def writing(self):
+        """Değişiklik kilidi; iç içe alınabilir. Ortak depoda alınırken başka kopyaların değişiklikleri uygulanır
+        ve kilit bırakılana kadar defterler dışarıdan değişmez. Arayüz, tablo satırını hesaplamadan önce alır."""
+        return self._writing()
+
+    def _records_before(self, company, end):
+        """Defterin end zaman damgasından önceki kayıtları."""
+        records = self.get_records(company)
+        return records[:bisect.bisect_left(self._sort_keys[company], end)]
+
+    def _cut_ledger(self, company, end, carries=()):
+        """end'den önceki kayıtları defterden çıkarır ve devir kayıtlarını başa ekler; özet kalan defterden yeniden hesaplanır."""
+        records, keys, index = self.get_records(company), self._sort_keys[company], self._record_indexes[company]
+        cut = bisect.bisect_left(keys, end)
+        for rec in records[:cut]: index.pop(rec.id, None)
+        del records[:cut]; del keys[:cut]
+        # Devirler tarih sıralıdır ve en geç end tarihlidir; kalan kayıtların hepsi end veya sonrasında olduğundan başa eklenir.
+        records[:0] = carries; keys[:0] = [record_sort_key(carry) for carry in carries]
+        index.update((carry.id, carry) for carry in carries)
+        self._aggregates[company] = compute_aggregates({company: records})[company]
+        self._touch(company)
+
+    def close_period(self, label, end):
+        """end'den (zaman damgası, hariç) önceki tüm kayıtları label adlı dönem olarak arşive taşır.
+
+        Her müşterinin kapanan kayıtlarının bakiyesi deftere açık kalemler
+        olarak devredilir (carry_forward_items); yaşlandırma raporu kapanıştan
+        etkilenmez. Önce arşiv dosyası, sonra defterler,
+        en son dönem listesi yazılır; arada kesilen bir kapanış aynı dönem
+        yeniden kapatılarak tamamlanır. Arşivlenen kayıt sayısını döndürür.
+        """
+        with self._writing():
+            closed = self.archive.closed_through()
+            if closed is not None and end <= closed: raise PeriodError(f"{format_ts(end)} öncesi zaten kapatılmış.")
+            ledgers = {}
+            for company in self.company_names():
+                records = self._records_before(company, end)
+                if records: ledgers[company] = records
+            entry = self.archive.write_period(label, closed, end, ledgers)
+            carries = {}
+            for company, records in ledgers.items():
+                items = carry_forward_items(records, end, label)
+                if items: carries[company] = items
+            self._apply_close(end, carries, list(ledgers))
+            self.archive.commit_period(entry)
+        return entry["records"]
+
+# =============================================================================
+# SERİLEŞTİRME
+# =============================================================================
+class SerializationError(Exception):
+    """Veri dosyası okunamadı (bozuk, tanınmayan biçim ya da daha yeni şema)."""
+
+class SchemaTooNewError(SerializationError):
+    """Veri dosyası bu programdan daha yeni bir sürümle yazılmış; dosya bozuk değildir."""
+
+_FILE_MAGIC = b"YEMCI\x00"
+_FILE_HEADER = struct.Struct("<6sBHBBQI") # sihirli sayı, başlık sürümü, şema sürümü, biçim, sıkıştırma, yük uzunluğu, CRC32
+_CODEC_IDS = {"json": 0, "struct": 1, "msgpack": 2}
+_COMPRESSION_IDS = {None: 0, "gzip": 1, "zstd": 2}
+
+def _zstd_functions():
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd.compress, zstd.decompress
+    except ImportError: pass
+    try: import zstandard
+    except ImportError: raise ImportError("zstd sıkıştırması için zstandard paketi gerekli.") from None
+    return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress
+
+def _compress(data, compression):
+    if compression == "gzip": return gzip.compress(data, compresslevel=6, mtime=0)
+    if compression == "zstd": return _zstd_functions()[0](data)
+    return data
+
+def _decompress(data, compression):
+    if compression == "gzip": return gzip.decompress(data)
+    if compression == "zstd": return _zstd_functions()[1](data)
+    return data
+
+def _pack_arrays(parts):
+    """Bölümleri uzunluk önekli (little-endian) olarak birleştirir; array bölümleri küçük sonlu yazılır."""
+    chunks = []
+    for part in parts:
+        if isinstance(part, array.array):
+            if sys.byteorder == "big": part = array.array(part.typecode, part); part.byteswap()
+            part = part.tobytes()
+        chunks.append(struct.pack("<Q", len(part))); chunks.append(part)
+    return b"".join(chunks)
+
+def _unpack_arrays(data, typecodes):
+    """_pack_arrays'in tersi; typecodes'taki None bölümler bayt olarak döner."""
+    parts, offset = [], 0
+    for typecode in typecodes:
+        (length,), offset = struct.unpack_from("<Q", data, offset), offset + 8
+        chunk, offset = data[offset:offset + length], offset + length
+        if typecode is not None:
+            chunk = array.array(typecode, chunk)
+            if sys.byteorder == "big": chunk.byteswap()
+        parts.append(chunk)
+    return parts
+
+_STRUCT_SECTIONS = (None, "I", None, "I", "I", None, "q", "I", "d", "q", "q", "q") # meta, metin uzunlukları, metinler, müşteri adı, kayıt sayısı, tür, zaman, metin, adet, fiyat, tutar, kimlik (şema 2)
+_STRUCT_KINDS = {"purchase": 0, "payment": 1, "carry": 2} # Devrin tutar sütunu işaretli bakiyedir (şema 3)
+
+def _encode_struct(companies, meta):
+    """Sütun düzeni: her alan tüm kayıtlar için tek bir dizi; metinler (müşteri, yem, açıklama) tek bir tabloda tutulur."""
+    strings, string_ids = [], {}
+    def string_id(text):
+        index = string_ids.get(text)
+        if index is None: index = string_ids[text] = len(strings); strings.append(text)
+        return index
+    names, counts, kinds = array.array("I"), array.array("I"), bytearray()
+    ts, texts, adet, fiyat, amount, ids = array.array("q"), array.array("I"), array.array("d"), array.array("q"), array.array("q"), array.array("q")
+    for company, records in companies.items():
+        names.append(string_id(company)); counts.append(len(records))
+        for rec in records:
+            ts.append(rec.ts); ids.append(rec.id or 0)  # Kimlikler 1'den başlar; 0 kimliksiz kayıt demektir
+            if rec.type == "purchase": kinds.append(0); texts.append(string_id(rec.yem)); adet.append(rec.adet); fiyat.append(rec.fiyat); amount.append(rec.toplam)
+            else: kinds.append(_STRUCT_KINDS[rec.type]); texts.append(string_id(rec.aciklama)); adet.append(0.0); fiyat.append(0); amount.append(rec.tutar if rec.type == "payment" else rec.bakiye)
+    encoded = [text.encode("utf-8") for text in strings]
+    return _pack_arrays([json.dumps(meta, ensure_ascii=False).encode("utf-8"), array.array("I", map(len, encoded)), b"".join(encoded),
+                         names, counts, bytes(kinds), ts, texts, adet, fiyat, amount, ids])
+
+def _decode_struct(data, version):
+    if version < 2:
+        meta, lengths, blob, names, counts, kinds, ts, texts, adet, fiyat, amount = _unpack_arrays(data, _STRUCT_SECTIONS[:-1])
+        ids = [0] * len(kinds)
+    else: meta, lengths, blob, names, counts, kinds, ts, texts, adet, fiyat, amount, ids = _unpack_arrays(data, _STRUCT_SECTIONS)
+    strings, offset = [], 0
+    for length in lengths: strings.append(blob[offset:offset + length].decode("utf-8")); offset += length
+    records = [Purchase(t, strings[x], a, f, m, i or None) if k == 0 else Payment(t, strings[x], m, i or None) if k == 1 else CarryForward(t, strings[x], m, i or None)
+               for k, t, x, a, f, m, i in zip(kinds, ts, texts, adet, fiyat, amount, ids)]
+    companies, offset = {}, 0
+    for name, count in zip(names, counts): companies[strings[name]] = records[offset:offset + count]; offset += count
+    return companies, json.loads(meta.decode("utf-8"))
+
+def _encode_msgpack(companies, meta):
+    import msgpack
+    return msgpack.packb({"meta": meta, "companies": {company: [[0, rec.ts, rec.yem, rec.adet, rec.fiyat, rec.toplam, rec.id] if rec.type == "purchase"
+                                                                 else [1, rec.ts, rec.aciklama, rec.tutar, rec.id] if rec.type == "payment"
+                                                                 else [2, rec.ts, rec.aciklama, rec.bakiye, rec.id] for rec in records]
+                                                       for company, records in companies.items()}}, use_bin_type=True)
+
+def _decode_msgpack(data, version):
+    import msgpack
+    payload = msgpack.unpackb(data, raw=False)
+    return {company: [(Purchase, Payment, CarryForward)[r[0]](*r[1:]) for r in records]
+            for company, records in payload["companies"].items()}, payload["meta"]
+
+def _encode_json(companies, meta, indent=None):
+    data = dict(companies)
+    data[_META_KEY] = meta
+    return json.dumps(data, ensure_ascii=False, indent=indent, separators=None if indent else (",", ":"), default=json_default).encode("utf-8")
+
+def _decode_json(data, version=SCHEMA_VERSION):
+    companies = json.loads(data.decode("utf-8-sig"))
+    meta = companies.pop(_META_KEY, None) or {}
+    return records_from_json(companies), meta
+
+class Serializer:
+    """Anlık görüntü dosyalarının biçimi.
+
+    Sıkıştırmasız "json" okunabilir biçimdir ve eskisi gibi düz, girintili JSON
+    olarak yazılır; şema sürümü meta alanında tutulur. Ana veri dosyası
+    varsayılan olarak "struct" ile yazılır; okunabilir JSON --export-json ve
+    elle seçilen DATA_FORMAT = "json" içindir. Diğer biçimler dosyanın
+    başına sihirli sayı, şema sürümü, biçim, sıkıştırma, yük uzunluğu ve yükün
+    CRC32 sağlama toplamından oluşan sabit uzunlukta bir başlık yazar. Elle
+    düzenlenebilmesi için okunabilir JSON'da sağlama toplamı yoktur; yarım
+    kalmış bir dosyayı JSON ayrıştırıcısı yakalar. "struct" yalnızca standart
+    kütüphaneyle yazılan sütun düzenli ikili biçimdir, "msgpack" için msgpack
+    paketi gerekir. Okumada biçim dosyadan algılanır.
+    """
+    def __init__(self, codec=DATA_FORMAT, compression=DATA_COMPRESSION):
+        if codec not in _CODEC_IDS: raise ValueError(f"Bilinmeyen veri biçimi: {codec!r}")
+        if compression not in _COMPRESSION_IDS: raise ValueError(f"Bilinmeyen sıkıştırma: {compression!r}")
+        self.codec, self.compression = codec, compression
+
+    @property
+    def readable(self):
+        return self.codec == "json" and self.compression is None
+
+    def dumps(self, companies, meta):
+        meta = dict(meta, schema_version=SCHEMA_VERSION)
+        if self.readable: return _encode_json(companies, meta, indent=4)
+        encode = {"json": _encode_json, "struct": _encode_struct, "msgpack": _encode_msgpack}[self.codec]
+        payload = _compress(encode(companies, meta), self.compression)
+        return _FILE_HEADER.pack(_FILE_MAGIC, 1, SCHEMA_VERSION, _CODEC_IDS[self.codec], _COMPRESSION_IDS[self.compression],
+                                 len(payload), zlib.crc32(payload)) + payload
+
+    @staticmethod
+    def loads(data):
+        """Biçimi algılayıp ({müşteri: kayıtlar}, meta) döndürür."""
+        if not data.startswith(_FILE_MAGIC):
+            if data.lstrip(b"\xef\xbb\xbf \t\r\n")[:1] != b"{": raise SerializationError("Tanınmayan veri dosyası biçimi.")
+            try: companies, meta = _decode_json(data)
+            except (ValueError, KeyError, TypeError) as e: raise SerializationError(f"JSON okunamadı: {e}") from None
+            if meta.get("schema_version", 1) > SCHEMA_VERSION: raise SchemaTooNewError(f"Dosya daha yeni bir sürümle yazılmış (şema {meta['schema_version']}).")
+        else:
+            if len(data) < _FILE_HEADER.size: raise SerializationError("Dosya başlığı eksik.")
+            _, _, version, codec_id, compression_id, length, checksum = _FILE_HEADER.unpack_from(data)
+            payload = data[_FILE_HEADER.size:]
+            if len(payload) != length or zlib.crc32(payload) != checksum: raise SerializationError("Sağlama toplamı tutmuyor; dosya bozuk ya da eksik.")
+            if version > SCHEMA_VERSION: raise SchemaTooNewError(f"Dosya daha yeni bir sürümle yazılmış (şema {version}).")
+            codec = {v: k for k, v in _CODEC_IDS.items()}.get(codec_id)
+            compression = {v: k for k, v in _COMPRESSION_IDS.items()}.get(compression_id, "?")
+            if codec is None or compression == "?": raise SerializationError("Tanınmayan biçim ya da sıkıştırma.")
+            decode = {"json": _decode_json, "struct": _decode_struct, "msgpack": _decode_msgpack}[codec]
+            try: companies, meta = decode(_decompress(payload, compression), version)
+            except (ImportError, MemoryError): raise  # Eksik paket (msgpack, zstandard) dosyanın bozuk olduğu anlamına gelmez
+            except Exception as e: raise SerializationError(f"Veri çözülemedi: {e}") from e  # Yalnızca bellekteki baytlar çözülür; G/Ç hatası olamaz
+        return companies, meta
+
+    def write(self, path, companies, meta):
+        write_bytes_atomic(path, self.dumps(companies, meta))
+
+    @classmethod
+    def read(cls, path):
+        with open(path, "rb") as f: return cls.loads(f.read())
+
+# =============================================================================
+# DÖNEM ARŞİVİ
+# =============================================================================
+class PeriodError(ValueError):
+    """Dönem kapatılamadı ya da kayıt kapanmış bir döneme düşüyor."""
+
+def period_bounds(label):
+    """"2024" (yıl) ya da "2024-03" (ay) dönem adının [başlangıç, bitiş) zaman damgaları."""
+    try:
+        if len(label) == 4: start = datetime(int(label), 1, 1); end = datetime(start.year + 1, 1, 1)
+        else:
+            start = datetime.strptime(label, "%Y-%m")
+            end = datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+    except ValueError: raise PeriodError(f"Geçersiz dönem: {label!r} (ör. 2024 ya da 2024-03)") from None
+    return datetime_to_ts(start), datetime_to_ts(end)
+
+def closable_periods(now, closed_through=None, years=5, months=12):
+    """now'dan önce biten ve henüz kapanmamış son yılları ve ayları, en yeni biten önce olmak üzere döndürür."""
+    labels = [str(now.year - n) for n in range(1, years + 1)]
+    labels += [f"{(now.year * 12 + now.month - 1 - n) // 12}-{(now.month - 1 - n) % 12 + 1:02d}" for n in range(1, months + 1)]
+    bounds = {label: period_bounds(label) for label in labels}
+    labels = [label for label in labels if closed_through is None or bounds[label][1] > closed_through]
+    return sorted(labels, key=lambda label: (bounds[label][1], len(label)), reverse=True)
+
+def carry_forward_items(records, end, label):
+    """Kapanan (tarih sıralı) kayıtların devredilecek açık kalemleri.
+
+    Ödemeler ve alacak devirleri, raporlardaki yaşlandırmada olduğu gibi en
+    eski borçlardan başlayarak düşülür (FIFO). Tamamen ödenmemiş her alış ve
+    önceki dönemlerden gelen borç devri, kalan tutarıyla ve kendi tarihiyle
+    devredilir; böylece yaşlandırma kovaları kapanıştan sonra da aynı kalır.
+    Borçları aşan ödemeler end tarihli tek bir alacak devri olur. Kalemlerin
+    toplamı kapanan kayıtların bakiyesine eşittir.
+    """
+    paid, description, items = sum(rec.tutar for rec in records), f"{label} devri", []
+    for rec in records:
+        covered = min(paid, rec.toplam); paid -= covered
+        if rec.toplam > covered: items.append(CarryForward(rec.ts, description, rec.toplam - covered))
+    if paid: items.append(CarryForward(end, description, -paid))
+    return items
+
+def entry_carries(entry):
+    """Günlükteki close_period girdisinin {müşteri: devir kayıtları}; eski girdilerde müşteri başına tek devir vardır."""
+    return {name: [record_from_dict(rec) for rec in (records if isinstance(records, list) else [records])] for name, records in entry["records"].items()}
+
+def period_summary(ledgers):
+    """Arşivlenen kayıtların aylık ve yem bazında toplamları (raporlar kapanmış dönemleri bu özetlerle gösterir).
+
+    Aylar ReportEngine'deki gibi 1970-01'den beri geçen ay sayısıyla
+    anahtarlanır; devir kayıtları toplamlara katılmaz. prices, yem adı
+    dizininin fiyat önerisi için her yemin dönemdeki son fiyatıdır.
+    """
+    months, feeds, prices = {}, {}, {}
+    for records in ledgers.values():
+        for rec in records:
+            if rec.type == "carry": continue
+            day = _EPOCH + timedelta(seconds=rec.ts)
+            totals = months.setdefault((day.year - 1970) * 12 + day.month - 1, [0, 0, 0])
+            totals[2] += 1
+            if rec.type == "payment": totals[1] += rec.tutar; continue
+            totals[0] += rec.toplam
+            feed = feeds.setdefault(rec.yem, [0.0, 0, 0])
+            feed[0] += rec.adet; feed[1] += rec.toplam; feed[2] += 1
+            last = prices.get(rec.yem)
+            if last is None or rec.ts >= last[0]: prices[rec.yem] = [rec.ts, rec.fiyat]
+    return {"months": {str(code): totals for code, totals in sorted(months.items())}, "feeds": feeds, "prices": prices}
+
+class PeriodArchive:
+    """Kapanan dönemlerin soğuk arşivi.
+
+    Her dönem, o döneme ait tüm müşterilerin kayıtlarını içeren tek bir
+    sıkıştırılmış dosyadır ve yazıldıktan sonra değişmez. periods.json dönemleri
+    (ad, başlangıç, bitiş, kayıt sayısı, rapor özetleri) eskiden yeniye listeler;
+    değiştiği (başka bir bilgisayar dönem kapattığı) anlaşılınca yeniden okunur.
+    Dönem dosyaları yalnızca istendiğinde açılır; son açılan dönem bellekte tutulur.
+    """
+    def __init__(self, directory=ARCHIVE_DIR, serializer=None):
+        self.directory = directory
+        self.serializer = serializer or Serializer(ARCHIVE_FORMAT, ARCHIVE_COMPRESSION)
+        self.manifest_file = os.path.join(directory, "periods.json")
+        self._lock = threading.Lock()
+        self._periods, self._manifest_mtime = [], None
+        self._open_period, self._open_ledgers = None, {}
+
+    def periods(self):
+        """Kapanmış dönemler, eskiden yeniye."""
+        with self._lock:
+            try: mtime = os.stat(self.manifest_file).st_mtime_ns
+            except FileNotFoundError: mtime = None
+            if mtime != self._manifest_mtime:
+                self._periods = read_json(self.manifest_file)["periods"] if mtime is not None else []
+                self._manifest_mtime = mtime
+            return self._periods
+
+    def period(self, label):
+        return next((period for period in self.periods() if period["label"] == label), None)
+
+    def closed_through(self):
+        """Kapanmış dönemlerin bittiği an (zaman damgası); hiç dönem kapanmadıysa None."""
+        periods = self.periods()
+        return periods[-1]["end"] if periods else None
+
+    def check_open(self, ts):
+        """Zaman damgası kapanmış bir döneme düşüyorsa PeriodError verir."""
+        closed = self.closed_through()
+        if closed is not None and ts < closed: raise PeriodError(f"{format_ts(ts)} tarihi kapanmış bir döneme düşüyor.")
+
+    def write_period(self, label, start, end, ledgers):
+        """Dönemin kayıtlarını dosyasına yazar ve dönem listesine eklenecek girdiyi döndürür (bkz. commit_period)."""
+        if self.period(label) is not None: raise PeriodError(f"'{label}' dönemi zaten kapatılmış.")
+        os.makedirs(self.directory, exist_ok=True)
+        filename = f"{label.translate(_INVALID_FILENAME_CHARS)}.ydb"
+        path, ledgers = os.path.join(self.directory, filename), dict(ledgers)
+        if os.path.exists(path):
+            # Önceki kapanış dönem listesine yazılamadan kesilmiş; o sırada defterlerden çıkarılmış kayıtlar dosyada kalır.
+            for company, records in Serializer.read(path)[0].items():
+                ids = {rec.id for rec in ledgers.get(company, ())}
+                ledgers[company] = sorted([rec for rec in records if rec.id not in ids] + list(ledgers.get(company, ())), key=record_sort_key)
+        self.serializer.write(path, ledgers, {"period": label, "start": start, "end": end})
+        return {"label": label, "start": start, "end": end, "file": filename, "closed": datetime.now().strftime(DATE_FORMAT),
+                "customers": len(ledgers), "records": sum(len(records) for records in ledgers.values()), "summary": period_summary(ledgers)}
+
+    def commit_period(self, entry):
+        """Dönemi listeye ekler; bundan sonra dönem kapanmış sayılır."""
+        write_json_atomic(self.manifest_file, {"periods": self.periods() + [entry]})
+
+    def read_records(self, label, company):
+        """Kapanmış bir dönemde müşterinin kayıtları (tarih sırasıyla)."""
+        period = self.period(label)
+        if period is None: raise PeriodError(f"'{label}' adında kapanmış dönem yok.")
+        with self._lock:
+            if self._open_period != label:
+                self._open_ledgers = Serializer.read(os.path.join(self.directory, period["file"]))[0]
+                self._open_period = label
+            return self._open_ledgers.get(company, [])
+
+# =============================================================================
+# VERİ YÖNETİM SINIFI (JSON)
+# =============================================================================
+def json_store_file(json_filename=DATA_FILE):
+    """JSON deposunun (DataManager) anlık görüntüsü: aynı klasördeki ikili dosya varsa o, yoksa json_filename; ikisi de (günlükleriyle) yoksa None."""
+    for path in (os.path.join(os.path.dirname(json_filename), BINARY_DATA_FILE), json_filename):
+        if any(os.path.exists(path + ext) for ext in ("", ".journal")): return path
+    return None
+
+class PersistenceWorker:
+    """Kirli bildirimlerini toplayıp arka planda yazan kaydedici.
+
+    İlk bildirimden sonra delay saniye beklenir; bu sürede gelen tüm
+    bildirimler tek bir yazmada birleştirilir. Başarısız bir yazma kirli
+    bildirimini geri alır ve artan aralıklarla (en çok PERSIST_RETRY_MAX
+    saniye) yeniden denenir; son hata last_error'da durur. flush() bekleyen
+    ve süren yazmalar bitene, yazma başarısız olursa çağrıdan sonra başlayan
+    ilk deneme bitene kadar bekler ve her şey yazıldıysa True döndürür.
+    """
+    def __init__(self, write_func, delay=PERSIST_DELAY):
+        self._write = write_func
+        self.delay = delay
+        self.last_error = None
+        self._cond = threading.Condition()
+        self._dirty = self._writing = self._stopped = False
+        self._started = self._finished = self._flush_target = 0  # Başlayan/biten yazma sayısı; flush'ın beklediği yazma
+        self._retry_delay = delay
+        self._thread = None
+
+    def mark_dirty(self):
+        with self._cond:
+            self._dirty = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True); self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        with self._cond:
+            if not self._dirty and not self._writing: return True
+            target = self._flush_target = self._started + 1  # Bu çağrıdan sonra başlayan ilk yazma
+            self._cond.notify_all()
+            self._cond.wait_for(lambda: not self._writing and (not self._dirty or self._finished >= target), timeout)
+            return not self._dirty and not self._writing
+
+    def stop(self):
+        """Bekleyen yazmayı bir kez dener ve arka plan iş parçacığını durdurur; sonraki bir mark_dirty onu yeniden başlatır."""
+        self.flush()
+        with self._cond: self._stopped = True; self._cond.notify_all()
+        if self._thread is not None: self._thread.join(); self._thread = None
+        self._stopped = False
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._dirty or self._stopped)
+                if self._stopped: return
+                deadline = time.monotonic() + self._retry_delay
+                while self._started >= self._flush_target and not self._stopped and time.monotonic() < deadline:
+                    self._cond.wait(deadline - time.monotonic())
+                if self._stopped: return
+                self._dirty, self._writing = False, True; self._started += 1
+            try: self._write(); error = None
+            except Exception as e: error = e
+            with self._cond:
+                self.last_error, self._writing = error, False; self._finished += 1
+                if error is None: self._retry_delay = self.delay
+                else: self._dirty = True; self._retry_delay = min(max(2 * self._retry_delay, 1), PERSIST_RETRY_MAX)
+                self._cond.notify_all()
+
+class DataManager(BaseDataManager):
+    """Müşteri defterlerini tek bir anlık görüntü dosyasında (varsayılan data.ydb) tutar.
+
+    Günlüklü (journaled) modda her değişiklik data.ydb.journal dosyasına tek
+    satır olarak eklenir ve fsync ile diske yazılır; böylece bir kayıt eklemek
+    tüm dosyayı yeniden yazmaz. Günlük belirli bir boyuta ulaşınca, program
+    kapanırken de anlık görüntüye (data.ydb) sıkıştırılır. Günlüksüz modda her
+    değişiklik yalnızca bir kirli bildirimidir. Anlık görüntüyü her iki modda da
+    PersistenceWorker arka planda, geçici dosya + yeniden adlandırma ile yazar.
+    Başlangıçta anlık görüntü okunur ve günlüğün kalan kısmı üzerine uygulanır.
+
+    Kayıt kimlik sayacı anlık görüntünün meta alanında saklanır; kimliği
+    olmayan eski veriye açılışta kimlik verilir ve hemen yeni bir anlık
+    görüntü yazılır. Günlükte düzenleme ve silme kimlikle kaydedilir.
+
+    Anlık görüntünün biçimini serializer belirler; okumada biçim dosyadan
+    algılanır. İkili bir biçim seçildiyse (varsayılan) ve dosya henüz yoksa
+    mevcut data.json (ve günlüğü) bir kez okunup yeni biçimde yazılır; eski
+    dosyalar değiştirilmeden yerinde kalır.
+
+    Dönem kapanışı günlüğe devir kayıtlarını içeren tek bir girdi olarak
+    yazılır ve anlık görüntü hemen yeniden yazılır; kapanan kayıtlar yalnızca
+    veri dosyasının yanındaki arşiv klasöründe kalır.
+
+    read_only ile açılan yönetici (taşıma ve içe aktarmanın kaynağı) dosyaları
+    okur ama hiç yazmaz; eski veriye verilen kimlikler yalnızca bellekte kalır.
+    """
+    def __init__(self, filename=None, journaled=True, persist_delay=PERSIST_DELAY, serializer=None, json_filename=DATA_FILE, read_only=False):
+        super().__init__()
+        self.serializer = serializer or Serializer()
+        self.filename = filename or (DATA_FILE if self.serializer.readable else BINARY_DATA_FILE)
+        self.journaled = journaled
+        self.read_only = read_only
+        self.journal_file = self.filename + ".journal"
+        self._rotated_journal_file = self.journal_file + ".old"
+        self.archive = PeriodArchive(os.path.join(os.path.dirname(self.filename), ARCHIVE_DIR))
+        self._lock = threading.RLock()
+        self._journal_fp = None
+        self._journal_seq = 0
+        self._journal_count = 0
+        self._persistence = PersistenceWorker(self._persist, persist_delay)
+        if self.filename != json_filename and not os.path.exists(self.filename) and any(os.path.exists(json_filename + ext) for ext in ("", ".journal")):
+            self.migrate_from_json(json_filename)
+        self.companies = self.load_data()
+        if self._loaded_aggregates is not None: self._aggregates = self._loaded_aggregates
+        else: self._aggregates = compute_aggregates(self.companies)
+        # Eski veriye verilen kimlikler, günlüğe kimlikle başvuran bir kayıt yazılmadan önce diske işlenir.
+        if self._ids_assigned and not read_only: self.save_data()
+
+    def migrate_from_json(self, json_filename):
+        """data.json dosyasını (günlüğüyle birlikte) okuyup bu yöneticinin biçiminde yazar."""
+        source = DataManager(json_filename, serializer=Serializer("json"), read_only=True)
+        try: self._write_snapshot(source.companies, {})
+        finally: source.close()
+
+    @perf.timed("load_data")
+    def load_data(self):
+        data, meta = self._read_snapshot()
+        self._journal_seq, self._journal_count = meta.get("journal_seq", 0), 0
+        if self.journaled:
+            for path in (self._rotated_journal_file, self.journal_file):
+                for entry in self._read_journal(path):
+                    if entry["seq"] <= self._journal_seq: continue
+                    self._apply_entry(data, entry)
+                    self._journal_seq = entry["seq"]; self._journal_count += 1
+        self._next_record_id = meta.get("next_record_id", 1)
+        self._ids_assigned = self._assign_ids([rec for records in data.values() for rec in records])
+        # Kayıtlı özetler yalnızca günlükten hiçbir değişiklik uygulanmadıysa geçerlidir; aksi halde yeniden hesaplanır.
+        # Eski sürümlerin TL cinsinden (kayan noktalı) özetleri okunmaz, kuruş olarak yeniden hesaplanır.
+        aggregates = meta.get("aggregates_kurus")
+        self._loaded_aggregates = aggregates if aggregates is not None and self._journal_count == 0 and aggregates.keys() == data.keys() else None
+        return data
+
+    def save_data(self):
+        """Anlık görüntünün yazılmasını ister ve yazma bitene kadar bekler."""
+        self._persistence.mark_dirty()
+        self.flush()
+
+    def flush(self, timeout=None):
+        """Bekleyen arka plan yazmaları bitene kadar bekler."""
+        return self._persistence.flush(timeout)
+
+    def close(self):
+        # Anlık görüntü güncelse (ör. toplu içe aktarmanın hemen ardından) yeniden yazılmaz; bekleyen yazmaları stop() bitirir.
+        stale = self._journal_count or os.path.exists(self._rotated_journal_file) or self._persistence.last_error is not None
+        if not self.read_only and (stale or not os.path.exists(self.filename)): self.save_data()
+        self._persistence.stop()
+        with self._lock: self._close_journal()
+        # Yazılamayan değişiklikler sessizce kaybolmasın; çağıran (ör. pencere kapanışı) kullanıcıyı uyarır.
+        if self._persistence.last_error is not None: raise self._persistence.last_error
+
+    # --- Okuma işlemleri ---
+    def company_names(self):
+        return sorted(self.companies.keys())
+
+    def has_company(self, name):
+        return name in self.companies
+
+    def _load_ledger(self, company):
+        return self.companies.get(company, [])
+
+    def iter_records(self, company):
+        return iter(self.get_records(company))
+
+    # --- Değişiklik işlemleri ---
+    def _writing(self):
+        """Değişiklik işlemlerini saran kilit; ortak depoda dosya kilidi ve eşitleme de eklenir."""
+        return self._lock
+
+    def add_company(self, name):
+        with self._writing():
+            # Ortak depoda ad, başka bir bilgisayarda az önce eklenmiş olabilir; var olan defter sıfırlanmaz.
+            if name in self.companies: return
+            self.companies[name] = []; self._aggregates[name] = new_aggregate(); self._touch(name)
+            self._commit({"op": "add_company", "company": name})
+
+    def add_records_bulk(self, batches):
+        """Kayıtları günlüğe yazmadan belleğe ekler ve tek bir anlık görüntü yazar (ya hep ya hiç).
+
+        Anlık görüntü yazılamazsa eklenen kayıtlar kimlikleriyle, açılan
+        müşteriler de bütünüyle bellekten geri alınır ve hata yeniden fırlatılır.
+        """
+        added, created = {}, set()
+        with self._lock:
+            for company, records in batches.items():
+                if company not in self.companies: self.companies[company] = []; self._aggregates[company] = new_aggregate(); created.add(company)
+                records = added[company] = [record_from_dict(rec) for rec in records]
+                self._assign_ids(records); self._extend_sorted(company, records)
+        self.save_data()
+        error = self._persistence.last_error
+        if error is not None: self._rollback_bulk(added, created); raise error
+        return sum(len(records) for records in batches.values())
+
+    def _rollback_bulk(self, added, created):
+        """Kaydedilemeyen toplu eklemeyi geri alır; arka plan kaydedicinin sonraki denemesi geri alınmış hali yazar."""
+        with self._lock:
+            for company, records in added.items():
+                if self._feed_index is not None:
+                    for rec in records: self._feed_index.remove(company, rec)
+                if company in created:
+                    self.companies.pop(company, None); self._forget_ledger(company); self._aggregates.pop(company, None); self._revisions.pop(company, None)
+                    if self._feed_index is not None: self._feed_index.forget_company(company)
+                    continue
+                ids, ledger, index = {rec.id for rec in records}, self.get_records(company), self._record_indexes[company]
+                ledger[:] = [rec for rec in ledger if rec.id not in ids]
+                self._sort_keys[company] = [record_sort_key(rec) for rec in ledger]
+                for record_id in ids: index.pop(record_id, None)
+                self._aggregates[company] = compute_aggregates({company: ledger})[company]; self._touch(company)
+            self._persistence.mark_dirty()
+
+    def delete_company(self, name):
+        with self._writing():
+            self._forget_feeds(name)
+            self.companies.pop(name, None); self._forget_ledger(name); self._aggregates.pop(name, None); self._revisions.pop(name, None)
+            self._commit({"op": "delete_company", "company": name})
+
+    def add_record(self, company, record):
+        record = record_from_dict(record)
+        with self._writing():
+            self._assign_ids((record,))
+            index = self._insert_sorted(company, record)
+            self._commit({"op": "add", "company": company, "record": record})
+        return index
+
+    def update_record(self, company, record_id, new_record, expected_revision=None):
+        new_record = record_from_dict(new_record)
+        with self._writing():
+            self._check_revision(company, expected_revision)
+            new_record.id = record_id
+            new_index = self._replace_at(company, self.record_position(company, record_id), new_record)
+            self._commit({"op": "update", "company": company, "id": record_id, "record": new_record})
+        return new_index
+
+    def delete_record(self, company, record_id, expected_revision=None):
+        with self._writing():
+            self._check_revision(company, expected_revision)
+            index = self.record_position(company, record_id)
+            self._remove_at(company, index)
+            self._commit({"op": "delete", "company": company, "id": record_id})
+        return index
+
+    def _apply_close(self, end, carries, companies):
+        self._assign_ids([carry for items in carries.values() for carry in items])
+        for company in companies: self._cut_ledger(company, end, carries.get(company, ()))
+        self._commit({"op": "close_period", "company": None, "end": end, "records": carries})
+        self._persistence.mark_dirty()
+
+    def _commit(self, entry):
+        if not self.journaled: self._persistence.mark_dirty(); return
+        try:
+            if self._journal_fp is None: self._open_journal()
+            self._journal_seq += 1
+            entry["seq"] = self._journal_seq
+            self._journal_fp.write(json.dumps(entry, ensure_ascii=False, default=json_default) + "\n")
+            self._journal_fp.flush()
+            os.fsync(self._journal_fp.fileno())
+            self._journal_count += 1
+        except Exception: self._persistence.mark_dirty(); return  # Günlüğe yazılamayan değişiklik anlık görüntüyle kaydedilir
+        if self._journal_count >= JOURNAL_COMPACT_THRESHOLD: self._persistence.mark_dirty()
+
+    # --- Günlük ve anlık görüntü ---
+    @staticmethod
+    def _apply_entry(companies, entry):
+        """Günlük kaydını uygular. Kayıtlar konumla değil kimlikle bulunur; liste sıralaması günlüğe yazılmaz.
+
+        Eski sürümlerin günlüğünde kimlik yoktur; o kayıtlar içerikle bulunur.
+        Karşılaştırma kuruş düzeyinde yapıldığından kayan nokta artıklı
+        tutarlar da eşleşir.
+        """
+        op, company = entry["op"], entry["company"]
+        if op == "add_company": companies.setdefault(company, [])
+        elif op == "delete_company": companies.pop(company, None)
+        elif op == "add": companies.setdefault(company, []).append(record_from_dict(entry["record"]))
+        elif op == "add_many": companies.setdefault(company, []).extend(record_from_dict(rec) for rec in entry["records"])
+        elif op == "close_period":
+            end = entry["end"]
+            for records in companies.values(): records[:] = [rec for rec in records if rec.ts >= end]
+            for name, carries in entry_carries(entry).items():
+                if name in companies: companies[name][:0] = carries
+        elif op in ("update", "delete"):
+            records = companies.get(company, [])
+            if "id" in entry: record_id = entry["id"]; matches = lambda rec: rec.id == record_id
+            else: target = record_from_dict(entry["old"] if op == "update" else entry["record"]); matches = lambda rec: rec == target
+            for i, rec in enumerate(records):
+                if matches(rec):
+                    if op == "update": records[i] = record_from_dict(entry["record"])
+                    else: del records[i]
+                    break
+
+    def _read_snapshot(self):
+        """Anlık görüntüyü okur. Yalnızca içeriği bozuk bir dosya kenara alınır ve boş defterle başlanır.
+
+        Dosyaya erişilemiyorsa (OSError), gereken paket eksikse (ImportError) ya
+        da dosya daha yeni bir sürümle yazılmışsa hata yükseltilir ve program
+        açılmaz; dosyanın kendisinde bir sorun yoktur.
+        """
+        if not os.path.exists(self.filename): return {}, {}
+        try: return Serializer.read(self.filename)
+        except SchemaTooNewError: raise
+        except SerializationError:
+            # Okunamayan anlık görüntü bir sonraki kayıtta üzerine yazılmasın diye kenara alınır; önceki kopyalar korunur.
+            aside, suffix = self.filename + ".bozuk", 1
+            while os.path.exists(aside): aside = f"{self.filename}.bozuk{suffix}"; suffix += 1
+            os.replace(self.filename, aside)
+            return {}, {}
+
+    @staticmethod
+    def _read_journal(path):
+        if not os.path.exists(path): return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try: entry = json.loads(line)
+                except ValueError: continue  # Çökme sırasında yarım kalmış satır
+                yield entry
+
+    def _write_snapshot(self, companies, meta):
+        """Anlık görüntüyü geçici dosyaya yazıp atomik olarak hedef dosyayla değiştirir."""
+        self.serializer.write(self.filename, companies, meta)
+
+    def _open_journal(self):
+        self._journal_fp = open(self.journal_file, "a", encoding="utf-8")
+        # Önceki bir çökmeden kalan yarım satırın yeni kayıtla birleşmemesi için satırı kapat.
+        if self._journal_fp.tell() > 0:
+            with open(self.journal_file, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n": self._journal_fp.write("\n")
+
+    def _close_journal(self):
+        if self._journal_fp is not None: self._journal_fp.close(); self._journal_fp = None
+
+    def _rotate_journal(self):
+        """Günlüğü .old dosyasına taşır; önceki bir yazma başarısız olduysa .old dosyasının sonuna ekler."""
+        self._close_journal()
+        if not os.path.exists(self.journal_file): return
+        if os.path.exists(self._rotated_journal_file):
+            with open(self.journal_file, "rb") as src, open(self._rotated_journal_file, "ab") as dst: dst.write(b"\n" + src.read())
+            os.remove(self.journal_file)
+        else: os.replace(self.journal_file, self._rotated_journal_file)
+        self._journal_count = 0
+
+    @perf.timed("save_data")
+    def _persist(self):
+        # Kayıtlar yerinde değiştirilmez; bu yüzden kilit altında yalnızca listelerin sığ kopyası alınır,
+        # serileştirme ve disk yazması kilit dışında yapılır.
+        with self._lock:
+            companies = {company: list(records) for company, records in self.companies.items()}
+            meta = {"aggregates_kurus": {company: dict(agg) for company, agg in self._aggregates.items()}, "next_record_id": self._next_record_id}
+            if self.journaled:
+                meta["journal_seq"] = self._journal_seq
+                self._rotate_journal()
+        self._write_snapshot(companies, meta)
+        if os.path.exists(self._rotated_journal_file): os.remove(self._rotated_journal_file)
+
+# =============================================================================
+# VERİ YÖNETİM SINIFI (SQLITE)
+# =============================================================================
+class SQLiteDataManager(BaseDataManager):
+    """DataManager ile aynı arayüzü SQLite veritabanı üzerinden sunar.
+
+    Tüm veri belleğe okunmaz; müşteri seçimi, bakiye ve dışa aktarma
+    (company, tarih) dizinini kullanan sorgularla yapılır. Yalnızca açık
+    müşterinin defteri önbellekte tutulur. Veritabanı yoksa JSON deposunun
+    anlık görüntüsü (data.ydb ya da data.json, günlüğüyle) tek bir işlemde içeri aktarılır. Tutarlar tabloda TL olarak
+    durur; özetler (aggregates) tam sayı kuruş olarak tutulur.
+    """
+    _SCHEMA_VERSION = 1 # PRAGMA user_version; 1: özetler kuruş cinsinden
+
+    def __init__(self, filename=DB_FILE, json_filename=DATA_FILE):
+        super().__init__()
+        self.filename = filename
+        is_new = not os.path.exists(self.filename)
+        self.conn = sqlite3.connect(self.filename)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.create_function("kurus", 1, lambda value: 0 if value is None else to_kurus(value), deterministic=True)
+        self._create_schema()
+        self._ledger_company, self._ledger = None, []
+        self.archive = PeriodArchive(os.path.join(os.path.dirname(self.filename), ARCHIVE_DIR))
+        source = json_store_file(json_filename) if is_new else None
+        if source is not None: self.import_json(source)
+        self._load_aggregates()
+
+    _AGGREGATE_FIELDS = ("balance", "purchases", "payments", "count", "last_activity")
+
+    def _load_aggregates(self):
+        company_count = self.conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0]
+        stale = self.conn.execute("PRAGMA user_version").fetchone()[0] < self._SCHEMA_VERSION
+        if stale or self.conn.execute("SELECT COUNT(*) FROM aggregates").fetchone()[0] != company_count: self.rebuild_aggregates()
+        # REAL sütunlardan okunan kuruşlar tam sayıya çevrilir.
+        self._aggregates = {row[0]: {"balance": int(row[1]), "purchases": int(row[2]), "payments": int(row[3]), "count": row[4], "last_activity": row[5]}
+                            for row in self.conn.execute("SELECT company, balance, purchases, payments, count, last_activity FROM aggregates")}
+
+    def rebuild_aggregates(self):
+        # Kuruşa çevirme, bellekteki kayıtlarla aynı yuvarlama için Python'daki to_kurus ile (kurus SQL fonksiyonu) yapılır.
+        with self.conn:
+            self.conn.execute("DELETE FROM aggregates")
+            self.conn.execute("""
+                INSERT INTO aggregates(company, balance, purchases, payments, count, last_activity)
+                SELECT c.name, SUM(kurus(r.toplam)) - SUM(kurus(r.tutar)), SUM(kurus(r.toplam)), SUM(kurus(r.tutar)), COUNT(r.id), MAX(r.tarih)
+                FROM companies c LEFT JOIN records r ON r.company = c.name GROUP BY c.name""")
+            self.conn.execute(f"PRAGMA user_version = {self._SCHEMA_VERSION}")
+
+    def _store_aggregate(self, company):
+        agg = self._aggregates[company]
+        self.conn.execute("INSERT OR REPLACE INTO aggregates(company, balance, purchases, payments, count, last_activity) VALUES (?, ?, ?, ?, ?, ?)",
+                          (company,) + tuple(agg[field] for field in self._AGGREGATE_FIELDS))
+
+    def _create_schema(self):
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS companies (name TEXT PRIMARY KEY);
+                CREATE TABLE IF NOT EXISTS records (
+                    id INTEGER PRIMARY KEY,
+                    company TEXT NOT NULL REFERENCES companies(name) ON DELETE CASCADE,
+                    type TEXT NOT NULL,
+                    tarih TEXT NOT NULL,
+                    yem TEXT, adet REAL, fiyat REAL, toplam REAL,
+                    aciklama TEXT, tutar REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_records_company_tarih ON records(company, tarih);
+                CREATE INDEX IF NOT EXISTS idx_records_type ON records(type);
+                CREATE TABLE IF NOT EXISTS aggregates (
+                    company TEXT PRIMARY KEY REFERENCES companies(name) ON DELETE CASCADE,
+                    balance REAL, purchases REAL, payments REAL, count INTEGER, last_activity TEXT
+                );
+            """)
+
+    def import_json(self, json_filename):
+        """JSON deposunun anlık görüntüsünü (günlüğüyle birlikte) tek bir işlemde veritabanına aktarır; kaynak dosyalar değiştirilmez."""
+        source = DataManager(json_filename, read_only=True)
+        try: companies = source.companies
+        finally: source.close()
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO companies(name) VALUES (?)", ((name,) for name in companies))
+            self.conn.executemany(self._INSERT_RECORD, ((rec.id,) + self._record_to_row(name, rec) for name, records in companies.items() for rec in records))
+        self._ledger_company = None
+        self._load_aggregates()
+
+    # Kayıt kimliği satırın id sütunudur; kimliği olmayan kayıtlara SQLite yeni bir id verir.
+    _INSERT_RECORD = "INSERT INTO records(id, company, type, tarih, yem, adet, fiyat, toplam, aciklama, tutar) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+    @staticmethod
+    def _record_to_row(company, record):
+        if record.type == "purchase":
+            return (company, "purchase", record.tarih, record.yem, record.adet, record.fiyat / 100, record.toplam / 100, None, None)
+        if record.type == "carry":  # Borç bakiyesi toplam, alacak bakiyesi tutar sütununa yazılır; özet sorgusu değişmez.
+            return (company, "carry", record.tarih, None, None, None, record.toplam / 100, record.aciklama, record.tutar / 100)
+        return (company, "payment", record.tarih, None, None, None, None, record.aciklama, record.tutar / 100)
+
+    @staticmethod
+    def _row_to_record(row):
+        record_type, tarih, yem, adet, fiyat, toplam, aciklama, tutar, record_id = row
+        if record_type == "purchase": return Purchase(parse_ts(tarih), yem, adet, to_kurus(fiyat), to_kurus(toplam), record_id)
+        if record_type == "carry": return CarryForward(parse_ts(tarih), aciklama, to_kurus(toplam) - to_kurus(tutar), record_id)
+        return Payment(parse_ts(tarih), aciklama, to_kurus(tutar), record_id)
+
+    _SELECT_RECORDS = "SELECT type, tarih, yem, adet, fiyat, toplam, aciklama, tutar, id FROM records WHERE company = ? ORDER BY tarih"
+
+    # --- Okuma işlemleri ---
+    def company_names(self):
+        return [row[0] for row in self.conn.execute("SELECT name FROM companies ORDER BY name")]
+
+    def has_company(self, name):
+        return self.conn.execute("SELECT 1 FROM companies WHERE name = ?", (name,)).fetchone() is not None
+
+    def _load_ledger(self, company):
+        if company != self._ledger_company:
+            self._ledger = [self._row_to_record(row) for row in self.conn.execute(self._SELECT_RECORDS, (company,))]
+            self._ledger_company = company
+            self._sort_keys = {company: [record_sort_key(rec) for rec in self._ledger]}
+            self._record_indexes = {company: {rec.id: rec for rec in self._ledger}}
+        return self._ledger
+
+    def iter_records(self, company):
+        """Müşterinin kayıtlarını önbelleğe almadan, tarih sırasıyla akıtır."""
+        for row in self.conn.execute(self._SELECT_RECORDS, (company,)): yield self._row_to_record(row)
+
+    def open_reader(self, companies):
+        return SQLiteLedgerReader(self.filename, self._row_to_record)
+
+    # --- Değişiklik işlemleri ---
+    def add_company(self, name):
+        if self.has_company(name): return
+        self._aggregates[name] = new_aggregate(); self._touch(name)
+        with self.conn:
+            self.conn.execute("INSERT INTO companies(name) VALUES (?)", (name,))
+            self._store_aggregate(name)
+
+    def add_records_bulk(self, batches):
+        """Kayıtları ve özetleri tek bir işlemde ekler."""
+        batches = {company: [record_from_dict(rec) for rec in records] for company, records in batches.items()}
+        try:
+            with self.conn:
+                self.conn.executemany("INSERT OR IGNORE INTO companies(name) VALUES (?)", ((company,) for company in batches))
+                self.conn.executemany(self._INSERT_RECORD, ((rec.id,) + self._record_to_row(company, rec) for company, records in batches.items() for rec in records))
+                for company, records in batches.items():
+                    self._merge_aggregate(company, records); self._store_aggregate(company)
+                    if self._feed_index is not None: self._feed_index.add_many(company, records)
+        except Exception:
+            self._reload_cache(); raise
+        if self._ledger_company in batches: self._ledger_company = None
+        return sum(len(records) for records in batches.values())
+
+    def delete_company(self, name):
+        self._forget_feeds(name)
+        with self.conn: self.conn.execute("DELETE FROM companies WHERE name = ?", (name,))
+        self._aggregates.pop(name, None); self._revisions.pop(name, None)
+        if name == self._ledger_company: self._ledger_company = None
+
+    def add_record(self, company, record):
+        record = record_from_dict(record)
+        self.get_records(company)  # Yeni satır eklenmeden önce defter önbellekte olmalı
+        try:
+            with self.conn:
+                record.id = self.conn.execute(self._INSERT_RECORD, (record.id,) + self._record_to_row(company, record)).lastrowid
+                index = self._insert_sorted(company, record)
+                self._store_aggregate(company)
+        except Exception:
+            self._reload_cache(); raise
+        return index
+
+    def update_record(self, company, record_id, new_record, expected_revision=None):
+        self._check_revision(company, expected_revision)
+        new_record = record_from_dict(new_record)
+        new_record.id = record_id
+        position = self.record_position(company, record_id)
+        try:
+            with self.conn:  # Satır önce yazılır; bellekteki defter ve özet yalnızca o başarılı olursa değişir
+                self.conn.execute(
+                    "UPDATE records SET company = ?, type = ?, tarih = ?, yem = ?, adet = ?, fiyat = ?, toplam = ?, aciklama = ?, tutar = ? WHERE id = ?",
+                    self._record_to_row(company, new_record) + (record_id,))
+                new_index = self._replace_at(company, position, new_record)
+                self._store_aggregate(company)
+        except Exception:
+            self._reload_cache(); raise
+        return new_index
+
+    def delete_record(self, company, record_id, expected_revision=None):
+        self._check_revision(company, expected_revision)
+        index = self.record_position(company, record_id)
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM records WHERE id = ?", (record_id,))
+                self._remove_at(company, index)
+                self._store_aggregate(company)
+        except Exception:
+            self._reload_cache(); raise
+        return index
+
+    def _apply_close(self, end, carries, companies):
+        try:
+            with self.conn:
+                for company in companies:
+                    self.get_records(company)  # Defter, satırlar silinmeden önce önbelleğe alınır
+                    self.conn.execute("DELETE FROM records WHERE company = ? AND tarih < ?", (company, format_ts(end)))
+                    items = carries.get(company, ())
+                    for carry in items: carry.id = self.conn.execute(self._INSERT_RECORD, (None,) + self._record_to_row(company, carry)).lastrowid
+                    self._cut_ledger(company, end, items); self._store_aggregate(company)
+        except Exception:
+            self._reload_cache(); raise
+
+    def _reload_cache(self):
+        """Geri alınan bir işlemden sonra bellekteki defteri, özetleri ve yem dizinini veritabanına göre yeniler."""
+        self._ledger_company = None; self._load_aggregates()
+        self._feed_index = None  # Yeniden kurulur
+
+    @perf.timed("save_data")
+    def save_data(self):
+        # Her değişiklik kendi işleminde kaydedilir; burada yalnızca WAL dosyası ana veritabanına işlenir.
+        try: self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except Exception: pass
+
+    def flush(self, timeout=None):
+        return True
+
+    def close(self):
+        self.save_data()
+        self.conn.close()
+
+class SQLiteLedgerReader:
+    """Kendi bağlantısını, ilk kullanıldığı iş parçacığında açan SQLite okuyucu."""
+    def __init__(self, filename, row_to_record):
+        self.filename, self._row_to_record, self.conn = filename, row_to_record, None
+    def iter_records(self, company):
+        if self.conn is None: self.conn = sqlite3.connect(self.filename)
+        for row in self.conn.execute(SQLiteDataManager._SELECT_RECORDS, (company,)): yield self._row_to_record(row)
+    def close(self):
+        if self.conn is not None: self.conn.close(); self.conn = None
+
+# =============================================================================
+# VERİ YÖNETİM SINIFI (PARÇALI)
+# =============================================================================
+def shard_filename(company):
+    return hashlib.sha1(company.encode("utf-8")).hexdigest()[:16] + ".json"
+
+class ShardedDataManager(BaseDataManager):
+    """Her müşterinin defterini ayrı bir dosyada (parça) tutan veri yöneticisi.
+
+    Küçük bir manifest yalnızca müşteri adlarını, parça dosyalarını, özet
+    bakiyeleri (kuruş) ve kayıt kimlik sayacını içerir; açılışta sadece o okunur. Defterler müşteri seçildiğinde
+    yüklenir ve en son kullanılan LEDGER_CACHE_SIZE tanesi bellekte tutulur.
+    Kaydetme PersistenceWorker ile arka planda yapılır ve yalnızca değişen
+    parçalar yazılır. Manifest yoksa JSON deposunun anlık görüntüsü (data.ydb ya da data.json) parçalara bölünür.
+    """
+    def __init__(self, directory=SHARD_DIR, json_filename=DATA_FILE, cache_size=LEDGER_CACHE_SIZE, persist_delay=PERSIST_DELAY):
+        super().__init__()
+        self.directory = directory
+        self.manifest_file = os.path.join(directory, "manifest.json")
+        self.ledger_dir = os.path.join(directory, "ledgers")
+        self.cache_size = cache_size
+        self._lock = threading.RLock()
+        self._cache = OrderedDict()
+        self._dirty_companies, self._deleted_shards, self._manifest_dirty = set(), set(), False
+        self._writing_companies = set()  # Parçası o anda arka planda yazılan müşteriler
+        self._persistence = PersistenceWorker(self._persist, persist_delay)
+        self.archive = PeriodArchive(os.path.join(os.path.dirname(os.path.normpath(directory)), ARCHIVE_DIR))
+        os.makedirs(self.ledger_dir, exist_ok=True)
+        source = json_store_file(json_filename) if not os.path.exists(self.manifest_file) else None
+        if source is not None: self.migrate_from_json(source)
+        self._shards, self._aggregates = self._read_manifest()
+
+    def migrate_from_json(self, json_filename):
+        """JSON deposunun tek parça anlık görüntüsünü müşteri başına parçalara ve bir manifeste böler."""
+        source = DataManager(json_filename, read_only=True)
+        try: companies, aggregates, next_record_id = source.companies, compute_aggregates(source.companies), source._next_record_id
+        finally: source.close()
+        manifest = {"companies": {}, "next_record_id": next_record_id}
+        for name, records in companies.items():
+            records.sort(key=record_sort_key)
+            write_json_atomic(os.path.join(self.ledger_dir, shard_filename(name)), records)
+            manifest["companies"][name] = {"shard": shard_filename(name), "aggregate_kurus": aggregates[name]}
+        write_json_atomic(self.manifest_file, manifest)
+
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_file): return {}, {}
+        manifest = read_json(self.manifest_file)
+        entries, self._next_record_id = manifest["companies"], manifest.get("next_record_id", 1)
+        shards = {name: entry["shard"] for name, entry in entries.items()}
+        aggregates = {name: entry["aggregate_kurus"] for name, entry in entries.items() if entry.get("aggregate_kurus") is not None}
+        # Özeti eksik (ya da eski sürümde TL olarak yazılmış) müşteriler defterden yeniden hesaplanır.
+        for name in shards.keys() - aggregates.keys():
+            aggregates[name] = compute_aggregates({name: self._read_shard(shards[name])})[name]; self._manifest_dirty = True
+        return shards, aggregates
+
+    def _read_shard(self, shard):
+        path = os.path.join(self.ledger_dir, shard)
+        return [record_from_dict(rec) for rec in read_json(path)] if os.path.exists(path) else []
+
+    # --- Okuma işlemleri ---
+    def company_names(self):
+        return sorted(self._shards)
+
+    def has_company(self, name):
+        return name in self._shards
+
+    def _load_ledger(self, company):
+        with self._lock:
+            records = self._cache.get(company)
+            if records is not None: self._cache.move_to_end(company); return records
+            if company not in self._shards: return []
+            records = self._cache[company] = self._read_shard(self._shards[company])
+            # Manifest parçadan önce yazılamadan kesilmişse özet, yüklenen deftere göre düzeltilir.
+            if self.get_aggregate(company)["count"] != len(records):
+                self._aggregates[company] = compute_aggregates({company: records})[company]; self._manifest_dirty = True
+            # Eski sürümün yazdığı kimliksiz kayıtlara kimlik verilir ve parça yeniden yazılır.
+            if self._assign_ids(records): self._changed(company)
+            self._evict(company)
+            return records
+
+    def _evict(self, keep):
+        # Henüz yazılmamış (kirli ya da yazılmakta olan) defterler ve yeni yüklenen defter önbellekten çıkarılmaz;
+        # aksi halde parça diske ulaşmadan yeniden yüklenen defter eski dosyadan okunurdu.
+        while len(self._cache) > self.cache_size:
+            victim = next((name for name in self._cache if name != keep and name not in self._dirty_companies and name not in self._writing_companies), None)
+            if victim is None: return
+            del self._cache[victim]; self._forget_ledger(victim)
+
+    def iter_records(self, company):
+        return iter(self.get_records(company))
+
+    def open_reader(self, companies):
+        with self._lock:
+            cached = {company: list(self._cache[company]) for company in companies if company in self._cache}
+            shards = {company: self._shards[company] for company in companies if company in self._shards}
+        return ShardLedgerReader(self.ledger_dir, shards, cached)
+
+    # --- Değişiklik işlemleri ---
+    def _changed(self, company):
+        self._dirty_companies.add(company); self._manifest_dirty = True
+        self._persistence.mark_dirty()
+
+    def add_company(self, name):
+        with self._lock:
+            if name in self._shards: return  # Var olan defter sıfırlanmaz
+            self._shards[name] = shard_filename(name); self._deleted_shards.discard(self._shards[name])
+            self._cache[name] = []; self._aggregates[name] = new_aggregate(); self._touch(name)
+            self._changed(name)
+
+    def delete_company(self, name):
+        with self._lock:
+            self._forget_feeds(name)
+            shard = self._shards.pop(name, None)
+            if shard is None: return
+            self._cache.pop(name, None); self._aggregates.pop(name, None); self._forget_ledger(name); self._revisions.pop(name, None)
+            self._dirty_companies.discard(name); self._deleted_shards.add(shard); self._manifest_dirty = True
+            self._persistence.mark_dirty()
+
+    def add_record(self, company, record):
+        record = record_from_dict(record)
+        with self._lock:
+            self._assign_ids((record,))
+            index = self._insert_sorted(company, record)
+            self._changed(company)
+        return index
+
+    def add_records_bulk(self, batches):
+        """Kayıtları ekler ve değişen parçaları tek bir kayıtta yazar."""
+        with self._lock:
+            for company, records in batches.items():
+                if company not in self._shards: self.add_company(company)
+                records = [record_from_dict(rec) for rec in records]
+                self._assign_ids(records); self._extend_sorted(company, records)
+                self._changed(company)
+        self.save_data()
+        if self._persistence.last_error is not None: raise self._persistence.last_error
+        return sum(len(records) for records in batches.values())
+
+    def update_record(self, company, record_id, new_record, expected_revision=None):
+        new_record = record_from_dict(new_record)
+        with self._lock:
+            self._check_revision(company, expected_revision)
+            new_record.id = record_id
+            new_index = self._replace_at(company, self.record_position(company, record_id), new_record)
+            self._changed(company)
+        return new_index
+
+    def delete_record(self, company, record_id, expected_revision=None):
+        with self._lock:
+            self._check_revision(company, expected_revision)
+            index = self.record_position(company, record_id)
+            self._remove_at(company, index)
+            self._changed(company)
+        return index
+
+    def _apply_close(self, end, carries, companies):
+        with self._lock:
+            self._assign_ids([carry for items in carries.values() for carry in items])
+            for company in companies:
+                self._cut_ledger(company, end, carries.get(company, ())); self._changed(company)
+        self.save_data()  # Dönem listesi ancak parçalar yazıldıktan sonra güncellenir
+        if self._persistence.last_error is not None: raise self._persistence.last_error
+
+    # --- Kalıcılık ---
+    @perf.timed("save_data")
+    def _persist(self):
+        with self._lock:
+            shards = {self._shards[company]: list(self._cache[company]) for company in self._dirty_companies}
+            deleted, manifest = self._deleted_shards, None
+            if self._manifest_dirty:
+                manifest = {"companies": {name: {"shard": shard, "aggregate_kurus": dict(self.get_aggregate(name))} for name, shard in self._shards.items()},
+                            "next_record_id": self._next_record_id}
+            dirty = self._writing_companies = self._dirty_companies
+            self._dirty_companies, self._deleted_shards, self._manifest_dirty = set(), set(), False
+        try:
+            # Önce parçalar, sonra manifest yazılır; arada kesilirse özetler defter yüklenirken düzeltilir.
+            for shard, records in shards.items(): write_json_atomic(os.path.join(self.ledger_dir, shard), records)
+            if manifest is not None: write_json_atomic(self.manifest_file, manifest)
+            for shard in deleted:
+                path = os.path.join(self.ledger_dir, shard)
+                if os.path.exists(path): os.remove(path)
+        except Exception:
+            with self._lock:
+                self._dirty_companies |= {company for company in dirty if company in self._shards}
+                self._deleted_shards |= deleted; self._manifest_dirty = True
+            raise
+        finally:
+            with self._lock: self._writing_companies = set()
+
+    def save_data(self):
+        with self._lock: self._manifest_dirty = True
+        self._persistence.mark_dirty()
+        self.flush()
+
+    def flush(self, timeout=None):
+        return self._persistence.flush(timeout)
+
+    def close(self):
+        self.save_data()
+        self._persistence.stop()
+        if self._persistence.last_error is not None: raise self._persistence.last_error
+
+class ShardLedgerReader:
+    """Parça dosyalarını başka bir iş parçacığında okuyan okuyucu; önbellekteki defterler için kopyaları kullanır."""
+    def __init__(self, ledger_dir, shards, cached):
+        self.ledger_dir, self.shards, self.cached = ledger_dir, shards, cached
+    def iter_records(self, company):
+        records = self.cached.get(company)
+        if records is None and company in self.shards:
+            path = os.path.join(self.ledger_dir, self.shards[company])
+            records = [record_from_dict(rec) for rec in read_json(path)] if os.path.exists(path) else []
+        return iter(records or ())
+    def close(self):
+        pass
+
+# =============================================================================
+# VERİ YÖNETİM SINIFI (ORTAK KLASÖR)
+# =============================================================================
+class SharedStoreError(Exception):
+    """Ortak veri dosyası kilitlenemedi ya da yazılamadı."""
+
+class FileLock:
+    """Süreçler (ve ağ klasörünü kullanan bilgisayarlar) arasında özel kilit.
+
+    Kilit, ayrı bir kilit dosyasının ilk baytı üzerinde işletim sisteminin
+    bayt aralığı kilidiyle (Windows'ta msvcrt.locking, diğerlerinde
+    fcntl.lockf) alınır; süreç çökerse kilidi işletim sistemi bırakır. Aynı
+    süreç içinde iş parçacıkları arasında da kilitler ve iç içe kullanılabilir.
+    """
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        self.path, self.timeout = path, timeout
+        self._thread_lock = threading.RLock()
+        self._fd, self._depth = None, 0
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try: self._fd = self._acquire_file()
+            except BaseException: self._thread_lock.release(); raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            try: self._unlock(self._fd)
+            finally: os.close(self._fd); self._fd = None
+        self._thread_lock.release()
+
+    def _acquire_file(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try: self._lock(fd); return fd
+            except OSError: pass
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                raise SharedStoreError("Ortak veri dosyası başka bir bilgisayarda kilitli; lütfen biraz sonra yeniden deneyin.")
+            time.sleep(0.05)
+
+    @staticmethod
+    def _lock(fd):
+        if os.name == "nt":
+            import msvcrt
+            os.lseek(fd, 0, os.SEEK_SET); msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    @staticmethod
+    def _unlock(fd):
+        if os.name == "nt":
+            import msvcrt
+            os.lseek(fd, 0, os.SEEK_SET); msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.lockf(fd, fcntl.LOCK_UN)
+
+class SharedDataManager(DataManager):
+    """Ağ klasöründeki tek bir veri dosyasını birden çok bilgisayarın birlikte kullandığı veri yöneticisi.
+
+    Günlük hem kalıcılık hem değişiklik akışıdır: her değişiklik, kilit
+    dosyası alınmışken ortak günlüğe sıra numarasıyla eklenir. Yazmadan önce
+    başka kopyaların eklediği girdiler bellekteki defterlere uygulanır; düzenleme
+    ve silmede müşterinin revizyonu beklenenden farklıysa (defter başka bir
+    bilgisayarda değişmişse) ConflictError verilir. sync() günlüğün yalnızca
+    son okunan konumdan sonraki kısmını okur ve değişen müşterileri döndürür;
+    arayüz bunları yeniler. Günlük eşiği aşınca anlık görüntü, kilit altında
+    diskten yeniden okunarak yazılır ve günlük, sıkıştırmanın hangi sıra
+    numarasına kadar yapıldığını gösteren bir işaretle yeniden başlar; geride
+    kalmış kopyalar bu işareti görünce defterleri baştan okur.
+    """
+    def __init__(self, filename=SHARED_DATA_FILE, serializer=None, lock_timeout=LOCK_TIMEOUT, persist_delay=PERSIST_DELAY):
+        self.lock = FileLock(filename + ".lock", lock_timeout)
+        self._journal_offset = 0
+        self._changes = set()
+        super().__init__(filename, journaled=True, persist_delay=persist_delay, serializer=serializer, json_filename=filename)
+
+    def load_data(self):
+        with self.lock:
+            data = super().load_data()
+            _, self._journal_offset = self._tail_journal(0)
+        return data
+
+    def close(self):
+        # Her kapanışta bütün dosya yeniden yazılmaz; anlık görüntü yalnızca günlük eşiği aştıysa yenilenir.
+        if self._journal_count >= JOURNAL_COMPACT_THRESHOLD or not os.path.exists(self.filename): self.save_data()
+        self._persistence.stop()
+        if self._persistence.last_error is not None: raise self._persistence.last_error
+
+    # --- Eşitleme ---
+    def sync(self):
+        with self._lock:
+            try: self._catch_up()
+            except (OSError, SharedStoreError): pass  # Ağ klasörüne geçici olarak erişilemiyor; sonraki denetimde yeniden denenir
+            changes, self._changes = self._changes, set()
+        return changes
+
+    @contextmanager
+    def _writing(self):
+        with self._lock, self.lock:
+            self._catch_up()
+            yield
+
+    def _tail_journal(self, offset):
+        """Günlüğü offset'ten sonuna kadar okur; yalnızca tamamlanmış satırları çözer. (girdiler, yeni konum) döndürür."""
+        try:
+            with open(self.journal_file, "rb") as f: f.seek(offset); data = f.read()
+        except FileNotFoundError: return [], 0
+        end = data.rfind(b"\n") + 1
+        entries = []
+        for line in data[:end].splitlines():
+            try: entries.append(json.loads(line))
+            except ValueError: continue  # Çökme sırasında yarım kalmış satır
+        return entries, offset + end
+
+    def _catch_up(self):
+        """Günlükte bu kopyanın henüz görmediği girdileri uygular."""
+        try: size = os.path.getsize(self.journal_file)
+        except FileNotFoundError: size = 0
+        if size == self._journal_offset: return
+        entries = None
+        if size > self._journal_offset:
+            entries, offset = self._tail_journal(self._journal_offset)
+            # Sıra numarası kopmuşsa ya da sıkıştırma işareti görülürse günlük bu arada sıkıştırılıp yeniden büyümüştür; baştan okunur.
+            if entries and (entries[0]["seq"] != self._journal_seq + 1 or any(entry["op"] == "compacted" for entry in entries)): entries = None
+        if entries is None:
+            entries, offset = self._tail_journal(0)
+            if entries and entries[0]["op"] == "compacted":
+                if entries[0]["seq"] > self._journal_seq: self._reload(); return
+                self._journal_count = len(entries) - 1
+            entries = [entry for entry in entries if entry["seq"] > self._journal_seq]
+            if entries and entries[0]["seq"] != self._journal_seq + 1: self._reload(); return
+        for entry in entries: self._apply_remote(entry)
+        self._journal_offset = offset
+
+    def _apply_remote(self, entry):
+        """Başka bir kopyanın günlük girdisini bellekteki defterlere ve özetlere uygular."""
+        op, company = entry["op"], entry["company"]
+        self._journal_seq = entry["seq"]; self._journal_count += 1
+        if op == "close_period":
+            carries = entry_carries(entry)
+            for name in self.companies:
+                if self._records_before(name, entry["end"]) or name in carries:
+                    self._cut_ledger(name, entry["end"], carries.get(name, ())); self._changes.add(name)
+            return
+        if op == "delete_company":
+            self._forget_feeds(company)
+            self.companies.pop(company, None); self._forget_ledger(company); self._aggregates.pop(company, None); self._revisions.pop(company, None)
+        elif company in self.companies or op in ("add_company", "add", "add_many"):
+            if company not in self.companies: self.companies[company] = []; self._aggregates[company] = new_aggregate()
+            self._touch(company)
+            if op in ("add", "add_many"):
+                records = [record_from_dict(rec) for rec in (entry["records"] if op == "add_many" else (entry["record"],))]
+                self._assign_ids(records)
+                if op == "add": self._insert_sorted(company, records[0])
+                else: self._extend_sorted(company, records)
+            elif op == "update":
+                record = record_from_dict(entry["record"])
+                if self.find_record(company, entry["id"]) is not None: self._replace_at(company, self.record_position(company, entry["id"]), record)
+            elif op == "delete":
+                if self.find_record(company, entry["id"]) is not None: self._remove_at(company, self.record_position(company, entry["id"]))
+        self._changes.add(company)
+
+    def _reload(self):
+        """Defterleri baştan okur (bu kopyanın kaçırdığı girdiler sıkıştırılmışsa); tüm müşteriler değişmiş sayılır."""
+        names = set(self.companies)
+        self._sort_keys, self._record_indexes, self._feed_index = {}, {}, None  # Yem dizini yeniden kurulur
+        self.companies = self.load_data()
+        self._aggregates = self._loaded_aggregates if self._loaded_aggregates is not None else compute_aggregates(self.companies)
+        for name in names - self.companies.keys(): self._revisions.pop(name, None)
+        for name in self.companies: self._touch(name)
+        self._changes |= names | self.companies.keys()
+
+    # --- Yazma ---
+    def add_records_bulk(self, batches):
+        """Kayıtları müşteri başına tek bir günlük girdisiyle ekler; diğer kopyalar da günlükten alır."""
+        with self._writing():
+            for company, records in batches.items():
+                if company not in self.companies: self.add_company(company)
+                records = [record_from_dict(rec) for rec in records]
+                self._assign_ids(records); self._extend_sorted(company, records)
+                self._commit({"op": "add_many", "company": company, "records": records})
+        return sum(len(records) for records in batches.values())
+
+    def _commit(self, entry):
+        self._journal_seq += 1
+        entry["seq"] = self._journal_seq
+        line = (json.dumps(entry, ensure_ascii=False, default=json_default) + "\n").encode("utf-8")
+        try:
+            with open(self.journal_file, "ab") as f:
+                # Okunan konumdan sonra kalan bayt, çöken bir yazıcının yarım satırıdır; yeni girdiyle birleşmemesi için satır kapatılır.
+                if f.tell() > self._journal_offset: f.write(b"\n")
+                f.write(line); f.flush(); os.fsync(f.fileno())
+                self._journal_offset = f.tell()
+        except OSError as e:
+            # Değişiklik bellekte uygulanmış ama paylaşılamamıştır; defterler ortak dosyadan yeniden okunur.
+            self._reload()
+            raise SharedStoreError(f"Ortak veri dosyasına yazılamadı: {e}") from None
+        self._journal_count += 1
+        if self._journal_count >= JOURNAL_COMPACT_THRESHOLD: self._persistence.mark_dirty()
+
+    @perf.timed("save_data")
+    def _persist(self):
+        # Bellekteki kopya yerine diskteki anlık görüntü ve günlük kilit altında yeniden okunur; böylece
+        # yazma, başka bilgisayarların bu kopyaya henüz ulaşmamış değişikliklerini de içerir.
+        with self.lock:
+            companies, meta = Serializer.read(self.filename) if os.path.exists(self.filename) else ({}, {})
+            seq = meta.get("journal_seq", 0)
+            for entry in self._read_journal(self.journal_file):
+                if entry["seq"] > seq: self._apply_entry(companies, entry); seq = entry["seq"]
+            next_id, _ = assign_record_ids([rec for records in companies.values() for rec in records], meta.get("next_record_id", 1))
+            self._write_snapshot(companies, {"aggregates_kurus": compute_aggregates(companies), "journal_seq": seq, "next_record_id": next_id})
+            with open(self.journal_file, "wb") as f:
+                f.write(json.dumps({"op": "compacted", "company": None, "seq": seq}).encode("utf-8") + b"\n"); f.flush(); os.fsync(f.fileno())
+
+def create_data_manager():
+    """STORAGE_BACKEND ayarına göre veri yöneticisini oluşturur."""
+    if STORAGE_BACKEND == "sqlite": return SQLiteDataManager()
+    if STORAGE_BACKEND == "sharded": return ShardedDataManager()
+    if STORAGE_BACKEND == "shared": return SharedDataManager()
+    return DataManager()
+
+# =============================================================================
+# DEFTER İŞLEMLERİ (ARAYÜZDEN BAĞIMSIZ)
+# =============================================================================
+class LedgerError(ValueError):
+    """Geçersiz defter girdisi (boş alan, hatalı tutar veya tarih)."""
+
+class ClockUnavailable(LedgerError):
+    """Tarihsiz bir kayıt için güvenilir saat alınamadı."""
+
+_DATE_INPUT_FORMATS = ("%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H:%M", "%d.%m.%Y", "%Y-%m-%d %H:%M")
+_THOUSANDS_GROUPED = re.compile(r"[-+]?[1-9]\d{0,2}(\.\d{3})+") # "1.234", "1.234.567": noktalar binlik ayırıcıdır
+
+def parse_amount(value):
+    """Sayıyı veya "12,5" / "1.234,56" / "1.234" gibi Türkçe yazılmış tutarı float'a çevirir (kuruşa çevirme to_kurus ile yapılır).
+
+    Virgül varsa ya da noktalar üçer basamaklı grupları ayırıyorsa noktalar
+    binlik ayırıcıdır; "12.5" gibi diğer yazımlarda nokta ondalık ayırıcıdır.
+    """
+    if isinstance(value, (int, float)): return float(value)
+    text = str(value).strip()
+    if "," in text or _THOUSANDS_GROUPED.fullmatch(text): text = text.replace(".", "").replace(",", ".")
+    try: return float(text)
+    except ValueError: raise LedgerError(f"Geçersiz sayı: {value!r}") from None
+
+def parse_tarih(value):
+    """datetime'ı veya desteklenen biçimlerdeki tarih metnini kayıt zaman damgasına çevirir."""
+    if isinstance(value, datetime): return datetime_to_ts(value)
+    text = str(value).strip()
+    try: return datetime_to_ts(datetime.fromisoformat(text))
+    except ValueError: pass
+    for fmt in _DATE_INPUT_FORMATS:
+        try: return datetime_to_ts(datetime.strptime(text, fmt))
+        except ValueError: pass
+    raise LedgerError(f"Geçersiz tarih: {value!r}")
+
+class Ledger:
+    """Müşteri defteri işlemlerinin arayüzden bağımsız API'si.
+
+    Alış ve ödeme kayıtlarının oluşturulup doğrulanması, "ödendi olarak
+    işaretleme", bakiye, toplu ekleme ve dönem kapanışı burada yapılır; CariApp ve komut
+    satırı içe aktarıcısı aynı kuralları kullanır. Tarihi verilmeyen kayıtlar
+    now fonksiyonunun (genellikle TrustedClock.now) döndürdüğü zamanla damgalanır.
+    Tarihi verilen kayıtlar kapanmış bir döneme düşemez.
+    """
+    def __init__(self, data_manager, now=None):
+        self.data_manager = data_manager
+        self.now = now
+
+    def timestamp(self, tarih=None):
+        if tarih is not None:
+            ts = parse_tarih(tarih)
+            try: self.data_manager.archive.check_open(ts)
+            except PeriodError as e: raise LedgerError(str(e)) from None
+            return ts
+        current_time = self.now() if self.now is not None else None
+        if current_time is None: raise ClockUnavailable("Güvenilir saat alınamadı.")
+        return datetime_to_ts(current_time)
+
+    def purchase(self, yem, adet, fiyat, tarih=None):
+        yem = str(yem or "").strip()
+        if not yem: raise LedgerError("Yem adı boş olamaz.")
+        adet_f, fiyat_k = parse_amount(adet), to_kurus(parse_amount(fiyat))
+        return Purchase(self.timestamp(tarih), yem, adet_f, fiyat_k, round_half_up(adet_f * fiyat_k))
+
+    def payment(self, tutar, aciklama=None, tarih=None):
+        return Payment(self.timestamp(tarih), str(aciklama or "").strip() or "Ödeme", to_kurus(parse_amount(tutar)))
+
+    def settlement(self, purchase_record, tarih=None):
+        """Bir alımı tutarı kadar bir ödemeyle kapatan kaydı oluşturur."""
+        if purchase_record.type != "purchase": raise LedgerError("Yalnızca alışlar ödendi olarak işaretlenebilir.")
+        return Payment(self.timestamp(tarih), f"'{purchase_record.yem}' alımı ödendi", purchase_record.toplam)
+
+    def carry_forward(self, bakiye, aciklama=None, tarih=None):
+        """Devir kaydı; bakiye pozitifse müşteri borçlu, negatifse alacaklıdır."""
+        return CarryForward(self.timestamp(tarih), str(aciklama or "").strip() or "Devir", to_kurus(parse_amount(bakiye)))
+
+    def close_period(self, label, now):
+        """label dönemini (ör. "2024" ya da "2024-03") kapatır; dönem now'dan önce bitmiş olmalıdır."""
+        end = period_bounds(label)[1]
+        if end > datetime_to_ts(now): raise PeriodError(f"'{label}' dönemi henüz bitmedi.")
+        return self.data_manager.close_period(label, end)
+
+    def add(self, company, record):
+        """Kaydı deftere ekler ve defterdeki konumunu döndürür."""
+        return self.data_manager.add_record(company, record)
+
+    def add_many(self, batches):
+        """{müşteri: kayıtlar} gruplarını tek işlem ve tek kayıtla ekler; eksik müşteriler oluşturulur."""
+        return self.data_manager.add_records_bulk(batches)
+
+    def balance(self, company):
+        return self.data_manager.get_balance(company)
+
+# =============================================================================
+# YEDEKLEME
+# =============================================================================
+class BackupError(Exception):
+    pass
+
+def ledger_chunks(records):
+    """Sıralı bir defteri (ay, kayıtlar) parçalarına böler; eski aylar değişmediği için yedekler arasında tekrar kullanılır."""
+    chunks = []
+    for record in records:
+        month = record.tarih[:7]
+        if not chunks or chunks[-1][0] != month: chunks.append((month, []))
+        chunks[-1][1].append(record)
+    return chunks
+
+class BackupStore:
+    """İçerik adresli, sıkıştırılmış ve tekrarsız artımlı yedek deposu.
+
+    Her müşterinin defteri aylık parçalara bölünür; her parça kanonik JSON'unun
+    SHA-256 özetiyle adlandırılıp zlib ile sıkıştırılarak objects/ altına bir kez
+    yazılır. Her yedek, snapshots/ altında hangi parçalardan oluştuğunu ve
+    sıkıştırılmış parçaların özetlerini tutan küçük bir manifesttir. Bu sayede
+    değişmeyen aylar yeniden yazılmaz, doğrulama ise açmadan yapılabilir.
+    """
+    def __init__(self, directory=BACKUP_DIR):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, "objects")
+        self.snapshots_dir = os.path.join(directory, "snapshots")
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def _snapshot_path(self, snapshot_id):
+        return os.path.join(self.snapshots_dir, snapshot_id + ".json")
+
+    def _known_blobs(self):
+        """En son yedeğin manifestindeki {içerik özeti: blob özeti} eşlemesi; yeniden kullanılan parçalar bununla denetlenir."""
+        snapshots = self.snapshots()
+        if not snapshots: return {}
+        try: manifest = self.load_manifest(snapshots[-1])
+        except Exception: return {}
+        return {entry["hash"]: entry["blob"] for entries in manifest["companies"].values() for entry in entries}
+
+    def _put_object(self, records, known_blobs=None):
+        """Parçayı depoya ekler (zaten varsa yazmaz); (içerik özeti, blob özeti, yeni mi) döndürür.
+
+        Var olan bir parça yeniden kullanılmadan önce denetlenir ki bozulmuş
+        bir parça yeni yedeklere taşınmasın. Blob özeti son yedekte kayıtlıysa
+        yalnızca sıkıştırılmış dosyanın özeti karşılaştırılır; parçayı açarak
+        yapılan derin denetim verify(deep=True) komutuna bırakılır.
+        """
+        raw = json.dumps(records, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=json_default).encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            with open(path, "rb") as f: blob = f.read()
+            blob_digest, expected = hashlib.sha256(blob).hexdigest(), (known_blobs or {}).get(digest)
+            if expected is not None:
+                if blob_digest == expected: return digest, blob_digest, False
+            else:
+                try:
+                    if hashlib.sha256(zlib.decompress(blob)).digest() == bytes.fromhex(digest): return digest, blob_digest, False
+                except zlib.error: pass
+        blob = zlib.compress(raw, BACKUP_COMPRESS_LEVEL)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_file = path + ".tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(blob); f.flush(); os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+        return digest, hashlib.sha256(blob).hexdigest(), True
+
+    def _read_object(self, digest):
+        with open(self._object_path(digest), "rb") as f: raw = zlib.decompress(f.read())
+        if hashlib.sha256(raw).hexdigest() != digest: raise BackupError(f"Bozuk yedek parçası: {digest}")
+        return json.loads(raw.decode("utf-8"))
+
+    @perf.timed("backup_data")
+    def create(self, reader, companies, is_cancelled=None):
+        """Verilen okuyucudaki müşterilerin yedeğini alır; (yedek kimliği, yeni parça sayısı, toplam parça sayısı) döndürür."""
+        manifest = {"created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "companies": {}}
+        new_objects = total_objects = 0
+        known_blobs = self._known_blobs()
+        for company in companies:
+            if is_cancelled is not None and is_cancelled(): raise BackupError("Yedekleme iptal edildi.")
+            entries = []
+            for month, records in ledger_chunks(reader.iter_records(company)):
+                digest, blob_digest, created = self._put_object(records, known_blobs)
+                entries.append({"month": month, "hash": digest, "blob": blob_digest, "count": len(records)})
+                new_objects += created; total_objects += 1
+            manifest["companies"][company] = entries
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        snapshot_id = base_id = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        suffix = 1
+        while os.path.exists(self._snapshot_path(snapshot_id)):
+            snapshot_id = f"{base_id}_{suffix}"; suffix += 1
+        write_json_atomic(self._snapshot_path(snapshot_id), manifest)
+        return snapshot_id, new_objects, total_objects
+
+    def snapshots(self):
+        """Yedek kimliklerini eskiden yeniye sıralı döndürür."""
+        if not os.path.isdir(self.snapshots_dir): return []
+        return sorted(name[:-5] for name in os.listdir(self.snapshots_dir) if name.endswith(".json"))
+
+    def load_manifest(self, snapshot_id):
+        path = self._snapshot_path(snapshot_id)
+        if not os.path.exists(path): raise BackupError(f"Yedek bulunamadı: {snapshot_id}")
+        return read_json(path)
+
+    def restore(self, snapshot_id):
+        """Yedeği data.json biçiminde {müşteri: kayıtlar} sözlüğü olarak yeniden kurar."""
+        manifest = self.load_manifest(snapshot_id)
+        companies = {}
+        for company, entries in manifest["companies"].items():
+            records = companies[company] = []
+            for entry in entries: records.extend(self._read_object(entry["hash"]))
+        return companies
+
+    def restore_to_file(self, snapshot_id, target):
+        write_json_atomic(target, self.restore(snapshot_id))
+
+    def verify(self, snapshot_id=None, deep=False):
+        """Yedek(ler)in bütünlüğünü denetler ve hata listesi döndürür.
+
+        Varsayılan olarak her parçanın sıkıştırılmış halinin özeti manifestle
+        karşılaştırılır (açmadan); deep=True ise içerik de açılıp denetlenir.
+        """
+        errors = []
+        for sid in ([snapshot_id] if snapshot_id else self.snapshots()):
+            try: manifest = self.load_manifest(sid)
+            except Exception as e: errors.append(f"{sid}: manifest okunamadı ({e})"); continue
+            for company, entries in manifest["companies"].items():
+                for entry in entries:
+                    path = self._object_path(entry["hash"])
+                    try:
+                        with open(path, "rb") as f: blob = f.read()
+                        if hashlib.sha256(blob).hexdigest() != entry["blob"]: errors.append(f"{sid}: {company} {entry['month']} parçası bozuk"); continue
+                        if deep and len(self._read_object(entry["hash"])) != entry["count"]: errors.append(f"{sid}: {company} {entry['month']} kayıt sayısı uyuşmuyor")
+                    except FileNotFoundError: errors.append(f"{sid}: {company} {entry['month']} parçası eksik")
+                    except Exception as e: errors.append(f"{sid}: {company} {entry['month']} okunamadı ({e})")
+        return errors
+
+    def apply_retention(self, hourly=BACKUP_KEEP_HOURLY, daily=BACKUP_KEEP_DAILY, monthly=BACKUP_KEEP_MONTHLY):
+        """Saatlik/günlük/aylık saklama kurallarına göre eski yedekleri ve artık kullanılmayan parçaları siler."""
+        snapshots = self.snapshots()[::-1]
+        keep = set(snapshots[:1])  # En yeni yedek her zaman saklanır
+        for width, count in ((13, hourly), (10, daily), (7, monthly)):  # "YYYY-MM-DD_HH", "YYYY-MM-DD", "YYYY-MM"
+            periods = set()
+            for sid in snapshots:
+                period = sid[:width]
+                if period in periods: continue
+                if len(periods) >= count: break
+                periods.add(period); keep.add(sid)
+        removed = [sid for sid in snapshots if sid not in keep]
+        for sid in removed: os.remove(self._snapshot_path(sid))
+        return removed, self.collect_garbage()
+
+    def collect_garbage(self):
+        """Hiçbir yedeğin başvurmadığı parçaları siler ve silinen parça sayısını döndürür."""
+        referenced = set()
+        for sid in self.snapshots():
+            for entries in self.load_manifest(sid)["companies"].values(): referenced.update(entry["hash"] for entry in entries)
+        removed = 0
+        if not os.path.isdir(self.objects_dir): return removed
+        for prefix in os.listdir(self.objects_dir):
+            for name in os.listdir(os.path.join(self.objects_dir, prefix)):
+                if prefix + name not in referenced:
+                    os.remove(os.path.join(self.objects_dir, prefix, name)); removed += 1
+        return removed
+
+class BackupWorker(QThread):
+    """Yedeği ve saklama temizliğini arka plan iş parçacığında yapar."""
+    finished_backup = pyqtSignal(bool, str)
+
+    def __init__(self, store, reader, companies, parent=None):
+        super().__init__(parent)
+        self.store, self.reader, self.companies = store, reader, companies
+
+    def run(self):
+        try:
+            snapshot_id, new_objects, total_objects = self.store.create(self.reader, self.companies, self.isInterruptionRequested)
+            self.store.apply_retention()
+            self.finished_backup.emit(True, f"Yedek alındı: {snapshot_id} ({new_objects}/{total_objects} parça yeni)")
+        except Exception as e:
+            self.finished_backup.emit(False, f"Yedekleme başarısız: {e}")
+        finally:
+            self.reader.close()
 
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import padding
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-                             QLineEdit, QLabel, QListWidget, QTableWidget, QTableWidgetItem, QHeaderView,
-                             QAbstractItemView, QMenu, QDialog, QDialogButtonBox, QMessageBox, QFileDialog,
-                             QStyle, QInputDialog, QStatusBar)
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QDoubleValidator
-import openpyxl
+# =============================================================================
+# İŞLEM TABLOSU MODELİ
+# =============================================================================
+class RecordTableModel(QAbstractTableModel):
+    """Müşteri defterini doğrudan veri yöneticisindeki listeden okuyan tablo modeli.
 
-# --- Ayarlar ve Sabitler ---
-__version__ = "1.2.0" # Versiyon güncellendi
-DATA_FILE = "data.json"
-BACKUP_DIR = "backups"
-APP_CONFIG_DIR = os.path.join(os.getenv('APPDATA'), 'YemciApp')
-SECURE_LICENSE_FILE = os.path.join(APP_CONFIG_DIR, 'license.bin')
-ACTIVATION_HISTORY_FILE = os.path.join(APP_CONFIG_DIR, 'activation.hist')
+    Hücreler yalnızca görünür satırlar için, istendiği anda üretilir. Defter
+    her zaman artan tarih sırasındadır; azalan görünümde satırlar yalnızca
+    ters eşlenir, liste yeniden sıralanmaz. Ekleme, düzenleme ve silme
+    işlemleri satır düzeyinde bildirilir (tarihi değişen kayıt satır olarak
+    taşınır); tam sıfırlama yalnızca başka bir müşteri seçildiğinde yapılır.
+    Görünüm kayıtlara satır numarasıyla değil record_id ile başvurur.
+    """
+    HEADERS = ["Tür", "Açıklama / Yem Adı", "Adet", "Birim Fiyat", "Toplam", "Tarih"]
+    _RIGHT_ALIGNED = (2, 3, 4)
 
-PUBLIC_KEY_PEM = """-----BEGIN PUBLIC KEY-----
-MIIBIjANBgkqhkiGOWBAQEFAAOCAQ8AMIIBCgKCAQEAn5YFTK5h/miQOwVBvTAt
-T2IX4SNBQgqJ1/lMlaJH7K2AoSuEYFqIgGB2EopPAKbxnI38I402EUxpJifopFIE
-ExttIaWT5CHyGd4SNohZGyshkmudkbwVHq5Zw5eHtcQS9MCnB73E5q8DQKVYyxDf
-JtcHcsr2dY7kUsUEvrOVjZkqYQm8ndl0jxvHZmw8zkuinUNs0QbNH46mm6cVEEGH
-lBmoBvi4ptzUeINeKPzkoBn+VdnPgXqFfBvBIWoGmq0gnFaJNHmFh1yp9ZBSX+2G
-q7apupXnpSEt46yjoP4C3YZAn9DQW8GiyY0/XJVfEiIPTsR7pe2MHQ2q6aNxZpzK
-oQIDAQAB
------END PUBLIC KEY-----
-"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._records = []
+        self._descending = True
+        self._payment_brush = QBrush(Qt.red)
+        self._carry_font = QFont(); self._carry_font.setBold(True)
+
+    def set_records(self, records):
+        self.beginResetModel()
+        self._records = records
+        self.endResetModel()
+
+    def set_descending(self, descending):
+        if descending == self._descending: return
+        self.layoutAboutToBeChanged.emit()
+        self._descending = descending
+        self.layoutChanged.emit()
+
+    def list_index(self, row):
+        """Görünümdeki satırın defter listesindeki konumu."""
+        return len(self._records) - 1 - row if self._descending else row
+
+    def record_id(self, row):
+        """Görünümdeki satırdaki kaydın kimliği."""
+        return self._records[self.list_index(row)].id
+
+    def _view_row(self, index, length):
+        return length - 1 - index if self._descending else index
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._records)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal: return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        rec = self._records[self.list_index(index.row())]
+        if role == Qt.DisplayRole:
+            column = index.column()
+            if column == 5: return rec.tarih
+            if rec.type == "purchase": return ("Alış", rec.yem, f"{rec.adet}", format_kurus(rec.fiyat), format_kurus(rec.toplam))[column]
+            if rec.type == "carry": return ("Devir", rec.aciklama, "", "", format_kurus(rec.bakiye))[column]
+            return ("Ödeme", rec.aciklama, "", "", format_kurus(-rec.tutar))[column]
+        if role == Qt.TextAlignmentRole and index.column() in self._RIGHT_ALIGNED: return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role == Qt.ForegroundRole and rec.type == "payment": return self._payment_brush
+        if role == Qt.FontRole and rec.type == "carry": return self._carry_font
+        return None
+
+    # --- Satır düzeyinde değişiklik bildirimleri (konumlar defter listesindeki konumlardır) ---
+    # apply_change hata verirse bildirim yine kapatılır; çağıran taraf tabloyu yeniden yükler.
+    def insert_record(self, index, apply_change):
+        row = self._view_row(index, len(self._records) + 1)
+        self.beginInsertRows(QModelIndex(), row, row)
+        try: apply_change()
+        finally: self.endInsertRows()
+
+    def remove_record(self, index, apply_change):
+        row = self._view_row(index, len(self._records))
+        self.beginRemoveRows(QModelIndex(), row, row)
+        try: apply_change()
+        finally: self.endRemoveRows()
+
+    def move_record(self, index, new_index, apply_change):
+        """Düzenlenen kaydı bildirir: konumu değiştiyse satır taşınır, ardından satır yeniden çizilir."""
+        length = len(self._records)
+        row, new_row = self._view_row(index, length), self._view_row(new_index, length)
+        if row == new_row: apply_change()
+        else:
+            # beginMoveRows hedefi taşımadan önceki satır numarasıdır; aşağı taşımada bir fazlası verilir.
+            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), new_row + 1 if new_row > row else new_row)
+            try: apply_change()
+            finally: self.endMoveRows()
+        self.dataChanged.emit(self.index(new_row, 0), self.index(new_row, len(self.HEADERS) - 1))
 
 # =============================================================================
-# GÜVENLİK VE DONANIM FONKSİYONLARI
+# MÜŞTERİ LİSTESİ VE ARAMA
 # =============================================================================
-class SecureDataManager:
-    def __init__(self, file_path):
-        self.file_path = file_path
-        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
-    def write_data(self, data):
-        try:
-            encrypted_data = win32crypt.CryptProtectData(data.encode('utf-8'), None, None, None, None, 0)
-            with open(self.file_path, 'wb') as f: f.write(encrypted_data)
-            return True
-        except Exception: return False
-    def read_data(self):
-        if not os.path.exists(self.file_path): return None
-        try:
-            with open(self.file_path, 'rb') as f: encrypted_data = f.read()
-            _, decrypted_data = win32crypt.CryptUnprotectData(encrypted_data, None, None, None, 0)
-            return decrypted_data.decode('utf-8')
-        except Exception: return None
-    def delete_file(self):
-        if os.path.exists(self.file_path): os.remove(self.file_path)
+_TURKISH_CASEFOLD_MAP = str.maketrans({"İ": "i", "I": "ı"})
 
-def get_machine_id():
+def turkish_casefold(text):
+    """Türkçe kurallarına göre küçük harfe çevirir (İ -> i, I -> ı)."""
+    return unicodedata.normalize("NFC", text.translate(_TURKISH_CASEFOLD_MAP).lower())
+
+class CompanySearchIndex:
+    """Müşteri adları üzerinde Türkçe duyarlı alt dizi arama dizini.
+
+    Adlar katlanmış halleriyle 3-gram'lara bölünür; en az üç karakterlik bir
+    sorgunun adayları bu 3-gram kümelerinin kesişimidir. Daha kısa sorguların
+    sonuçları ilk kullanımda hesaplanıp saklanır ve ekleme/silmede güncellenir.
+    Kullanıcı önceki sorguya karakter ekledikçe arama önceki sonuç kümesi
+    içinde daraltılır. Dizin, açılışı yavaşlatmamak için ilk aramada kurulur.
+    search() None dönerse filtre yok (tüm müşteriler) demektir.
+    """
+    GRAM_SIZE = 3
+
+    def __init__(self, names=()):
+        self._folded = {}
+        self._grams = defaultdict(set)
+        self._short_results = {}
+        self._last_query, self._last_result = None, None
+        self._pending = list(names)
+
+    def _build_pending(self):
+        pending, self._pending = self._pending, []
+        for name in pending: self.add(name)
+
+    def _name_grams(self, folded):
+        return {folded[i:i + self.GRAM_SIZE] for i in range(len(folded) - self.GRAM_SIZE + 1)}
+
+    def add(self, name):
+        folded = self._folded[name] = turkish_casefold(name)
+        grams = self._grams
+        for gram in self._name_grams(folded): grams[gram].add(name)
+        for query, names in self._short_results.items():
+            if query in folded: names.add(name)
+        self._last_query = None
+
+    def remove(self, name):
+        self._build_pending()
+        folded = self._folded.pop(name, None)
+        if folded is None: return
+        for gram in self._name_grams(folded):
+            names = self._grams.get(gram)
+            if names is not None:
+                names.discard(name)
+                if not names: del self._grams[gram]
+        for names in self._short_results.values(): names.discard(name)
+        self._last_query = None
+
+    def search(self, query):
+        query = turkish_casefold(query.strip())
+        if not query: self._last_query = None; return None
+        if self._pending: self._build_pending()
+        folded = self._folded
+        if len(query) < self.GRAM_SIZE:
+            result = self._short_results.get(query)
+            if result is None: result = self._short_results[query] = {name for name, f in folded.items() if query in f}
+        elif len(query) == self.GRAM_SIZE: result = set(self._grams.get(query, ()))  # Tek 3-gram'lık sorgunun kümesi doğrulama gerektirmez
+        else:
+            if self._last_query is not None and self._last_query in query: candidates = self._last_result
+            else:
+                gram_sets = sorted((self._grams.get(gram, ()) for gram in self._name_grams(query)), key=len)
+                candidates = set(gram_sets[0]).intersection(*gram_sets[1:])
+            result = {name for name in candidates if query in folded[name]}
+        self._last_query, self._last_result = query, result
+        return result
+
+def feed_key(name):
+    """Yem adının karşılaştırma anahtarı: Türkçe küçük harf, tek boşluklu."""
+    return " ".join(turkish_casefold(name).split())
+
+class FeedIndex:
+    """Tüm defterlerdeki yem adlarının dizini (yem adı tamamlama ve son fiyat önerisi).
+
+    Büyük/küçük harf ve boşluk farkı olan yazımlar tek yem sayılır ve ilk
+    görülen yazımla önerilir. Her yem için kullanım sayısı ve en son kesilen
+    fiyat, her müşteri için de o yeme en son kesilen fiyat tutulur. Dizin
+    kayıt eklendikçe/silindikçe güncellenir; silinen bir alış kullanım
+    sayısından düşülür, ancak son fiyatı geri almaz. Aramanın maliyeti kayıt
+    sayısıyla değil farklı yem adı sayısıyla orantılıdır; kullanım sırası
+    yalnızca sayılar değiştikten sonraki ilk aramada yeniden sıralanır.
+    """
+    def __init__(self):
+        self._feeds = {}  # anahtar -> [ad, kullanım sayısı, son zaman damgası, son fiyat (kuruş)]
+        self._customer_prices = defaultdict(dict)  # müşteri -> {anahtar: (zaman damgası, fiyat)}
+        self._ranked = None  # Kullanım sayısına göre sıralı anahtarlar
+
+    def add(self, company, record):
+        if record.type != "purchase": return
+        key = feed_key(record.yem)
+        feed = self._feeds.get(key)
+        if feed is None: feed = self._feeds[key] = [" ".join(record.yem.split()), 0, None, None]
+        feed[1] += 1; self._ranked = None
+        if feed[2] is None or record.ts >= feed[2]: feed[2], feed[3] = record.ts, record.fiyat
+        prices = self._customer_prices[company]
+        last = prices.get(key)
+        if last is None or record.ts >= last[0]: prices[key] = (record.ts, record.fiyat)
+
+    def add_many(self, company, records):
+        for rec in records: self.add(company, rec)
+
+    def add_summary(self, summary):
+        """Kapanmış bir dönemin özetindeki (period_summary) yem kullanım sayılarını ve son fiyatları ekler.
+        Özette müşteri başına fiyat tutulmaz; yalnızca kapanmış dönemlerde alınan yemlere genel son fiyat önerilir."""
+        for name, (_, _, count) in summary["feeds"].items():
+            feed = self._feeds.setdefault(feed_key(name), [" ".join(name.split()), 0, None, None])
+            feed[1] += count; self._ranked = None
+        for name, (ts, fiyat) in summary.get("prices", {}).items():  # Eski arşivlerin özetlerinde fiyat yoktur
+            feed = self._feeds[feed_key(name)]
+            if feed[2] is None or ts >= feed[2]: feed[2], feed[3] = ts, fiyat
+
+    def remove(self, company, record):
+        if record.type != "purchase": return
+        key = feed_key(record.yem)
+        feed = self._feeds.get(key)
+        if feed is None: return
+        feed[1] -= 1; self._ranked = None
+        if feed[1] <= 0: del self._feeds[key]  # Yanlış yazılıp düzeltilen adlar öneriden düşer
+
+    def forget_company(self, company, records=()):
+        """Müşterinin verilen alışlarını kullanım sayılarından düşer ve müşteriye özel fiyatlarını bırakır."""
+        for rec in records: self.remove(company, rec)
+        self._customer_prices.pop(company, None)
+
+    def canonical(self, name):
+        """Ad bilinen bir yemse dizindeki yazımı, değilse fazla boşlukları atılmış halini döndürür."""
+        feed = self._feeds.get(feed_key(name))
+        return feed[0] if feed is not None else " ".join(name.split())
+
+    def last_prices(self, name, company=None):
+        """(bu müşteriye son fiyat, genel son fiyat) kuruş olarak; bilinmeyenler None."""
+        key = feed_key(name)
+        feed, customer = self._feeds.get(key), self._customer_prices.get(company, {}).get(key)
+        return (customer[1] if customer is not None else None), (feed[3] if feed is not None else None)
+
+    def search(self, text, company=None, limit=FEED_SUGGESTIONS):
+        """Metni içeren yem adları: önce müşterinin aldığı, sonra metinle başlayan yemler; her grupta en çok kullanılan önce."""
+        query = feed_key(text)
+        if self._ranked is None: self._ranked = sorted(self._feeds, key=lambda key: -self._feeds[key][1])
+        bought = self._customer_prices.get(company, {})
+        matches = sorted((key for key in self._ranked if query in key), key=lambda key: (key not in bought, not key.startswith(query)))
+        return [self._feeds[key][0] for key in matches[:limit]]
+
+@perf.timed("feed_index_build")
+def build_feed_index(job):
+    """begin_feed_index'in işinden dizini kurar (başka bir iş parçacığında çalışabilir); (dizin, müşteri başına okunan alışlar) döner."""
+    _, periods, names, reader = job
+    index, purchases = FeedIndex(), {}
     try:
-        c = wmi.WMI()
-        for board in c.Win32_BaseBoard():
-            serial = board.SerialNumber.strip()
-            if serial and "none" not in serial.lower(): return serial
-        for processor in c.Win32_Processor():
-            return processor.ProcessorId.strip()
-    except Exception: pass
-    return "UNKNOWN_MACHINE_ID"
+        for period in periods: index.add_summary(period["summary"])
+        for name in names:
+            records = purchases[name] = [rec for rec in reader.iter_records(name) if rec.type == "purchase"]
+            index.add_many(name, records)
+    finally: reader.close()
+    return index, purchases
+
+class FeedIndexWorker(QThread):
+    """Yem adı dizinini açılıştan sonra arka plan iş parçacığında kurar."""
+    finished_index = pyqtSignal(object, str)
+
+    def __init__(self, data_manager, parent=None):
+        super().__init__(parent)
+        self.job = data_manager.begin_feed_index()
+        self.elapsed = 0.0
+
+    def run(self):
+        started = time.perf_counter()
+        try: built, error = build_feed_index(self.job), ""
+        except Exception as e: built, error = None, f"Yem dizini kurulamadı: {e}"
+        self.elapsed = time.perf_counter() - started
+        self.finished_index.emit(built, error)
+
+class CompanyListModel(QAbstractListModel):
+    """Arama dizininin bulduğu müşterileri ada veya bakiyeye göre sıralı gösteren liste modeli.
+
+    Her müşterinin sıralama anahtarı (Türkçe küçük harfli ad ya da eksi
+    bakiye) saklanır ve tüm müşteriler anahtar sırasıyla tutulur. Görünen
+    satırlar eşleşme kümesinden kurulur: küçük kümeler sıra numarasına göre
+    sıralanır, büyük kümeler sıralı listeden süzülür; küme değişmediyse liste
+    yeniden kurulmaz. Kısa sorguların kümeleri arama dizininde saklandığından
+    bu kümelerin satırları da saklanır (geri silerken yeniden kullanılır). Bakiyesi değişen müşteri, bakiye sıralamasında yalnızca
+    kendi satırını taşır.
+    """
+    NAME_ROLE = Qt.UserRole
+    BALANCE_ROLE = Qt.UserRole + 1
+
+    def __init__(self, data_manager, parent=None):
+        super().__init__(parent)
+        self.data_manager = data_manager
+        self.by_balance = False
+        self._keys = {}  # Müşteri -> sıralama anahtarı
+        self._all = []  # Tüm müşteriler, anahtar sırasıyla
+        self._rank = None  # Müşteri -> _all'daki sırası; liste değişince bir sonraki süzmede yeniden kurulur
+        self._memo = {}  # id(eşleşme kümesi) -> (küme, satırlar); liste ya da sıralama değişince boşaltılır
+        self._names = []  # Görünen satırlar, anahtar sırasıyla
+        self._matches, self._stale = None, True  # Gösterilen eşleşme kümesi (None: tümü); _stale ise yeniden kurulur
+
+    def _sort_key(self, name):
+        folded = turkish_casefold(name)
+        return (-self.data_manager.get_balance(name), folded, name) if self.by_balance else (folded, name)
+
+    def _position(self, names, key):
+        """Anahtar sıralı names listesinde key'in ikili aramayla bulunan yeri (bisect_left)."""
+        keys, low, high = self._keys, 0, len(names)
+        while low < high:
+            middle = (low + high) // 2
+            if keys[names[middle]] < key: low = middle + 1
+            else: high = middle
+        return low
+
+    def reload(self):
+        self._keys = {name: self._sort_key(name) for name in self.data_manager.company_names()}
+        self._all, self._stale = sorted(self._keys, key=self._keys.__getitem__), True
+        self._invalidate()
+        self.set_matches(self._matches)
+
+    def _invalidate(self):
+        """Sıra numaralarını ve saklanan satırları bırakır (müşteri eklenince, silinince ya da yer değiştirince)."""
+        self._rank = None; self._memo.clear()
+
+    def set_sort(self, by_balance):
+        """Sıralamayı değiştirir; değiştiyse True döner."""
+        if by_balance == self.by_balance: return False
+        self.by_balance = by_balance
+        self.reload()
+        return True
+
+    def set_matches(self, matches):
+        """Görünen satırları eşleşme kümesinden (None: tüm müşteriler) kurar; satırlar değiştiyse True döner."""
+        if not self._stale and (matches is self._matches or (matches is not None and self._matches is not None and matches == self._matches)): return False
+        self.beginResetModel()
+        memo = self._memo.get(id(matches))
+        if matches is None: self._names = list(self._all)
+        elif memo is not None and memo[0] is matches: self._names = memo[1]
+        else:
+            if len(matches) * 8 > len(self._all): names = [name for name in self._all if name in matches]
+            else:
+                if self._rank is None: self._rank = {name: rank for rank, name in enumerate(self._all)}
+                rank = self._rank
+                names = sorted((name for name in matches if name in rank), key=rank.__getitem__)
+            if len(self._memo) >= 16: self._memo.clear()
+            self._memo[id(matches)] = (matches, names)
+            self._names = names
+        self._matches, self._stale = matches, False
+        self.endResetModel()
+        return True
+
+    def name_at(self, row):
+        return self._names[row]
+
+    def row_of(self, name):
+        """Müşterinin görünen satırı; gösterilmiyorsa None."""
+        key = self._keys.get(name)
+        if key is None: return None
+        row = self._position(self._names, key)
+        return row if row < len(self._names) and self._names[row] == name else None
+
+    def has_company(self, name):
+        return name in self._keys
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._names)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        name = self._names[index.row()]
+        if role == Qt.DisplayRole: return f"{name}  ({self.data_manager.get_balance(name):.2f} TL)"
+        if role == self.NAME_ROLE: return name
+        if role == self.BALANCE_ROLE: return self.data_manager.get_balance(name)
+        return None
+
+    def add_company(self, name):
+        """Müşteriyi ekler; filtre varsa satır bir sonraki set_matches'te (eşleşiyorsa) görünür."""
+        if name in self._keys: return
+        key = self._keys[name] = self._sort_key(name)
+        self._all.insert(self._position(self._all, key), name); self._invalidate()
+        if self._matches is not None: self._stale = True; return
+        row = self._position(self._names, key)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._names.insert(row, name)
+        self.endInsertRows()
+
+    def remove_company(self, name):
+        key = self._keys.get(name)
+        if key is None: return
+        row = self.row_of(name)
+        del self._all[self._position(self._all, key)], self._keys[name]
+        self._invalidate()
+        if row is None: return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._names[row]
+        self.endRemoveRows()
+
+    def company_changed(self, name):
+        key = self._keys.get(name)
+        if key is None: return
+        row, new_key = self.row_of(name), self._sort_key(name)
+        if new_key != key:  # Bakiye sıralamasında bakiye değişti; yeni yerler taşımadan önceki satır numaralarıyla bulunur
+            position, target = self._position(self._all, key), self._position(self._all, new_key)
+            target_row = self._position(self._names, new_key) if row is not None else None
+            self._keys[name] = new_key; self._invalidate()
+            del self._all[position]
+            self._all.insert(target if target <= position else target - 1, name)
+            if row is not None and target_row not in (row, row + 1):
+                self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), target_row)
+                del self._names[row]
+                row = target_row if target_row < row else target_row - 1
+                self._names.insert(row, name)
+                self.endMoveRows()
+        if row is not None: self.dataChanged.emit(self.index(row), self.index(row))
 
 # =============================================================================
-# VERİ YÖNETİM SINIFI (JSON)
+# EXCEL DIŞA AKTARMA
 # =============================================================================
-class DataManager:
-    def __init__(self, filename=DATA_FILE):
-        self.filename = filename
-        self.companies = self.load_data()
-    def load_data(self):
-        if not os.path.exists(self.filename): return {}
+EXCEL_HEADERS = ["Tür", "Açıklama / Yem Adı", "Adet", "Birim Fiyat (TL)", "Toplam (TL)", "Tarih"]
+_INVALID_SHEET_CHARS = str.maketrans({c: "_" for c in "[]:*?/\\"})
+_INVALID_FILENAME_CHARS = str.maketrans({c: "_" for c in '<>:"/\\|?*'})
+
+def record_to_excel_row(record):
+    if record.type == "purchase": return ["Alış", record.yem, record.adet, record.fiyat / 100, record.toplam / 100, record.tarih]
+    if record.type == "carry": return ["Devir", record.aciklama, "", "", record.bakiye / 100, record.tarih]
+    return ["Ödeme", record.aciklama, "", "", -record.tutar / 100, record.tarih]
+
+def unique_sheet_title(name, used_titles):
+    """Excel'in sayfa adı kurallarına (en fazla 31 karakter, bazı karakterler yasak, benzersiz) uyan bir ad üretir."""
+    base = name.translate(_INVALID_SHEET_CHARS)[:31] or "Sayfa"
+    title, n = base, 1
+    while title.lower() in used_titles:
+        n += 1; suffix = f" ({n})"
+        title = base[:31 - len(suffix)] + suffix
+    used_titles.add(title.lower())
+    return title
+
+def statement_filename(company):
+    return f"{company.translate(_INVALID_FILENAME_CHARS)}_hesap_dokumu.xlsx"
+
+class ExportCancelled(Exception):
+    pass
+
+@perf.timed("export_to_excel")
+def export_statements(reader, jobs, target, one_file_per_company=False, progress=None, is_cancelled=None):
+    """Müşteri hesap dökümlerini openpyxl'in akış (write-only) kipinde yazar.
+
+    jobs (müşteri, bakiye) çiftleridir. Kayıtlar okuyucudan satır satır akıtılır,
+    bu yüzden bellek kullanımı veri boyutundan bağımsızdır. target, tek dosya
+    kipinde .xlsx yolu, müşteri başına dosya kipinde bir klasördür. İptal
+    edilirse ExportCancelled fırlatılır. Yazılan dosyaların listesini döndürür.
+    """
+    def check_cancel():
+        if is_cancelled is not None and is_cancelled(): raise ExportCancelled()
+    import openpyxl
+    written, used_titles = [], set()
+    wb = None if one_file_per_company else openpyxl.Workbook(write_only=True)
+    for i, (company, balance) in enumerate(jobs):
+        check_cancel()
+        if progress is not None: progress(i, company)
+        if one_file_per_company: wb, used_titles = openpyxl.Workbook(write_only=True), set()
+        ws = wb.create_sheet(unique_sheet_title(company, used_titles))
+        ws.append(EXCEL_HEADERS)
+        for n, record in enumerate(reader.iter_records(company)):
+            if n % 1000 == 999: check_cancel()
+            ws.append(record_to_excel_row(record))
+        ws.append([]); ws.append(["", "", "", "TOPLAM BAKİYE:", balance])
+        if one_file_per_company:
+            path = os.path.join(target, statement_filename(company))
+            wb.save(path); written.append(path)
+    if not one_file_per_company:
+        check_cancel()
+        wb.save(target); written.append(target)
+    if progress is not None: progress(len(jobs), "")
+    return written
+
+class ExportWorker(QThread):
+    """export_statements'ı arka plan iş parçacığında çalıştırır."""
+    progress = pyqtSignal(int, str)
+    finished_export = pyqtSignal(bool, str)
+
+    def __init__(self, reader, jobs, target, one_file_per_company=False, parent=None):
+        super().__init__(parent)
+        self.reader, self.jobs, self.target, self.one_file_per_company = reader, jobs, target, one_file_per_company
+        self.cancelled = False
+
+    def run(self):
         try:
-            with open(self.filename, "r", encoding="utf-8") as f: data = json.load(f)
-            return data
-        except Exception: return {}
-    def save_data(self):
+            written = export_statements(self.reader, self.jobs, self.target, self.one_file_per_company,
+                                        progress=self.progress.emit, is_cancelled=self.isInterruptionRequested)
+            self.finished_export.emit(True, f"{len(written)} dosya oluşturuldu.")
+        except ExportCancelled:
+            self.cancelled = True
+            self.finished_export.emit(False, "Dışa aktarma iptal edildi.")
+        except Exception as e:
+            self.finished_export.emit(False, f"Excel dosyası oluşturulurken bir hata oluştu: {e}")
+        finally:
+            self.reader.close()
+
+# =============================================================================
+# TOPLU İÇE AKTARMA
+# =============================================================================
+# Sütun başlıkları (Türkçe küçük harfe çevrilmiş) -> alan adı; programın kendi Excel dökümü de okunabilir.
+IMPORT_COLUMNS = {turkish_casefold(header): field for header, field in {
+    "Müşteri": "company", "Tür": "type", "Açıklama / Yem Adı": "description", "Yem": "yem", "Yem Adı": "yem",
+    "Açıklama": "aciklama", "Adet": "adet", "Birim Fiyat (TL)": "fiyat", "Birim Fiyat": "fiyat", "Fiyat": "fiyat",
+    "Toplam (TL)": "toplam", "Toplam": "toplam", "Tutar": "tutar", "Tarih": "tarih"}.items()}
+IMPORT_TYPES = {turkish_casefold(name): record_type for name, record_type in {
+    "Alış": "purchase", "Alis": "purchase", "Alım": "purchase", "purchase": "purchase",
+    "Ödeme": "payment", "Odeme": "payment", "payment": "payment", "Devir": "carry", "carry": "carry"}.items()}
+
+def iter_import_tables(path):
+    """Dosyadaki tabloları (varsayılan müşteri, satırlar) olarak akıtır; satırlar (satır no, değerler) çiftleridir.
+
+    CSV tek bir tablodur (ayraç , ; veya sekme olabilir). Excel dosyası
+    openpyxl'in salt okunur kipinde açılır ve her sayfa, adı varsayılan
+    müşteri olan ayrı bir tablodur.
+    """
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        import openpyxl
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
         try:
-            with open(self.filename, "w", encoding="utf-8") as f:
-                json.dump(self.companies, f, ensure_ascii=False, indent=4)
-        except Exception: pass
-    def backup_data(self):
-        if not os.path.exists(BACKUP_DIR): os.makedirs(BACKUP_DIR)
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        backup_file = os.path.join(BACKUP_DIR, f"data_backup_{timestamp}.json")
+            for ws in wb.worksheets: yield ws.title, enumerate(ws.iter_rows(values_only=True), 1)
+        finally: wb.close()
+        return
+    import csv
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(4096); f.seek(0)
+        try: dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error: dialect = csv.excel
+        yield None, enumerate(csv.reader(f, dialect), 1)
+
+def import_row_to_record(ledger, row):
+    """Alan adı -> değer sözlüğünden kayıt üretir; tür boşsa (boş/dip toplam satırı) None döndürür."""
+    type_text = row.get("type")
+    if type_text in (None, ""): return None
+    record_type = IMPORT_TYPES.get(turkish_casefold(str(type_text).strip()))
+    if record_type is None: raise LedgerError(f"Bilinmeyen işlem türü: {type_text!r}")
+    if row.get("tarih") in (None, ""): raise LedgerError("Tarih eksik.")
+    if record_type == "purchase":
+        return ledger.purchase(row.get("yem") or row.get("description"), row.get("adet"), row.get("fiyat"), row["tarih"])
+    if record_type == "carry": return ledger.carry_forward(row.get("toplam") or 0, row.get("aciklama") or row.get("description"), row["tarih"])
+    tutar = row.get("tutar")
+    if tutar in (None, ""): tutar = abs(parse_amount(row.get("toplam") or ""))  # Dökümde ödemeler eksi toplamla yazılır
+    return ledger.payment(tutar, row.get("aciklama") or row.get("description"), row["tarih"])
+
+def read_import_file(path, ledger, company=None, max_errors=100):
+    """Dosyayı doğrulayıp {müşteri: kayıtlar} gruplarına ayırır; (gruplar, satır sayısı, hata sayısı, hatalar) döndürür.
+
+    Müşteri; "Müşteri" sütunundan, yoksa company parametresinden, o da yoksa
+    Excel sayfasının adından alınır. Hatalı satırlar atlanır ve "kaynak:satır:
+    açıklama" biçiminde en fazla max_errors tanesi raporlanır.
+    """
+    batches, errors, row_count, error_count = defaultdict(list), [], 0, 0
+    label = os.path.basename(path)
+    for default_company, rows in iter_import_tables(path):
+        source = f"{label}[{default_company}]" if default_company else label
+        fields = None
+        for line_no, values in rows:
+            if not any(value not in (None, "") for value in values): continue
+            if fields is None:  # İlk dolu satır başlıktır
+                fields = [IMPORT_COLUMNS.get(turkish_casefold(str(value or "").strip())) for value in values]
+                if "type" not in fields or "tarih" not in fields:
+                    errors.append(f"{source}:{line_no}: 'Tür' ve 'Tarih' sütunları bulunamadı"); error_count += 1; break
+                continue
+            row = {field: value for field, value in zip(fields, values) if field is not None}
+            try:
+                record = import_row_to_record(ledger, row)
+                if record is None: continue
+                target = str(row.get("company") or "").strip() or company or default_company
+                if not target: raise LedgerError("Müşteri belirtilmemiş (Müşteri sütunu veya --company gerekli).")
+            except LedgerError as e:
+                if len(errors) < max_errors: errors.append(f"{source}:{line_no}: {e}")
+                row_count += 1; error_count += 1
+                continue
+            batches[target].append(record); row_count += 1
+    return dict(batches), row_count, error_count, errors
+
+# =============================================================================
+# RAPORLAR
+# =============================================================================
+AGING_BUCKETS = ("0-30 gün", "31-60 gün", "61-90 gün", "90+ gün")
+_AGING_EDGES = (31, 61, 91) # Kova sınırları (gün); ödenmemiş alışın yaşı bu sınırlara göre kovalanır
+
+def month_label(code):
+    """1970-01'den beri geçen ay sayısını "YYYY-MM" metnine çevirir."""
+    return f"{1970 + code // 12}-{code % 12 + 1:02d}"
+
+class ReportEngine:
+    """Tüm müşteriler için alacak, yaşlandırma, yem bazında ve aylık raporlar.
+
+    Defterler bir kez okunup NumPy sütunlarına (müşteri, tür, zaman damgası,
+    kuruş, adet, yem) dökülür; raporlar bu sütunlar üzerinde döngüsüz
+    hesaplanır. Yem ve ay toplamları ile her alışın ödenmemiş kısmı önbellekte
+    tutulur. Sonraki yenilemelerde yalnızca revizyonu değişen ya da silinen
+    müşterilerin satırları çıkarılıp yeniden okunur ve önbellekteki toplamlar
+    bu satırların katkısı kadar güncellenir.
+
+    Ödemeler müşterinin en eski alışlarından başlayarak düşülür (FIFO); bir
+    alışın ödenmemiş kısmı, alış tarihinden bu yana geçen güne göre bir
+    yaşlandırma kovasına yazılır.
+
+    Devir kayıtları türü 2 (borç) ya da 3 (alacak) olan satırlardır: bakiye ve
+    yaşlandırmada alış ya da ödeme gibi sayılır, yem ve ay toplamlarına
+    katılmaz. Borç devirleri kapanan dönemin ödenmemiş alış kalanlarıdır ve
+    alışın tarihini taşır; bu yüzden yaşlandırma kapanıştan etkilenmez.
+    Kapanmış dönemlerin yem ve ay toplamları arşivin dönem özetlerinden eklenir.
+    """
+    _COLUMNS = (("company", "int32"), ("kind", "int8"), ("ts", "int64"), ("amount", "int64"), ("adet", "float64"), ("feed", "int32"), ("unpaid", "int64"))
+
+    def __init__(self, data_manager):
+        import numpy as np
+        self.data_manager = data_manager
+        self._company_codes, self._company_names = {}, []
+        self._feed_codes, self._feed_names = {}, []
+        self._revisions = {}  # Okunan müşterilerin okunduğu andaki revizyonları
+        self._columns = {name: np.zeros(0, dtype) for name, dtype in self._COLUMNS}
+        self._feed_totals = np.zeros((3, 0))  # Yem koduna göre miktar, kuruş, işlem sayısı
+        self._month_totals = {}  # Ay kodu -> [alış kuruş, ödeme kuruş, işlem sayısı]
+
+    # --- Yenileme ---
+    def begin_refresh(self):
+        """Yeniden okunacak müşterileri belirler ve okuyucuyu açar (GUI iş parçacığında çağrılmalıdır).
+
+        Dönen iş refresh'e verilir; refresh başka bir iş parçacığında çalışabilir.
+        """
+        dm = self.data_manager
+        current, touched = dm.all_aggregates(), dm.revisions()
+        changed = list(current.keys() - self._revisions.keys())
+        changed += [company for company, revision in touched.items() if self._revisions.get(company, revision) != revision and company in current]
+        removed = list(self._revisions.keys() - current.keys())
+        revisions = {company: touched.get(company, 0) for company in changed}
+        return changed, removed, revisions, dm.open_reader(changed)
+
+    @perf.timed("report_refresh")
+    def refresh(self, job):
+        import numpy as np
+        changed, removed, revisions, reader = job
+        try: rows = self._read_rows(reader, changed)
+        finally: reader.close()
+        stale = [self._company_codes[company] for company in changed + removed if company in self._revisions]
+        if stale:
+            drop = np.isin(self._columns["company"], stale)
+            self._accumulate({name: column[drop] for name, column in self._columns.items()}, -1)
+            self._columns = {name: column[~drop] for name, column in self._columns.items()}
+        self._accumulate(rows, 1)
+        self._columns = {name: np.concatenate((self._columns[name], rows[name])) for name, _ in self._COLUMNS}
+        for company in removed: del self._revisions[company]
+        self._revisions.update(revisions)
+
+    def update(self):
+        """Raporları aynı iş parçacığında yeniler."""
+        self.refresh(self.begin_refresh())
+
+    def _read_rows(self, reader, companies):
+        import numpy as np
+        company_col, kind_col, ts_col, amount_col, adet_col, feed_col = [], [], [], [], [], []
+        for company in companies:
+            code = self._company_codes.get(company)
+            if code is None: code = self._company_codes[company] = len(self._company_names); self._company_names.append(company)
+            for rec in reader.iter_records(company):
+                company_col.append(code); ts_col.append(rec.ts)
+                if rec.type == "purchase":
+                    feed = self._feed_codes.get(rec.yem)
+                    if feed is None: feed = self._feed_codes[rec.yem] = len(self._feed_names); self._feed_names.append(rec.yem)
+                    kind_col.append(0); amount_col.append(rec.toplam); adet_col.append(rec.adet); feed_col.append(feed)
+                elif rec.type == "payment":
+                    kind_col.append(1); amount_col.append(rec.tutar); adet_col.append(0.0); feed_col.append(-1)
+                else:
+                    kind_col.append(2 if rec.bakiye >= 0 else 3); amount_col.append(abs(rec.bakiye)); adet_col.append(0.0); feed_col.append(-1)
+        dtypes = dict(self._COLUMNS)
+        rows = {name: np.array(values, dtype=dtypes[name]) for name, values in
+                (("company", company_col), ("kind", kind_col), ("ts", ts_col), ("amount", amount_col), ("adet", adet_col), ("feed", feed_col))}
+        # Satırlar müşteri müşteri okunur; defterler zaten tarih sıralıdır, değilse (müşteri, tarih) sırasına getirilir.
+        company, ts = rows["company"], rows["ts"]
+        if not np.all((company[1:] != company[:-1]) | (ts[1:] >= ts[:-1])):
+            order = np.lexsort((ts, company))
+            rows = {name: column[order] for name, column in rows.items()}
+        rows["unpaid"] = self._unpaid(rows)
+        return rows
+
+    def _unpaid(self, rows):
+        """Alışların ödenmemiş kısmı (FIFO): alış, müşterinin o alışa kadarki toplam alışını ödemeler aştığı ölçüde kapanır."""
+        import numpy as np
+        unpaid = np.zeros(len(rows["amount"]), dtype=np.int64)
+        purchase = rows["kind"] % 2 == 0  # Alışlar ve devreden borçlar
+        company, amount = rows["company"][purchase], rows["amount"][purchase]
+        if not len(amount): return unpaid
+        payment = ~purchase
+        paid = np.bincount(rows["company"][payment], weights=rows["amount"][payment], minlength=len(self._company_names))
+        starts = np.flatnonzero(np.r_[True, company[1:] != company[:-1]])
+        running = np.cumsum(amount)
+        running -= np.repeat(running[starts] - amount[starts], np.diff(np.r_[starts, len(amount)]))  # Müşteri içinde kümülatif toplam
+        unpaid[purchase] = np.clip(running - np.rint(paid[company]).astype(np.int64), 0, amount)
+        return unpaid
+
+    def _accumulate(self, rows, sign):
+        """Satırların yem ve ay toplamlarına katkısını ekler (sign=1) ya da çıkarır (sign=-1)."""
+        import numpy as np
+        if not len(rows["ts"]): return
+        purchase = rows["kind"] == 0
+        feed, count = rows["feed"][purchase], len(self._feed_names)
+        added = np.vstack((np.bincount(feed, weights=rows["adet"][purchase], minlength=count),
+                           np.bincount(feed, weights=rows["amount"][purchase], minlength=count),
+                           np.bincount(feed, minlength=count)))
+        if self._feed_totals.shape[1] < count: self._feed_totals = np.pad(self._feed_totals, ((0, 0), (0, count - self._feed_totals.shape[1])))
+        self._feed_totals += sign * added
+        months = rows["ts"].astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+        for kind in (0, 1):
+            mask = rows["kind"] == kind
+            codes, inverse = np.unique(months[mask], return_inverse=True)
+            sums, counts = np.bincount(inverse, weights=rows["amount"][mask]), np.bincount(inverse)
+            for code, total, n in zip(codes.tolist(), np.rint(sums).astype(np.int64).tolist(), counts.tolist()):
+                totals = self._month_totals.setdefault(code, [0, 0, 0])
+                totals[kind] += sign * total; totals[2] += sign * n
+                if not totals[2]: del self._month_totals[code]
+
+    # --- Raporlar ---
+    def report(self, now):
+        """Raporları sözlük olarak döndürür; tutarlar kuruştur, yaşlandırma now'a göre hesaplanır."""
+        import numpy as np
+        cols, company_count = self._columns, len(self._company_names)
+        signed = np.where(cols["kind"] % 2 == 0, cols["amount"], -cols["amount"])
+        balances = np.rint(np.bincount(cols["company"], weights=signed, minlength=company_count)).astype(np.int64)
+        owed = cols["unpaid"] > 0
+        age_days = (datetime_to_ts(now) - cols["ts"][owed]) // 86400
+        buckets = np.searchsorted(_AGING_EDGES, age_days, side="right")
+        aging = np.rint(np.bincount(cols["company"][owed] * len(AGING_BUCKETS) + buckets, weights=cols["unpaid"][owed],
+                                    minlength=company_count * len(AGING_BUCKETS))).astype(np.int64).reshape(company_count, len(AGING_BUCKETS))
+        totals = aging.sum(axis=1)
+        order = np.argsort(-totals, kind="stable")
+        by_company = [(self._company_names[code], int(totals[code]), aging[code].tolist()) for code in order[:np.count_nonzero(totals)].tolist()]
+        adet, kurus, counts = self._feed_totals
+        feeds = {self._feed_names[code]: [float(adet[code]), int(round(kurus[code])), int(counts[code])] for code in range(len(self._feed_names)) if counts[code]}
+        months = {code: list(values) for code, values in self._month_totals.items()}
+        for period in self.data_manager.archive.periods():
+            for yem, values in period["summary"]["feeds"].items(): feeds[yem] = [a + b for a, b in zip(feeds.get(yem, (0.0, 0, 0)), values)]
+            for code, values in period["summary"]["months"].items(): months[int(code)] = [a + b for a, b in zip(months.get(int(code), (0, 0, 0)), values)]
+        feeds = sorted(((yem, *values) for yem, values in feeds.items()), key=lambda feed: -feed[2])
+        credit = int(-balances[balances < 0].sum())
+        return {"generated": format_ts(datetime_to_ts(now)), "customers": len(self._revisions), "records": len(cols["ts"]),
+                "receivables": int(totals.sum()), "credit": credit, "net": int(totals.sum()) - credit,
+                "aging": aging.sum(axis=0).tolist(), "aging_by_company": by_company, "feeds": feeds,
+                "months": [(month_label(code), *months[code]) for code in sorted(months)]}
+
+class ReportWorker(QThread):
+    """Raporları arka plan iş parçacığında yeniler ve hesaplar."""
+    finished_report = pyqtSignal(object, str)
+
+    def __init__(self, engine, now, parent=None):
+        super().__init__(parent)
+        self.engine, self.now = engine, now
+        self.job = engine.begin_refresh()
+
+    def run(self):
         try:
-            with open(self.filename, 'r', encoding='utf-8') as src, open(backup_file, 'w', encoding='utf-8') as dst:
-                dst.write(src.read())
-            return True, backup_file
-        except Exception as e: return False, str(e)
+            self.engine.refresh(self.job)
+            self.finished_report.emit(self.engine.report(self.now), "")
+        except Exception as e:
+            self.finished_report.emit(None, f"Rapor hazırlanamadı: {e}")
+
+@perf.timed("export_reports")
+def export_reports(report, target):
+    """Raporları tek bir Excel dosyasına (özet, yaşlandırma, yem ve aylık sayfaları) yazar; tutarlar TL'dir."""
+    import openpyxl
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Özet")
+    for row in (["Rapor Tarihi", report["generated"]], ["Müşteri", report["customers"]], ["Kayıt", report["records"]],
+                ["Toplam Alacak (TL)", report["receivables"] / 100], ["Müşteri Avansları (TL)", report["credit"] / 100],
+                ["Net Bakiye (TL)", report["net"] / 100], []):
+        ws.append(row)
+    ws.append(["Yaşlandırma"] + list(AGING_BUCKETS))
+    ws.append(["Ödenmemiş (TL)"] + [amount / 100 for amount in report["aging"]])
+    ws = wb.create_sheet("Yaşlandırma")
+    ws.append(["Müşteri", "Toplam (TL)"] + [f"{label} (TL)" for label in AGING_BUCKETS])
+    for company, total, buckets in report["aging_by_company"]: ws.append([company, total / 100] + [amount / 100 for amount in buckets])
+    ws = wb.create_sheet("Yem Bazında")
+    ws.append(["Yem", "Miktar", "Ciro (TL)", "İşlem", "Ort. Birim Fiyat (TL)"])
+    for yem, adet, kurus, count in report["feeds"]: ws.append([yem, adet, kurus / 100, count, kurus / 100 / adet if adet else None])
+    ws = wb.create_sheet("Aylık")
+    ws.append(["Ay", "Alış (TL)", "Ödeme (TL)", "Fark (TL)", "İşlem"])
+    for month, purchases, payments, count in report["months"]: ws.append([month, purchases / 100, payments / 100, (purchases - payments) / 100, count])
+    wb.save(target)
+
+# =============================================================================
+# AÇILIŞ PROFİLİ
+# =============================================================================
+class StartupProfiler:
+    """--profile-startup kipinde açılış aşamalarının sürelerini toplar ve raporlar."""
+    HEAVY_MODULES = ("openpyxl", "numpy", "cryptography", "wmi", "win32crypt", "pythoncom", "ntplib")
+
+    def __init__(self, started):
+        self.started = self._last = started
+        self.phases, self.background = [], []
+        self.loaded_at_show = None
+
+    def mark(self, name):
+        """Bir önceki işaretten bu yana geçen süreyi verilen aşamaya yazar."""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last)); self._last = now
+
+    def window_shown(self):
+        self.mark("pencere gösterimi")
+        self.loaded_at_show = [name for name in self.HEAVY_MODULES if name in sys.modules]
+
+    def report(self):
+        lines = ["Açılış profili (ms):"]
+        lines += [f"  {name:<34}{seconds * 1000:9.1f}" for name, seconds in self.phases]
+        lines.append(f"  {'toplam (pencere görünene kadar)':<34}{sum(seconds for _, seconds in self.phases) * 1000:9.1f}")
+        lines += [f"  {name:<34}{seconds * 1000:9.1f}" for name, seconds in self.background]
+        if self.loaded_at_show is not None:
+            lines.append("  Pencere açılırken yüklü ağır modüller: " + (", ".join(self.loaded_at_show) or "yok"))
+        return "\n".join(lines)
+
+startup_profiler = None
+
+def profile_mark(name):
+    if startup_profiler is not None: startup_profiler.mark(name)
+
+def profile_add(name, seconds):
+    if startup_profiler is not None: startup_profiler.background.append((name, seconds))
 
 # =============================================================================
 # ANA UYGULAMA PENCERESİ
 # =============================================================================
+class LicenseCheckWorker(QThread):
+    """Açılıştaki lisans denetimini (NTP eşitleme, lisans dosyası, WMI) arka planda yapar."""
+    checked = pyqtSignal(str, object, object)
+
+    def __init__(self, license_service, clock, parent=None):
+        super().__init__(parent)
+        self.license_service, self.clock = license_service, clock
+        self.elapsed = 0.0
+
+    def run(self):
+        started = time.perf_counter()
+        result = self.license_service.check(self.clock.now())
+        self.elapsed = time.perf_counter() - started
+        self.checked.emit(*result)
+
 class CariApp(QMainWindow):
+    license_checked = pyqtSignal(bool)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Yemci Cari Hesap Yönetimi")
@@ -111,115 +3359,154 @@ class CariApp(QMainWindow):
         self.setWindowIcon(self.style().standardIcon(QStyle.SP_FileIcon))
         self.expiration_date = None
 
-        self.data_manager = DataManager()
-        self.companies = self.data_manager.companies
+        self.clock = TrustedClock()
+        self.clock.start()
+        self.license_service = LicenseService()
+        profile_mark("ana pencere ve saat")
+        self.data_manager = create_data_manager()
+        self.ledger = Ledger(self.data_manager, lambda: self.get_current_time())
+        profile_mark("veri yükleme")
         self.current_company = None
+        self._period = None  # İşlem tablosunda gösterilen kapanmış dönem; None açık dönemdir
         self._sort_column = 5
         self._sort_order = Qt.DescendingOrder
+        self._backup_worker = None
+        self._license_worker = None
+        self._feed_worker = None
+        self.reports = None  # İlk açılışta kurulur (numpy açılışta yüklenmez)
         
         self._build_ui()
         self._setup_status_bar()
+        profile_mark("arayüz kurulumu")
         self._update_company_list()
+        self._update_receivables_label()
+        profile_mark("müşteri listesi")
+        self._start_feed_index()
+        if isinstance(self.data_manager, SharedDataManager):
+            self.sync_timer = QTimer(self)
+            self.sync_timer.timeout.connect(self._sync_changes)
+            self.sync_timer.start(SYNC_INTERVAL_MS)
 
+    @perf.timed("get_current_time")
     def get_current_time(self):
-        try:
-            client = ntplib.NTPClient()
-            response = client.request('pool.ntp.org', version=3, timeout=3)
-            return datetime.fromtimestamp(response.tx_time)
-        except Exception:
-            return None
+        return self.clock.now()
 
     def _setup_status_bar(self):
         self.statusBar = QStatusBar()
         self.setStatusBar(self.statusBar)
         self.version_label = QLabel(f"Versiyon: {__version__}")
         self.expiration_label = QLabel("Lisans Bitiş: -")
+        self.receivables_label = QLabel()
+        self.statusBar.addPermanentWidget(self.receivables_label)
+        self.statusBar.addPermanentWidget(QLabel(" | "))
         self.statusBar.addPermanentWidget(self.version_label)
         self.statusBar.addPermanentWidget(QLabel(" | "))
         self.statusBar.addPermanentWidget(self.expiration_label)
+        # Yavaş işlem göstergesi: yalnızca ölçüm açıksa ve PERF_SLOW_MS'i aşan bir işlem olduysa görünür.
+        self.perf_label = QLabel()
+        self.perf_label.setStyleSheet("color: #b35c00;")
+        self.perf_label.setToolTip("Ayrıntılar için Ctrl+Shift+D")
+        self.perf_label.hide()
+        self.statusBar.addWidget(self.perf_label)
+        self._shown_slow = None
+        if perf.enabled:
+            self.perf_timer = QTimer(self)
+            self.perf_timer.timeout.connect(self._update_perf_indicator)
+            self.perf_timer.start(1000)
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, activated=self.show_diagnostics)
+
+    def _update_perf_indicator(self):
+        last_slow = perf.last_slow
+        if last_slow is None or last_slow is self._shown_slow: return
+        self._shown_slow = last_slow
+        name, seconds, when = last_slow
+        self.perf_label.setText(f"Yavaş işlem: {name} {seconds * 1000:.0f} ms ({datetime.fromtimestamp(when).strftime('%H:%M:%S')})")
+        self.perf_label.show()
+
+    def show_diagnostics(self):
+        DiagnosticsDialog(self).exec_()
+
+    def show_reports(self):
+        try:
+            if self.reports is None: self.reports = ReportEngine(self.data_manager)
+        except ImportError:
+            QMessageBox.critical(self, "Hata", "Raporlar için numpy paketi gerekli."); return
+        # Raporlar yalnızca okuma yaptığından güvenilir saat alınamazsa sistem saati kullanılır.
+        ReportsDialog(self.reports, lambda: self.get_current_time() or datetime.now(), self).exec_()
+
+    def _update_receivables_label(self):
+        self.receivables_label.setText(f"Toplam Alacak: {self.data_manager.total_balance():.2f} TL")
 
     def _update_status_bar(self):
         if self.expiration_date:
             self.expiration_label.setText(f"Lisans Bitiş: {self.expiration_date.strftime('%d-%m-%Y')}")
 
     def verify_and_process_license(self, license_key):
-        current_time = self.get_current_time()
-        if not current_time:
+        status = self.license_service.activate(license_key, self.get_current_time())
+        if status == "offline":
             QMessageBox.critical(self, "Bağlantı Hatası", "Lisans etkinleştirilemedi. Lütfen internet bağlantınızı kontrol edin.")
-            return 0
-        try:
-            payload_b64, signature_b64 = license_key.split('.')
-            history_manager = SecureDataManager(ACTIVATION_HISTORY_FILE)
-            used_signatures_str = history_manager.read_data()
-            used_signatures = set(used_signatures_str.split(',')) if used_signatures_str else set()
-
-            if signature_b64 in used_signatures:
-                QMessageBox.critical(self, "Lisans Hatası", "Bu lisans anahtarı daha önce kullanılmış.")
-                return 0
-
-            public_key = serialization.load_pem_public_key(PUBLIC_KEY_PEM.encode('utf-8'))
-            payload = base64.urlsafe_b64decode(payload_b64)
-            public_key.verify(base64.urlsafe_b64decode(signature_b64), payload, padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH), hashes.SHA256())
-            parts = dict(part.split(':', 1) for part in payload.decode('utf-8').split(';'))
+        elif status == "used":
+            QMessageBox.critical(self, "Lisans Hatası", "Bu lisans anahtarı daha önce kullanılmış.")
+        elif status == "hardware":
+            QMessageBox.critical(self, "Lisans Hatası", f"Bu lisans anahtarı başka bir bilgisayara aittir.\n\nSizin Makine Kodunuz: {self.license_service.machine_id()}")
+        elif status == "unverified":
+            QMessageBox.critical(self, "Donanım Hatası", "Makine kimliği okunamadığı için lisans etkinleştirilemedi. Lütfen daha sonra yeniden deneyin.")
+        elif status != "ok":
+            QMessageBox.critical(self, "Lisans Hatası", "Girdiğiniz lisans anahtarı geçersiz veya bozuk.")
+        return 1 if status == "ok" else 0
 
-            if parts.get('machine_id') != get_machine_id():
-                QMessageBox.critical(self, "Lisans Hatası", f"Bu lisans anahtarı başka bir bilgisayara aittir.\n\nSizin Makine Kodunuz: {get_machine_id()}")
-                return 0
+    def start_license_check(self):
+        """Lisansı pencere göründükten sonra arka planda denetler; sonuç gelene kadar arayüz kilitli kalır."""
+        self.centralWidget().setEnabled(False)
+        self.statusBar.showMessage("Lisans denetleniyor...")
+        worker = LicenseCheckWorker(self.license_service, self.clock, self)
+        worker.checked.connect(lambda status, expiration_date, days_remaining: self._on_license_checked(worker, status, expiration_date, days_remaining))
+        self._license_worker = worker
+        worker.start()
 
-            used_signatures.add(signature_b64)
-            history_manager.write_data(",".join(used_signatures))
-            license_data_to_save = f"{license_key}:::{current_time.strftime('%Y-%m-%d %H:%M:%S')}"
-            s_manager = SecureDataManager(SECURE_LICENSE_FILE)
-            s_manager.write_data(license_data_to_save)
-            return 1
-        except Exception:
-            QMessageBox.critical(self, "Lisans Hatası", "Girdiğiniz lisans anahtarı geçersiz veya bozuk.")
-            return 0
+    def _on_license_checked(self, worker, status, expiration_date, days_remaining):
+        worker.wait()
+        self._license_worker = None
+        profile_add("lisans denetimi (arka plan)", worker.elapsed)
+        self.statusBar.clearMessage()
+        if self._apply_license_result(status, expiration_date, days_remaining):
+            self.centralWidget().setEnabled(True)
+            self.license_checked.emit(True)
+        else:
+            self.license_checked.emit(False)
+            self.close()
+            QApplication.exit(1)
 
     def check_license_at_startup(self):
-        current_time = self.get_current_time()
-        if not current_time:
+        """Lisansı eşzamanlı denetler; yeni lisans etkinleştirildikten sonra kullanılır."""
+        return self._apply_license_result(*self.license_service.check(self.get_current_time()))
+
+    def _apply_license_result(self, status, expiration_date, days_remaining):
+        if status == "offline":
             QMessageBox.critical(self, "Bağlantı Hatası", "Programın çalışması için aktif bir internet bağlantısı gereklidir.")
             return False
-
-        s_manager = SecureDataManager(SECURE_LICENSE_FILE)
-        secure_data = s_manager.read_data()
-        if secure_data and ":::" in secure_data:
-            license_key, activation_datetime_str = secure_data.split(":::")
-            try:
-                public_key = serialization.load_pem_public_key(PUBLIC_KEY_PEM.encode('utf-8'))
-                payload_b64, _ = license_key.split('.')
-                payload = base64.urlsafe_b64decode(payload_b64)
-                parts = dict(part.split(':', 1) for part in payload.decode('utf-8').split(';'))
-
-                if parts.get('machine_id') != get_machine_id():
-                    QMessageBox.critical(self, "Lisans Hatası", "Donanım değişikliği tespit edildi. Lütfen yeni bir lisans alın.")
-                    s_manager.delete_file()
-                    return self.prompt_for_new_license()
-
-                activation_datetime = datetime.strptime(activation_datetime_str, "%Y-%m-%d %H:%M:%S")
-                duration = timedelta(seconds=int(parts['duration_seconds'])) if 'duration_seconds' in parts else timedelta(days=int(parts.get('duration_days', 0)))
-                self.expiration_date = activation_datetime + duration
-                self._update_status_bar()
-
-                if current_time > self.expiration_date:
-                    QMessageBox.critical(self, "Lisans Hatası", f"Lisansınız {self.expiration_date.strftime('%d-%m-%Y %H:%M:%S')} tarihinde doldu.")
-                    s_manager.delete_file()
-                    return self.prompt_for_new_license()
-
-                days_remaining = (self.expiration_date.date() - current_time.date()).days
-                if days_remaining <= 3:
-                    QMessageBox.warning(self, "Lisans Uyarısı", f"Lisansınızın dolmasına {days_remaining} gün kaldı!")
-                
-                return True
-            except Exception:
-                s_manager.delete_file()
-                return self.prompt_for_new_license()
-        return self.prompt_for_new_license()
+        if expiration_date is not None:
+            self.expiration_date = expiration_date
+            self._update_status_bar()
+        if status == "unverified":
+            # Lisans silinmedi; WMI/COM geçici olarak yanıt vermediyse yeniden başlatmak yeterlidir.
+            QMessageBox.critical(self, "Donanım Hatası", "Makine kimliği okunamadığı için lisans doğrulanamadı.\nLisansınız korunuyor; lütfen programı yeniden başlatın.")
+            return False
+        if status == "hardware":
+            QMessageBox.critical(self, "Lisans Hatası", "Donanım değişikliği tespit edildi. Lütfen yeni bir lisans alın.")
+            return self.prompt_for_new_license()
+        if status == "expired":
+            QMessageBox.critical(self, "Lisans Hatası", f"Lisansınız {self.expiration_date.strftime('%d-%m-%Y %H:%M:%S')} tarihinde doldu.")
+            return self.prompt_for_new_license()
+        if status != "ok": return self.prompt_for_new_license()
+        if days_remaining <= 3:
+            QMessageBox.warning(self, "Lisans Uyarısı", f"Lisansınızın dolmasına {days_remaining} gün kaldı!")
+        return True
 
     def prompt_for_new_license(self):
         """Kullanıcıya yeni lisans anahtarı soran özel diyaloğu gösterir."""
-        machine_id = get_machine_id()
+        try: machine_id = self.license_service.machine_id()
+        except HardwareQueryError: machine_id = "(okunamadı)"
         dialog = LicenseDialog(machine_id, self)
         
         if dialog.exec_() == QDialog.Accepted:
@@ -248,19 +3535,41 @@ class CariApp(QMainWindow):
         left_layout.addLayout(company_add_layout)
         self.entry_search_company = QLineEdit()
         self.entry_search_company.setPlaceholderText("Müşteri Ara...")
-        self.entry_search_company.textChanged.connect(self._filter_company_list)
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._filter_company_list)
+        self.entry_search_company.textChanged.connect(self._search_timer.start)
         left_layout.addWidget(self.entry_search_company)
-        left_layout.addWidget(QLabel("Müşteriler"))
-        self.list_companies = QListWidget()
-        self.list_companies.currentItemChanged.connect(self.on_company_select)
+        companies_header_layout = QHBoxLayout()
+        companies_header_layout.addWidget(QLabel("Müşteriler"))
+        companies_header_layout.addStretch()
+        self.combo_company_sort = QComboBox()
+        self.combo_company_sort.addItems(["Ada Göre", "Bakiyeye Göre"])
+        self.combo_company_sort.currentIndexChanged.connect(self._sort_company_list)
+        companies_header_layout.addWidget(self.combo_company_sort)
+        left_layout.addLayout(companies_header_layout)
+        self.company_model = CompanyListModel(self.data_manager, self)
+        self.search_index = CompanySearchIndex()
+        self.list_companies = QListView()
+        self.list_companies.setUniformItemSizes(True)
+        self.list_companies.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.list_companies.setModel(self.company_model)
+        self.list_companies.selectionModel().currentChanged.connect(self.on_company_select)
         left_layout.addWidget(self.list_companies)
         company_actions_layout = QHBoxLayout()
         btn_delete_company = QPushButton(self.style().standardIcon(QStyle.SP_TrashIcon), " Sil")
         btn_delete_company.clicked.connect(self.delete_selected_company)
         btn_backup_data = QPushButton(self.style().standardIcon(QStyle.SP_DialogSaveButton), " Yedekle")
         btn_backup_data.clicked.connect(self.backup_data)
+        btn_bulk_export = QPushButton(self.style().standardIcon(QStyle.SP_ArrowUp), " Toplu Aktar")
+        btn_bulk_export.clicked.connect(self.bulk_export_to_excel)
+        btn_reports = QPushButton(self.style().standardIcon(QStyle.SP_FileDialogDetailedView), " Raporlar")
+        btn_reports.clicked.connect(self.show_reports)
         company_actions_layout.addWidget(btn_delete_company)
         company_actions_layout.addWidget(btn_backup_data)
+        company_actions_layout.addWidget(btn_bulk_export)
+        company_actions_layout.addWidget(btn_reports)
         left_layout.addLayout(company_actions_layout)
         main_layout.addWidget(left_panel)
         self.right_panel = QWidget()
@@ -280,13 +3589,20 @@ class CariApp(QMainWindow):
 
     def _display_company_details(self, company_name):
         self._clear_details_frame()
-        input_frame = QWidget()
+        self._period = None
+        self.input_frame = input_frame = QWidget()
         input_layout = QVBoxLayout(input_frame)
         purchase_layout = QHBoxLayout()
         purchase_layout.addWidget(QLabel("<b>Yem Alımı:</b>"))
         self.entry_yem, self.entry_adet, self.entry_fiyat = QLineEdit(), QLineEdit(), QLineEdit()
         self.entry_adet.setValidator(QDoubleValidator(0.00, 99999999.00, 2, self))
         self.entry_fiyat.setValidator(QDoubleValidator(0.00, 99999999.00, 2, self))
+        self.feed_model = QStringListModel(input_frame)
+        self.feed_completer = QCompleter(self.feed_model, input_frame)
+        self.feed_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)  # Öneriler FeedIndex'ten gelir (Türkçe duyarlı)
+        self.feed_completer.setWidget(self.entry_yem)
+        self.feed_completer.activated[str].connect(self._feed_chosen)
+        self.entry_yem.textEdited.connect(self._suggest_feeds)
         purchase_layout.addWidget(QLabel("Yem Adı:")); purchase_layout.addWidget(self.entry_yem)
         purchase_layout.addWidget(QLabel("Adet:")); purchase_layout.addWidget(self.entry_adet)
         purchase_layout.addWidget(QLabel("Birim Fiyat:")); purchase_layout.addWidget(self.entry_fiyat)
@@ -305,10 +3621,24 @@ class CariApp(QMainWindow):
         payment_layout.addWidget(btn_add_payment)
         input_layout.addLayout(payment_layout)
         self.right_layout.addWidget(input_frame)
-        self.tree = QTableWidget()
-        self.tree.setColumnCount(6)
-        self.tree.setHorizontalHeaderLabels(["Tür", "Açıklama / Yem Adı", "Adet", "Birim Fiyat", "Toplam", "Tarih"])
+        period_layout = QHBoxLayout()
+        period_layout.addWidget(QLabel("Dönem:"))
+        self.combo_period = QComboBox()
+        self._fill_period_combo()
+        self.combo_period.currentIndexChanged.connect(self._select_period)
+        period_layout.addWidget(self.combo_period)
+        period_layout.addStretch()
+        btn_close_period = QPushButton(self.style().standardIcon(QStyle.SP_DialogSaveButton), " Dönem Kapat")
+        btn_close_period.clicked.connect(self.close_period)
+        period_layout.addWidget(btn_close_period)
+        self.right_layout.addLayout(period_layout)
+        self.tree = QTableView()
+        self.table_model = RecordTableModel(self.tree)
+        self.tree.setModel(self.table_model)
         self.tree.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tree.horizontalHeader().setSortIndicatorShown(True)
+        self.tree.horizontalHeader().setSortIndicator(self._sort_column, self._sort_order)
+        self.tree.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.tree.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.tree.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.tree.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -327,161 +3657,347 @@ class CariApp(QMainWindow):
         self.right_layout.addLayout(bottom_layout)
         self._sort_and_update_treeview()
 
-    def _add_operation(self, record_type, data_dict):
-        current_time = self.get_current_time()
-        if not current_time:
+    def _add_operation(self, build_record):
+        """Kaydı Ledger ile oluşturup deftere ve tabloya ekler; başarılıysa True döndürür."""
+        try: rec = build_record()
+        except ClockUnavailable:
             QMessageBox.critical(self, "Bağlantı Hatası", "İşlem kaydedilemedi. İnternet bağlantınızı kontrol edin.")
-            return
-        data_dict["tarih"] = current_time.strftime("%Y-%m-%d %H:%M:%S")
-        rec = {"type": record_type, "data": data_dict}
-        self.companies[self.current_company].append(rec)
+            return False
+        except LedgerError: return False
+        company = self.current_company
+        try:
+            # Başka bilgisayarların değişiklikleri satır konumu hesaplanmadan önce uygulanır; kilit bırakılana kadar
+            # defter dışarıdan değişmediği için beginInsertRows ile endInsertRows arasına uzak bir satır girmez.
+            with self.data_manager.writing():
+                self._sync_changes()
+                if company != self.current_company: return False
+                self.table_model.insert_record(self.data_manager.insertion_index(company, rec), lambda: self.ledger.add(company, rec))
+        except SharedStoreError as e: self._show_sync_error(e); return False
+        self._update_total_label()
+        self._sync_changes()
+        return True
+
+    def _change_ledger(self, company, revision, change):
+        """Seçili defterde düzenleme/silme yapar. Defter, işlem başladıktan sonra başka bir
+        bilgisayarda değiştiyse değişiklik uygulanmaz ve tablo yenilenir. Uzak değişiklikler,
+        satır konumları hesaplanmadan önce değişiklik kilidi altında uygulanır."""
+        try:
+            with self.data_manager.writing():
+                self._sync_changes()
+                if company != self.current_company or self.data_manager.revision(company) != revision:
+                    raise ConflictError("Bu müşterinin defteri başka bir bilgisayarda değiştirildi.")
+                change()
+        except (ConflictError, SharedStoreError) as e:
+            self._show_sync_error(e); return
+        self._update_total_label()
+        self._sync_changes()
+
+    def _show_sync_error(self, error):
+        QMessageBox.warning(self, "Ortak Veri", f"{error}\nİşlem kaydedilmedi; defter yenilendi.")
         self._sort_and_update_treeview()
-        self.data_manager.save_data()
+
+    def _sync_changes(self):
+        """Başka bilgisayarlarda değişen müşterileri listede, seçiliyse işlem tablosunda yeniler."""
+        changed = self.data_manager.sync()
+        if not changed: return
+        if self.current_company in changed and not self.data_manager.has_company(self.current_company):
+            self.current_company = None
+            self.list_companies.selectionModel().clear()
+            self._clear_details_frame()
+        for name in changed:
+            exists, listed = self.data_manager.has_company(name), self.company_model.has_company(name)
+            if exists and not listed: self.company_model.add_company(name); self.search_index.add(name)
+            elif listed and not exists: self.company_model.remove_company(name); self.search_index.remove(name)
+            else: self.company_model.company_changed(name)
+        self._filter_company_list()
+        self._update_receivables_label()
+        if self.current_company: self._fill_period_combo()  # Başka bir bilgisayar dönem kapatmış olabilir
+        if self.current_company in changed and self._period is None: self._update_treeview(self.data_manager.get_records(self.current_company))
 
     def add_company(self):
         name = self.entry_company_name.text().strip()
-        if name and name not in self.companies:
-            self.companies[name] = []
+        self._sync_changes()
+        if name and not self.data_manager.has_company(name):
+            try: self.data_manager.add_company(name)
+            except SharedStoreError as e: QMessageBox.warning(self, "Ortak Veri", str(e)); return
             self.entry_company_name.clear()
-            self._update_company_list()
-            self.data_manager.save_data()
+            self.company_model.add_company(name)
+            self.search_index.add(name)
+            self._filter_company_list()
 
     def delete_selected_company(self):
         if self.current_company and QMessageBox.question(self, "Onay", f"'{self.current_company}' müşterisini silmek istediğinize emin misiniz?", QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
-            self.companies.pop(self.current_company, None)
+            name = self.current_company
+            try: self.data_manager.delete_company(name)
+            except SharedStoreError as e: QMessageBox.warning(self, "Ortak Veri", str(e)); return
             self.current_company = None
-            self._update_company_list()
+            self.list_companies.selectionModel().clear()
+            self.company_model.remove_company(name)
+            self.search_index.remove(name)
+            self._update_receivables_label()
             self._clear_details_frame()
-            self.data_manager.save_data()
 
+    @perf.timed("company_select")
     def on_company_select(self, current, _):
-        if current: self.current_company = current.text(); self._display_company_details(self.current_company)
-        else: self.current_company = None; self._clear_details_frame()
+        # Arama filtresi seçili müşteriyi gizlediğinde ayrıntılar açık kalır; yalnızca yeni bir seçim işlenir.
+        if not current.isValid(): return
+        name = current.data(CompanyListModel.NAME_ROLE)
+        if name != self.current_company: self.current_company = name; self._display_company_details(name)
 
     def _update_company_list(self):
-        self.list_companies.clear()
-        self.list_companies.addItems(sorted(self.companies.keys()))
+        self.search_index = CompanySearchIndex(self.data_manager.company_names())
+        self.company_model.by_balance = self.combo_company_sort.currentIndex() == 1
+        self._keep_company_selection(lambda: self.company_model.reload() or True)
         self._filter_company_list()
 
+    def _sort_company_list(self):
+        self._keep_company_selection(lambda: self.company_model.set_sort(self.combo_company_sort.currentIndex() == 1))
+
+    def _keep_company_selection(self, rebuild):
+        """Müşteri listesini rebuild ile yeniden kurar (satırlar değiştiyse True döner); görünür kalan seçili müşteriler seçili kalır."""
+        selection, model = self.list_companies.selectionModel(), self.company_model
+        selected = [index.data(CompanyListModel.NAME_ROLE) for index in selection.selectedIndexes()]
+        if not rebuild(): return
+        current = model.row_of(self.current_company) if self.current_company is not None else None
+        if current is not None: selection.setCurrentIndex(model.index(current), QItemSelectionModel.Select)
+        for row in filter(lambda row: row is not None, map(model.row_of, selected)): selection.select(model.index(row), QItemSelectionModel.Select)
+
+    def _update_company_item(self, name):
+        self.company_model.company_changed(name)
+
+    @perf.timed("filter_company_list")
     def _filter_company_list(self):
-        filter_text = self.entry_search_company.text().lower()
-        for i in range(self.list_companies.count()):
-            self.list_companies.item(i).setHidden(filter_text not in self.list_companies.item(i).text().lower())
+        matches = self.search_index.search(self.entry_search_company.text())
+        self._keep_company_selection(lambda: self.company_model.set_matches(matches))
+
+    def _start_feed_index(self):
+        """Yem adı dizinini arka planda kurar; kurulana kadar yem önerilmez."""
+        if self._feed_worker is not None or self.data_manager.feed_index() is not None: return
+        worker = FeedIndexWorker(self.data_manager, self)
+        worker.finished_index.connect(lambda built, error: self._on_feed_index(worker, built, error))
+        self._feed_worker = worker
+        worker.start()
+
+    def _on_feed_index(self, worker, built, error):
+        worker.wait()
+        self._feed_worker = None
+        profile_add("yem dizini (arka plan)", worker.elapsed)
+        if built is None: self.statusBar.showMessage(error, 5000); return
+        self.data_manager.finish_feed_index(worker.job, built)
+        if self.current_company is not None and self.entry_yem.hasFocus(): self._suggest_feeds(self.entry_yem.text())  # Beklerken yazılan metin için
+
+    @perf.timed("suggest_feeds")
+    def _suggest_feeds(self, text):
+        """Yazılan metne uyan yem adlarını önerir (önce bu müşterinin aldıkları, sonra en sık kullanılanlar)."""
+        index = self.data_manager.feed_index()
+        if index is None: self._start_feed_index()  # Ortak depo yeniden okunduysa dizin yeniden kurulur
+        names = index.search(text, self.current_company) if index is not None and text.strip() else []
+        self.feed_model.setStringList(names)
+        if names: self.feed_completer.complete()
+        else: self.feed_completer.popup().hide()
+
+    def _feed_chosen(self, name):
+        """Seçilen yemi yazar; birim fiyatı bu müşteriye son kesilen, yoksa genel son fiyatla doldurur."""
+        self.entry_yem.setText(name)
+        index = self.data_manager.feed_index()
+        customer_price, last_price = index.last_prices(name, self.current_company) if index is not None else (None, None)
+        price = customer_price if customer_price is not None else last_price
+        if price is not None: self.entry_fiyat.setText(format_kurus(price))
+        describe = lambda kurus: "yok" if kurus is None else f"{format_kurus(kurus)} TL"
+        self.statusBar.showMessage(f"{name}: bu müşteriye son fiyat {describe(customer_price)}, genel son fiyat {describe(last_price)}", 5000)
+        self.entry_adet.setFocus()
 
     def _add_purchase(self):
-        yem, adet, fiyat = self.entry_yem.text().strip(), self.entry_adet.text().replace(',', '.'), self.entry_fiyat.text().replace(',', '.')
+        yem, adet, fiyat = self.entry_yem.text().strip(), self.entry_adet.text(), self.entry_fiyat.text()
         if not all([yem, adet, fiyat]): return
-        try:
-            adet_f, fiyat_f = float(adet), float(fiyat)
-            data = {"yem": yem, "adet": adet_f, "fiyat": fiyat_f, "toplam": adet_f * fiyat_f}
-            self._add_operation("purchase", data)
+        index = self.data_manager.feed_index()
+        yem = index.canonical(yem) if index is not None else " ".join(yem.split())  # Aynı yemin farklı yazımları tek ad altında toplanır
+        if self._add_operation(lambda: self.ledger.purchase(yem, adet, fiyat)):
             self.entry_yem.clear(); self.entry_adet.clear(); self.entry_fiyat.clear()
-        except ValueError: pass
 
     def _add_payment(self):
-        aciklama, tutar = self.entry_aciklama.text().strip() or "Ödeme", self.entry_tutar.text().replace(',', '.')
+        aciklama, tutar = self.entry_aciklama.text(), self.entry_tutar.text()
         if not tutar: return
-        try:
-            tutar_f = float(tutar)
-            self._add_operation("payment", {"aciklama": aciklama, "tutar": tutar_f})
+        if self._add_operation(lambda: self.ledger.payment(tutar, aciklama)):
             self.entry_aciklama.clear(); self.entry_tutar.clear()
-        except ValueError: pass
 
-    def _get_selected_record_and_row(self):
-        selected_items = self.tree.selectedItems()
-        if not selected_items: return None, -1
-        return self.companies[self.current_company][selected_items[0].row()], selected_items[0].row()
+    def _selected_record(self):
+        """Seçili satırdaki kayıt; satır kimliğe, kimlik veri yöneticisinin sözlüğünden kayda çevrilir.
+        Kapanmış bir dönem gösteriliyorsa kayıtlar değiştirilemez ve None döner."""
+        selected_rows = self.tree.selectionModel().selectedRows()
+        if not selected_rows or self._period is not None: return None
+        return self.data_manager.find_record(self.current_company, self.table_model.record_id(selected_rows[0].row()))
 
     def _edit_selected_row(self):
-        record, row = self._get_selected_record_and_row()
-        if not record: return
-        dialog_class = EditPurchaseDialog if record["type"] == "purchase" else EditPaymentDialog
+        record = self._selected_record()
+        if not record or record.type == "carry": return
+        company, revision = self.current_company, self.data_manager.revision(self.current_company)
+        dialog_class = EditPurchaseDialog if record.type == "purchase" else EditPaymentDialog
         dialog = dialog_class(self, record)
         if dialog.exec_() == QDialog.Accepted:
-            self.companies[self.current_company][row] = dialog.get_data()
-            self._sort_and_update_treeview()
-            self.data_manager.save_data()
+            new_record = dialog.get_data()
+            def change():
+                index, new_index = self.data_manager.update_positions(company, record.id, new_record)
+                self.table_model.move_record(index, new_index, lambda: self.data_manager.update_record(company, record.id, new_record, revision))
+            self._change_ledger(company, revision, change)
 
     def _delete_selected_row(self):
-        _, row = self._get_selected_record_and_row()
-        if row != -1 and QMessageBox.question(self, "Onay", "Seçili işlemi silmek istediğinize emin misiniz?", QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
-            del self.companies[self.current_company][row]
-            self._sort_and_update_treeview()
-            self.data_manager.save_data()
+        record = self._selected_record()
+        if not record or record.type == "carry": return
+        company, revision = self.current_company, self.data_manager.revision(self.current_company)
+        if QMessageBox.question(self, "Onay", "Seçili işlemi silmek istediğinize emin misiniz?", QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
+            self._change_ledger(company, revision, lambda: self.table_model.remove_record(
+                self.data_manager.record_position(company, record.id), lambda: self.data_manager.delete_record(company, record.id, revision)))
 
     def _mark_as_paid(self):
-        record, _ = self._get_selected_record_and_row()
-        if record and record["type"] == "purchase":
-            data = record["data"]
-            if QMessageBox.question(self, "Onay", f"'{data['yem']}' alımını {data['toplam']:.2f} TL tutarında bir ödeme ile kapatmak istediğinize emin misiniz?", QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
-                self._add_operation("payment", {"aciklama": f"'{data['yem']}' alımı ödendi", "tutar": data['toplam']})
+        record = self._selected_record()
+        if record and record.type == "purchase":
+            company, revision = self.current_company, self.data_manager.revision(self.current_company)
+            if QMessageBox.question(self, "Onay", f"'{record.yem}' alımını {format_kurus(record.toplam)} TL tutarında bir ödeme ile kapatmak istediğinize emin misiniz?", QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
+                self._sync_changes()
+                if self.data_manager.revision(company) != revision: self._show_sync_error(ConflictError("Bu müşterinin defteri başka bir bilgisayarda değiştirildi.")); return
+                self._add_operation(lambda: self.ledger.settlement(record))
 
     def _sort_and_update_treeview(self):
         if not self.current_company: return
-        key_map = lambda r: datetime.strptime(r["data"]["tarih"], "%Y-%m-%d %H:%M:%S")
-        self.companies[self.current_company].sort(key=key_map, reverse=(self._sort_order == Qt.DescendingOrder))
-        self._update_treeview(self.companies[self.current_company])
+        self.table_model.set_descending(self._sort_order == Qt.DescendingOrder)
+        if self._period is None: self._update_treeview(self.data_manager.get_records(self.current_company))
+        else: self._update_treeview(self.data_manager.archive.read_records(self._period, self.current_company))
+
+    # --- Dönemler ---
+    def _fill_period_combo(self):
+        """Dönem seçicisini açık dönem ve arşivdeki kapanmış dönemlerle (en yeni önce) doldurur; seçim korunur."""
+        labels = [None] + [period["label"] for period in reversed(self.data_manager.archive.periods())]
+        if [self.combo_period.itemData(i) for i in range(self.combo_period.count())] == labels: return
+        self.combo_period.blockSignals(True)
+        self.combo_period.clear()
+        for label in labels: self.combo_period.addItem("Açık Dönem" if label is None else f"{label} (kapalı)", label)
+        self.combo_period.setCurrentIndex(labels.index(self._period) if self._period in labels else 0)
+        self.combo_period.blockSignals(False)
 
+    def _select_period(self, index):
+        """İşlem tablosunu açık döneme ya da arşivden istendiğinde okunan kapanmış bir döneme geçirir; kapanmış dönemler salt okunurdur."""
+        self._period = self.combo_period.itemData(index)
+        self.input_frame.setEnabled(self._period is None)
+        try: self._sort_and_update_treeview()
+        except (PeriodError, SerializationError, OSError) as e:
+            QMessageBox.critical(self, "Hata", f"Dönem arşivi okunamadı: {e}")
+            self.combo_period.setCurrentIndex(0)
+
+    def close_period(self):
+        """Geçmiş bir yılı ya da ayı kapatır: kayıtlar arşive taşınır, her müşterinin defterine devir bakiyesi yazılır."""
+        now = self.get_current_time()
+        if now is None:
+            QMessageBox.critical(self, "Bağlantı Hatası", "Güvenilir saat alınamadı. İnternet bağlantınızı kontrol edin.")
+            return
+        labels = closable_periods(now, self.data_manager.archive.closed_through())
+        if not labels: QMessageBox.information(self, "Dönem Kapat", "Kapatılabilecek bir dönem yok."); return
+        label, ok = QInputDialog.getItem(self, "Dönem Kapat", "Kapatılacak dönem (öncesindeki kayıtlar da kapanır):", labels, 0, False)
+        if not ok: return
+        if QMessageBox.question(self, "Onay", f"'{label}' dönemi kapatılacak: kayıtlar arşive taşınacak ve her müşteriye devir bakiyesi yazılacak. "
+                                "Kapanmış dönemlerdeki kayıtlar değiştirilemez. Devam edilsin mi?", QMessageBox.Yes | QMessageBox.No) != QMessageBox.Yes: return
+        self._sync_changes()
+        try: count = self.ledger.close_period(label, now)
+        except (PeriodError, SharedStoreError, SerializationError, OSError) as e:
+            QMessageBox.critical(self, "Hata", f"Dönem kapatılamadı: {e}"); return
+        self._sync_changes()
+        if self.current_company: self._display_company_details(self.current_company)
+        self.statusBar.showMessage(f"{label} dönemi kapatıldı: {count} kayıt arşive taşındı.", 5000)
+
+    @perf.timed("update_treeview")
     def _update_treeview(self, records):
-        self.tree.setSortingEnabled(False); self.tree.setRowCount(0)
-        for row, rec in enumerate(records):
-            self.tree.insertRow(row)
-            data = rec["data"]
-            items = []
-            if rec["type"] == "purchase": items = ["Alış", data["yem"], f"{data['adet']}", f"{data['fiyat']:.2f}", f"{data['toplam']:.2f}", data["tarih"]]
-            elif rec["type"] == "payment": items = ["Ödeme", data["aciklama"], "", "", f"-{data['tutar']:.2f}", data["tarih"]]
-            for col, text in enumerate(items):
-                item = QTableWidgetItem(text)
-                if col in [2, 3, 4]: item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                self.tree.setItem(row, col, item)
-            if rec["type"] == "payment":
-                for col in range(self.tree.columnCount()): self.tree.item(row, col).setForeground(Qt.red)
-        self.tree.setSortingEnabled(True); self._update_total_label()
+        self.table_model.set_records(records)
+        self._update_total_label()
 
     def _update_total_label(self):
         if not self.current_company: return
-        total = sum(rec["data"].get("toplam", 0) - rec["data"].get("tutar", 0) for rec in self.companies.get(self.current_company, []))
+        self._update_company_item(self.current_company)
+        self._update_receivables_label()
+        total = self.data_manager.get_balance(self.current_company)
         self.total_label.setText(f"Toplam Bakiye: {total:.2f} TL")
         self.total_label.setStyleSheet(f"font-size: 16px; font-weight: bold; {'color: red;' if total > 0 else 'color: green;'}")
 
     def _sort_treeview(self, column, order):
         self._sort_column, self._sort_order = 5, order
         self.tree.horizontalHeader().setSortIndicator(5, order)
-        self._sort_and_update_treeview()
+        self.table_model.set_descending(order == Qt.DescendingOrder)
 
     def _show_context_menu(self, pos):
-        if self.tree.selectedItems():
-            menu = QMenu()
-            menu.addAction("Düzenle", self._edit_selected_row)
-            menu.addAction("Sil", self._delete_selected_row)
-            record, _ = self._get_selected_record_and_row()
-            if record and record["type"] == "purchase":
-                menu.addSeparator(); menu.addAction("Ödendi Olarak İşaretle", self._mark_as_paid)
-            menu.exec_(self.tree.viewport().mapToGlobal(pos))
+        record = self._selected_record()
+        if record is None or record.type == "carry": return  # Devir ve kapanmış dönem kayıtları değiştirilemez
+        menu = QMenu()
+        menu.addAction("Düzenle", self._edit_selected_row)
+        menu.addAction("Sil", self._delete_selected_row)
+        if record.type == "purchase":
+            menu.addSeparator(); menu.addAction("Ödendi Olarak İşaretle", self._mark_as_paid)
+        menu.exec_(self.tree.viewport().mapToGlobal(pos))
 
     def export_to_excel(self):
         if not self.current_company: return
         filename, _ = QFileDialog.getSaveFileName(self, "Excel Olarak Kaydet", f"{self.current_company}_hesap_dokumu.xlsx", "Excel Dosyaları (*.xlsx)")
         if not filename: return
-        try:
-            wb = openpyxl.Workbook()
-            ws = wb.active; ws.title = self.current_company
-            ws.append(["Tür", "Açıklama / Yem Adı", "Adet", "Birim Fiyat (TL)", "Toplam (TL)", "Tarih"])
-            for record in self.companies.get(self.current_company, []):
-                data = record["data"]
-                ws.append(["Alış", data["yem"], data["adet"], data["fiyat"], data["toplam"], data["tarih"]] if record["type"] == "purchase" else ["Ödeme", data["aciklama"], "", "", -data["tutar"], data["tarih"]])
-            total = sum(r["data"].get("toplam", 0) - r["data"].get("tutar", 0) for r in self.companies[self.current_company])
-            ws.append([]); ws.append(["", "", "", "TOPLAM BAKİYE:", total])
-            wb.save(filename)
-        except Exception as e:
-            QMessageBox.critical(self, "Hata", f"Excel dosyası oluşturulurken bir hata oluştu: {e}")
+        self._start_export([self.current_company], filename, False)
+
+    def bulk_export_to_excel(self):
+        selected = [index.data(CompanyListModel.NAME_ROLE) for index in self.list_companies.selectionModel().selectedRows()]
+        dialog = BulkExportDialog(len(selected), self)
+        if dialog.exec_() != QDialog.Accepted: return
+        companies = selected if dialog.selected_only() else self.data_manager.company_names()
+        if not companies: return
+        if dialog.one_file_per_company():
+            target = QFileDialog.getExistingDirectory(self, "Dökümlerin Kaydedileceği Klasör")
+        else:
+            target, _ = QFileDialog.getSaveFileName(self, "Excel Olarak Kaydet", "musteri_hesap_dokumleri.xlsx", "Excel Dosyaları (*.xlsx)")
+        if target: self._start_export(companies, target, dialog.one_file_per_company())
+
+    def _start_export(self, companies, target, one_file_per_company):
+        jobs = [(company, self.data_manager.get_balance(company)) for company in companies]
+        worker = ExportWorker(self.data_manager.open_reader(companies), jobs, target, one_file_per_company, self)
+        progress_dialog = QProgressDialog("Excel dosyası hazırlanıyor...", "İptal", 0, len(jobs), self)
+        progress_dialog.setWindowTitle("Excel'e Aktar")
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(300)
+        progress_dialog.canceled.connect(worker.requestInterruption)
+        worker.progress.connect(lambda i, company: (progress_dialog.setValue(i), progress_dialog.setLabelText(company or "Kaydediliyor...")))
+        worker.finished_export.connect(lambda success, message: self._on_export_finished(worker, progress_dialog, success, message))
+        self._export_worker = worker
+        worker.start()
+
+    def _on_export_finished(self, worker, progress_dialog, success, message):
+        progress_dialog.close()
+        worker.wait()
+        self._export_worker = None
+        if success: self.statusBar.showMessage(f"Excel'e aktarıldı: {message}", 5000)
+        elif worker.cancelled: self.statusBar.showMessage(message, 5000)
+        else: QMessageBox.critical(self, "Hata", message)
 
     def backup_data(self):
-        success, message = self.data_manager.backup_data()
-        QMessageBox.information(self, "Yedekleme" if success else "Hata", message)
+        if self._backup_worker is not None: self.statusBar.showMessage("Yedekleme zaten sürüyor...", 3000); return
+        companies = self.data_manager.company_names()
+        worker = BackupWorker(BackupStore(), self.data_manager.open_reader(companies), companies, self)
+        worker.finished_backup.connect(lambda success, message: self._on_backup_finished(worker, success, message))
+        self._backup_worker = worker
+        self.statusBar.showMessage("Yedekleniyor...")
+        worker.start()
+
+    def _on_backup_finished(self, worker, success, message):
+        worker.wait()
+        self._backup_worker = None
+        if success: self.statusBar.showMessage(message, 5000)
+        else: QMessageBox.critical(self, "Hata", message)
 
     def closeEvent(self, event):
-        self.data_manager.save_data()
+        if self._backup_worker is not None: self._backup_worker.wait()
+        if self._license_worker is not None: self._license_worker.wait()
+        if self._feed_worker is not None: self._feed_worker.wait()
+        try: self.data_manager.close()
+        except Exception as e:
+            answer = QMessageBox.question(self, "Kaydedilemedi", f"Son değişiklikler diske yazılamadı:\n{e}\n\n"
+                                          "Program kapanırsa bu değişiklikler kaybolur. Yine de çıkılsın mı?\n"
+                                          "(Hayır: program açık kalır ve kayıt yeniden denenir.)", QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if answer != QMessageBox.Yes: self.data_manager.save_data(); event.ignore(); return
+        if hasattr(self, "sync_timer"): self.sync_timer.stop()
+        self.clock.stop()
         event.accept()
 
 # =============================================================================
@@ -491,9 +4007,8 @@ class EditPurchaseDialog(QDialog):
     def __init__(self, parent, old_record):
         super().__init__(parent)
         self.setWindowTitle("Yem Alışını Düzenle"); self.old_record = old_record
-        data = old_record["data"]
         layout, form_layout = QVBoxLayout(self), QHBoxLayout()
-        self.e_yem = QLineEdit(data["yem"]); self.e_adet = QLineEdit(str(data["adet"])); self.e_fiyat = QLineEdit(str(data["fiyat"]))
+        self.e_yem = QLineEdit(old_record.yem); self.e_adet = QLineEdit(str(old_record.adet)); self.e_fiyat = QLineEdit(format_kurus(old_record.fiyat))
         self.e_adet.setValidator(QDoubleValidator(0.0, 999999.0, 2, self)); self.e_fiyat.setValidator(QDoubleValidator(0.0, 999999.0, 2, self))
         form_layout.addWidget(QLabel("Yem Adı:")); form_layout.addWidget(self.e_yem)
         form_layout.addWidget(QLabel("Adet:")); form_layout.addWidget(self.e_adet)
@@ -503,17 +4018,15 @@ class EditPurchaseDialog(QDialog):
         buttons.accepted.connect(self.accept); buttons.rejected.connect(self.reject)
         layout.addWidget(buttons)
     def get_data(self):
-        adet = float(self.e_adet.text().replace(',', '.')); fiyat = float(self.e_fiyat.text().replace(',', '.'))
-        new_data = {"yem": self.e_yem.text().strip(), "adet": adet, "fiyat": fiyat, "toplam": adet * fiyat, "tarih": self.old_record["data"]["tarih"]}
-        return {"type": "purchase", "data": new_data}
+        adet = float(self.e_adet.text().replace(',', '.')); fiyat = to_kurus(float(self.e_fiyat.text().replace(',', '.')))
+        return Purchase(self.old_record.ts, self.e_yem.text().strip(), adet, fiyat, round_half_up(adet * fiyat))
 
 class EditPaymentDialog(QDialog):
     def __init__(self, parent, old_record):
         super().__init__(parent)
         self.setWindowTitle("Ödemeyi Düzenle"); self.old_record = old_record
-        data = old_record["data"]
         layout, form_layout = QVBoxLayout(self), QHBoxLayout()
-        self.e_aciklama = QLineEdit(data["aciklama"]); self.e_tutar = QLineEdit(str(data["tutar"]))
+        self.e_aciklama = QLineEdit(old_record.aciklama); self.e_tutar = QLineEdit(format_kurus(old_record.tutar))
         self.e_tutar.setValidator(QDoubleValidator(0.0, 999999.0, 2, self))
         form_layout.addWidget(QLabel("Açıklama:")); form_layout.addWidget(self.e_aciklama)
         form_layout.addWidget(QLabel("Tutar:")); form_layout.addWidget(self.e_tutar)
@@ -522,8 +4035,157 @@ class EditPaymentDialog(QDialog):
         buttons.accepted.connect(self.accept); buttons.rejected.connect(self.reject)
         layout.addWidget(buttons)
     def get_data(self):
-        new_data = {"aciklama": self.e_aciklama.text().strip() or "Ödeme", "tutar": float(self.e_tutar.text().replace(',', '.')), "tarih": self.old_record["data"]["tarih"]}
-        return {"type": "payment", "data": new_data}
+        tutar = to_kurus(float(self.e_tutar.text().replace(',', '.')))
+        return Payment(self.old_record.ts, self.e_aciklama.text().strip() or "Ödeme", tutar)
+
+class DiagnosticsDialog(QDialog):
+    """Ölçülen işlemlerin son, yüzdelik ve en kötü sürelerini gösteren gizli tanılama penceresi (Ctrl+Shift+D)."""
+    HEADERS = ["İşlem", "Sayı", "Hata", "Son (ms)", "p50 (ms)", "p95 (ms)", "p99 (ms)", "En Kötü (ms)"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Performans Tanılama")
+        self.resize(760, 380)
+        layout = QVBoxLayout(self)
+        self.info_label = QLabel()
+        layout.addWidget(self.info_label)
+        self.table = QTableWidget(0, len(self.HEADERS), self)
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+        buttons = QDialogButtonBox(QDialogButtonBox.Reset | QDialogButtonBox.Close, self)
+        buttons.button(QDialogButtonBox.Reset).setText("Sıfırla")
+        buttons.button(QDialogButtonBox.Reset).clicked.connect(lambda: (perf.reset(), self.refresh()))
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def refresh(self):
+        if not perf.enabled:
+            self.info_label.setText("Performans ölçümü kapalı (PERF_MONITORING)."); return
+        self.info_label.setText(f"Son {perf.window} ölçüme göre yüzdelikler." + (f" Günlük: {perf.log_path}" if perf.log_path else ""))
+        snapshot = perf.snapshot()
+        self.table.setRowCount(len(snapshot))
+        for row, (name, stats) in enumerate(snapshot.items()):
+            values = [name, str(stats["count"]), str(stats["errors"])] + [f"{stats[key] * 1000:.1f}" for key in ("last", "p50", "p95", "p99", "worst")]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column: item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+class ReportsDialog(QDialog):
+    """Tüm müşteriler için alacak yaşlandırma, yem bazında ve aylık raporlar."""
+    AGING_HEADERS = ["Müşteri", "Toplam"] + list(AGING_BUCKETS)
+    FEED_HEADERS = ["Yem", "Miktar", "Ciro", "İşlem", "Ort. Birim Fiyat"]
+    MONTH_HEADERS = ["Ay", "Alış", "Ödeme", "Fark", "İşlem"]
+
+    def __init__(self, engine, now, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Raporlar")
+        self.resize(820, 520)
+        self.engine, self.now, self.report, self.worker = engine, now, None, None
+        layout = QVBoxLayout(self)
+        self.info_label = QLabel("Raporlar hazırlanıyor...")
+        layout.addWidget(self.info_label)
+        self.tabs = QTabWidget(self)
+        self.aging_table, self.feed_table, self.month_table = (self._add_table(title, headers) for title, headers in
+            (("Alacak Yaşlandırma", self.AGING_HEADERS), ("Yem Bazında", self.FEED_HEADERS), ("Aylık", self.MONTH_HEADERS)))
+        layout.addWidget(self.tabs)
+        buttons = QDialogButtonBox(QDialogButtonBox.Close, self)
+        self.refresh_button = buttons.addButton("Yenile", QDialogButtonBox.ActionRole)
+        self.export_button = buttons.addButton("Excel'e Aktar", QDialogButtonBox.ActionRole)
+        self.refresh_button.clicked.connect(self.refresh)
+        self.export_button.clicked.connect(self.export)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.refresh()
+
+    def _add_table(self, title, headers):
+        table = QTableWidget(0, len(headers), self)
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.tabs.addTab(table, title)
+        return table
+
+    def refresh(self):
+        if self.worker is not None: return
+        self.refresh_button.setEnabled(False); self.export_button.setEnabled(False)
+        self.worker = ReportWorker(self.engine, self.now(), self)
+        self.worker.finished_report.connect(self._on_report)
+        self.worker.start()
+
+    def _on_report(self, report, error):
+        if self.worker is None: return  # Pencere kapatıldı
+        self.worker.wait(); self.worker = None
+        self.refresh_button.setEnabled(True)
+        if report is None: self.info_label.setText(error); return
+        self.report = report
+        self.export_button.setEnabled(True)
+        self.info_label.setText(f"Toplam Alacak: {format_kurus(report['receivables'])} TL | Müşteri Avansları: {format_kurus(report['credit'])} TL | "
+                                f"Net: {format_kurus(report['net'])} TL  ({report['customers']} müşteri, {report['records']} kayıt, {report['generated']})")
+        aging_rows = [["TOPLAM", report["receivables"]] + report["aging"]] + [[company, total] + buckets for company, total, buckets in report["aging_by_company"][:REPORT_MAX_ROWS]]
+        self._fill(self.aging_table, [[row[0]] + [format_kurus(amount) for amount in row[1:]] for row in aging_rows])
+        self._fill(self.feed_table, [[yem, f"{adet:g}", format_kurus(kurus), str(count), format_kurus(round_half_up(kurus / adet)) if adet else ""]
+                                     for yem, adet, kurus, count in report["feeds"]])
+        self._fill(self.month_table, [[month, format_kurus(purchases), format_kurus(payments), format_kurus(purchases - payments), str(count)]
+                                      for month, purchases, payments, count in reversed(report["months"])])
+
+    @staticmethod
+    def _fill(table, rows):
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column: item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                table.setItem(row, column, item)
+
+    def export(self):
+        if self.report is None: return
+        target, _ = QFileDialog.getSaveFileName(self, "Excel Olarak Kaydet", f"raporlar_{self.report['generated'][:10]}.xlsx", "Excel Dosyaları (*.xlsx)")
+        if not target: return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try: export_reports(self.report, target); error = None
+        except Exception as e: error = e
+        finally: QApplication.restoreOverrideCursor()
+        if error is not None: QMessageBox.critical(self, "Hata", f"Excel dosyası oluşturulurken bir hata oluştu: {error}")
+        else: QMessageBox.information(self, "Başarılı", f"Raporlar aktarıldı: {target}")
+
+    def done(self, result):
+        if self.worker is not None: self.worker.wait(); self.worker = None
+        super().done(result)
+
+class BulkExportDialog(QDialog):
+    """Toplu Excel aktarımı için kapsam (tüm/seçili müşteriler) ve dosya düzeni seçimi."""
+    def __init__(self, selected_count, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Toplu Excel Aktarımı")
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("<b>Aktarılacak Müşteriler:</b>"))
+        self.radio_all = QRadioButton("Tüm müşteriler"); self.radio_selected = QRadioButton(f"Seçili müşteriler ({selected_count})")
+        self.radio_selected.setEnabled(selected_count > 0)
+        (self.radio_selected if selected_count > 1 else self.radio_all).setChecked(True)
+        layout.addWidget(self.radio_all); layout.addWidget(self.radio_selected)
+        layout.addWidget(QLabel("<b>Dosya Düzeni:</b>"))
+        self.radio_sheets = QRadioButton("Tek dosya, her müşteri ayrı sayfada"); self.radio_files = QRadioButton("Her müşteri ayrı dosyada")
+        self.radio_sheets.setChecked(True)
+        layout.addWidget(self.radio_sheets); layout.addWidget(self.radio_files)
+        for group_buttons in ((self.radio_all, self.radio_selected), (self.radio_sheets, self.radio_files)):
+            group = QButtonGroup(self)
+            for button in group_buttons: group.addButton(button)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
+        buttons.accepted.connect(self.accept); buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+    def selected_only(self):
+        return self.radio_selected.isChecked()
+    def one_file_per_company(self):
+        return self.radio_files.isChecked()
 
 class LicenseDialog(QDialog):
     """Makine kodunu göstermek ve kopyalamak için özel lisans giriş diyaloğu."""
@@ -576,22 +4238,134 @@ class LicenseDialog(QDialog):
 # =============================================================================
 # UYGULAMAYI BAŞLATMA
 # =============================================================================
+def run_backup_command(args):
+    """Komut satırından yedek listeleme, doğrulama ve geri yükleme."""
+    store = BackupStore()
+    if args.backup_list:
+        for sid in store.snapshots():
+            manifest = store.load_manifest(sid)
+            print(f"{sid}  {len(manifest['companies'])} müşteri, {sum(e['count'] for es in manifest['companies'].values() for e in es)} kayıt")
+        return 0
+    if args.backup_verify is not None:
+        errors = store.verify(args.backup_verify or None, deep=args.deep)
+        for error in errors: print(error)
+        print("Yedekler sağlam." if not errors else f"{len(errors)} hata bulundu.")
+        return 1 if errors else 0
+    target = args.restore_to or f"data_restored_{args.backup_restore}.json"
+    try: store.restore_to_file(args.backup_restore, target)
+    except Exception as e: print(f"Geri yükleme başarısız: {e}"); return 1
+    print(f"Yedek {args.backup_restore} şuraya geri yüklendi: {target}")
+    return 0
+
+def run_export_json_command(args):
+    """Tüm defterleri, kullanılan depolama ve biçimden bağımsız olarak okunabilir JSON'a yazar."""
+    data_manager = create_data_manager()
+    try:
+        names = data_manager.company_names()
+        reader = data_manager.open_reader(names)
+        try: Serializer("json").write(args.export_json, {name: list(reader.iter_records(name)) for name in names}, {})
+        finally: reader.close()
+        print(f"{len(names)} müşteri şuraya yazıldı: {args.export_json}")
+        return 0
+    except Exception as e:
+        print(f"Dışa aktarma başarısız: {e}")
+        return 1
+    finally:
+        data_manager.close()
+
+def run_close_period_command(args):
+    """Komut satırından bir dönemi kapatır (program kapalıyken)."""
+    data_manager = create_data_manager()
+    try:
+        count = Ledger(data_manager).close_period(args.close_period, datetime.now())
+        print(f"{args.close_period} dönemi kapatıldı: {count} kayıt şuraya taşındı: {data_manager.archive.directory}")
+        return 0
+    except Exception as e:
+        print(f"Dönem kapatılamadı: {e}")
+        return 1
+    finally:
+        data_manager.close()
+
+def run_import_command(args):
+    """Komut satırından CSV/Excel dosyasını deftere toplu aktarır ve hızı raporlar."""
+    started = time.perf_counter()
+    data_manager = create_data_manager()
+    ledger = Ledger(data_manager)
+    try:
+        batches, row_count, error_count, errors = read_import_file(args.import_file, ledger, args.company)
+        parsed = time.perf_counter()
+        for error in errors: print(error)
+        if error_count > len(errors): print(f"... ve {error_count - len(errors)} hata daha")
+        added = sum(len(records) for records in batches.values())
+        print(f"{row_count} satır okundu, {added} geçerli kayıt ({len(batches)} müşteri), {error_count} hatalı; "
+              f"{parsed - started:.2f} sn ({row_count / max(parsed - started, 1e-9):,.0f} satır/sn)")
+        if error_count and not args.skip_invalid:
+            print("Hatalı satırlar olduğu için hiçbir kayıt eklenmedi (--skip-invalid ile atlanabilir).")
+            return 1
+        if args.dry_run or not added: return 0
+        ledger.add_many(batches)
+        committed = time.perf_counter()
+        print(f"{added} kayıt tek işlemde kaydedildi: {committed - parsed:.2f} sn; "
+              f"toplam {committed - started:.2f} sn ({added / max(committed - started, 1e-9):,.0f} kayıt/sn)")
+        return 0
+    except Exception as e:
+        print(f"İçe aktarma başarısız: {e}")
+        return 1
+    finally:
+        data_manager.close()
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Yemci Cari Hesap Yönetimi")
+    parser.add_argument("--backup-list", action="store_true", help="Alınmış yedekleri listeler")
+    parser.add_argument("--backup-verify", nargs="?", const="", metavar="YEDEK", help="Yedeklerin (veya yalnızca verilenin) bütünlüğünü denetler")
+    parser.add_argument("--deep", action="store_true", help="Doğrulamada parçaları açıp içeriği de denetler")
+    parser.add_argument("--backup-restore", metavar="YEDEK", help="Yedeği data.json biçiminde bir dosyaya geri yükler")
+    parser.add_argument("--restore-to", metavar="DOSYA", help="Geri yüklenecek dosya (varsayılan: data_restored_<YEDEK>.json)")
+    parser.add_argument("--import", dest="import_file", metavar="DOSYA", help="CSV veya Excel (.xlsx) dosyasındaki kayıtları deftere toplu aktarır (program kapalıyken)")
+    parser.add_argument("--company", metavar="MÜŞTERİ", help="İçe aktarmada Müşteri sütunu olmayan satırların müşterisi")
+    parser.add_argument("--skip-invalid", action="store_true", help="İçe aktarmada hatalı satırları atlayıp kalanları kaydeder")
+    parser.add_argument("--dry-run", action="store_true", help="İçe aktarılacak dosyayı yalnızca doğrular")
+    parser.add_argument("--export-json", metavar="DOSYA", help="Tüm defterleri okunabilir JSON dosyasına yazar (program kapalıyken)")
+    parser.add_argument("--close-period", metavar="DÖNEM", help="Yılı (2024) ya da ayı (2024-03) ve öncesini kapatır: kayıtlar arşive taşınır, deftere devir yazılır")
+    parser.add_argument("--perf-log", action="store_true", help=f"İşlem sürelerini {PERF_LOG_FILE} dosyasına (dönen günlük) yazar")
+    parser.add_argument("--no-perf", action="store_true", help="Performans ölçümünü kapatır")
+    parser.add_argument("--profile-startup", action="store_true", help="Açılış aşamalarının sürelerini raporlar ve çıkar")
+    args, qt_args = parser.parse_known_args()
+    if args.no_perf: perf.enabled = False
+    elif args.perf_log: perf.enable_log()
+    if args.backup_list or args.backup_verify is not None or args.backup_restore:
+        sys.exit(run_backup_command(args))
+    if args.import_file:
+        sys.exit(run_import_command(args))
+    if args.export_json:
+        sys.exit(run_export_json_command(args))
+    if args.close_period:
+        sys.exit(run_close_period_command(args))
+    if args.profile_startup:
+        startup_profiler = StartupProfiler(_MODULE_STARTED)
+        profile_mark("modül yükleme")
+    app = QApplication(sys.argv[:1] + qt_args)
+    profile_mark("QApplication")
     app.setStyleSheet("""
         QWidget { font-size: 11pt; font-family: Arial; }
         QMainWindow { background-color: #f7f8fa; }
-        QListWidget, QTableWidget { border: 1px solid #d3d3d3; border-radius: 5px; padding: 5px; background-color: white; }
+        QListView, QTableView { border: 1px solid #d3d3d3; border-radius: 5px; padding: 5px; background-color: white; }
         QPushButton { background-color: #007bff; color: white; border: none; padding: 8px 16px; border-radius: 4px; font-weight: bold; }
         QPushButton:hover { background-color: #0056b3; }
         QLineEdit { border: 1px solid #d3d3d3; border-radius: 4px; padding: 6px; }
         QHeaderView::section { background-color: #e9ecef; padding: 4px; border: 1px solid #d3d3d3; font-weight: bold; }
         QStatusBar { background-color: #e9ecef; }
     """)
-    main_window = CariApp()
-    if main_window.check_license_at_startup():
-        main_window.show()
-        sys.exit(app.exec_())
-    else:
+    try: main_window = CariApp()
+    except (OSError, ImportError, SerializationError, SharedStoreError) as e:
+        # Veri dosyası okunamadıysa boş defterle açılıp sonradan onun üzerine yazmak yerine program açılmaz.
+        QMessageBox.critical(None, "Veri Okunamadı", f"Veri dosyası okunamadı, program açılmayacak:\n{e}")
         sys.exit(1)
+    main_window.show()
+    app.processEvents()
+    if startup_profiler is not None:
+        startup_profiler.window_shown()
+        main_window.license_checked.connect(lambda ok: (print(startup_profiler.report(), file=sys.stderr), app.quit()))
+    main_window.start_license_check()
+    sys.exit(app.exec_())
 